@@ -0,0 +1,329 @@
+"""
+평가자 간 일치도와 질문별 정답(gold) 문서 집합.
+
+    python agreement.py gold/                         # 피드백 저장소 기준 (평가가 바뀐 질문만 다시 계산)
+    python agreement.py gold/ --history history.csv --threshold 0.5
+    python agreement.py gold/ --full --format json
+
+같은 질문(near_dup.normalize 기준: 대소문자/공백/문장부호 무시)을 평가한 사용자별 최근 평가 1건씩을 모아
+- 평가(A/B/C) 일치도: 전체 Fleiss' kappa, 평가자 쌍별 Cohen's kappa
+- 선택 문서 일치도: 평가자 쌍별 Jaccard
+- 정답 문서 집합: 평가자 중 threshold 비율 이상이 선택한 문서 (support = 선택한 평가자 수 / 평가자 수)
+를 계산한다. 결과는 디렉터리에 queries/pairs/gold.parquet로 저장하며, 다음 실행에서는 질문별 평가 지문(fingerprint)이
+바뀐(새로 평가되거나 평가가 추가/삭제된) 질문만 다시 계산해 해당 행을 교체한다.
+
+분석 노트북에서는:
+
+    from agreement import load_tables, summary
+    tables = load_tables('gold/')
+    tables['gold']  # query_key, query, dataset, chapter, article, title, votes, raters, support, best_rank
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import near_dup
+from evaluation import RATINGS
+from metrics import judgments_frame
+
+DEFAULT_THRESHOLD = 0.5
+MANIFEST_NAME = '_manifest.json'
+TABLE_NAMES = ('queries', 'pairs', 'gold')
+
+_RATING_COUNTS = [f'count_{rating}' for rating in RATINGS]
+_COLUMNS = {
+    'queries': ['query_key', 'query', 'raters', *_RATING_COUNTS, 'consensus', 'rating_agreement',
+                'mean_jaccard', 'gold_docs', 'fingerprint'],
+    'pairs': ['query_key', 'user_a', 'user_b', 'rating_a', 'rating_b', 'jaccard'],
+    'gold': ['query_key', 'query', 'dataset', 'chapter', 'article', 'title', 'votes', 'raters', 'support', 'best_rank'],
+}
+
+
+# -------------------------------
+# 평가자별 평가
+# -------------------------------
+def judgments(entries):
+    """
+    히스토리 항목을 (질문, 평가자)당 최근 평가 1건의 DataFrame으로 변환.
+    A/B 비교 모드처럼 엔드포인트별로 여러 행이 저장된 평가도 1건(마지막 행)으로 본다.
+    fingerprint 컬럼은 평가 1건의 해시이며, 질문별 합계가 질문의 평가 지문이 된다.
+    """
+    frame = pd.DataFrame.from_records(
+        entries, columns=['timestamp', 'user_name', 'query', 'rating', 'selected_documents']
+    )
+    # 같은 질문 문자열이 반복되므로 고유 문자열만 정규화
+    codes, uniques = pd.factorize(frame['query'])
+    keys = pd.Index(uniques, dtype=object).map(near_dup.normalize)
+    frame['query_key'] = keys.take(codes) if len(codes) else pd.Series(dtype=object)
+    frame = frame[(frame['query_key'] != '') & (frame['user_name'] != '')]
+    frame = frame.sort_values('timestamp', kind='stable').drop_duplicates(['query_key', 'user_name'], keep='last')
+
+    documents = frame['selected_documents'].map(lambda docs: '; '.join(docs or []))
+    frame['fingerprint'] = pd.util.hash_pandas_object(
+        frame[['user_name', 'timestamp', 'rating']].assign(documents=documents), index=False
+    ).to_numpy()
+    return frame.reset_index(drop=True)
+
+
+def fingerprints(frame):
+    """질문별 평가 지문 (평가자별 평가 해시의 합, 16진 문자열)"""
+    sums = frame.groupby('query_key')['fingerprint'].sum()
+    return sums.map('{:016x}'.format)
+
+
+# -------------------------------
+# 질문 단위 계산
+# -------------------------------
+def _selected_docs(frame):
+    """선택 문서 1건당 1행 (query_key, user_name, doc, dataset, chapter, article, title, rank)"""
+    _, docs = judgments_frame(frame)
+    docs['query_key'] = frame['query_key'].to_numpy()[docs['query_id']]
+    docs['user_name'] = frame['user_name'].to_numpy()[docs['query_id']]
+    docs['doc'] = docs.groupby(['dataset', 'chapter', 'article'], sort=False).ngroup()
+    return docs
+
+
+def rater_pairs(frame, docs):
+    """같은 질문을 평가한 평가자 쌍별 평가와 선택 문서 Jaccard"""
+    raters = frame[['query_key', 'user_name', 'rating']]
+    pairs = raters.merge(raters, on='query_key', suffixes=('_a', '_b'))
+    pairs = pairs[pairs['user_name_a'] < pairs['user_name_b']]
+    pairs = pairs.rename(columns={'user_name_a': 'user_a', 'user_name_b': 'user_b'})
+
+    # 교집합 크기: (질문, 문서)로 self-join, 집합 크기: (질문, 평가자)별 문서 수
+    selected = docs[['query_key', 'user_name', 'doc']]
+    shared = selected.merge(selected, on=['query_key', 'doc'], suffixes=('_a', '_b'))
+    shared = shared[shared['user_name_a'] < shared['user_name_b']]
+    intersection = shared.groupby(['query_key', 'user_name_a', 'user_name_b']).size()
+    intersection.index.names = ['query_key', 'user_a', 'user_b']
+    sizes = selected.groupby(['query_key', 'user_name']).size()
+
+    index = pd.MultiIndex.from_frame(pairs[['query_key', 'user_a', 'user_b']])
+    both = intersection.reindex(index, fill_value=0).to_numpy()
+    size_a = sizes.reindex(pd.MultiIndex.from_arrays([pairs['query_key'], pairs['user_a']]), fill_value=0).to_numpy()
+    size_b = sizes.reindex(pd.MultiIndex.from_arrays([pairs['query_key'], pairs['user_b']]), fill_value=0).to_numpy()
+    union = size_a + size_b - both
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pairs['jaccard'] = np.where(union > 0, both / union, np.nan)
+    return pairs[_COLUMNS['pairs']].reset_index(drop=True)
+
+
+def query_table(frame, pairs, gold):
+    """질문별 평가 분포, 합의 평가, 평가 일치율(Fleiss의 P_i), 평균 Jaccard, 정답 문서 수"""
+    index = pd.Index(frame['query_key'].unique(), name='query_key')
+    counts = frame.groupby(['query_key', 'rating']).size().unstack(fill_value=0)
+    counts = counts.reindex(index=index, columns=list(RATINGS), fill_value=0)
+    n = counts.to_numpy().sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        agreement = np.where(n >= 2, ((counts.to_numpy() ** 2).sum(axis=1) - n) / (n * (n - 1)), np.nan)
+    # 합의 평가: 최다 평가, 동률이면 낮은 평가(RATINGS의 뒤쪽)를 택함
+    reversed_counts = counts.to_numpy()[:, ::-1]
+    consensus = np.array(RATINGS, dtype=object)[len(RATINGS) - 1 - reversed_counts.argmax(axis=1)]
+    consensus[n == 0] = None
+
+    table = pd.DataFrame(counts.to_numpy(), index=index, columns=_RATING_COUNTS)
+    table.insert(0, 'raters', frame.groupby('query_key').size().reindex(index))
+    table.insert(0, 'query', frame.groupby('query_key')['query'].last().reindex(index))
+    table['consensus'] = consensus
+    table['rating_agreement'] = agreement
+    table['mean_jaccard'] = pairs.groupby('query_key')['jaccard'].mean().reindex(index)
+    table['gold_docs'] = gold.groupby('query_key').size().reindex(index, fill_value=0)
+    table['fingerprint'] = fingerprints(frame).reindex(index)
+    return table.reset_index()[_COLUMNS['queries']]
+
+
+def gold_set(frame, docs, threshold=DEFAULT_THRESHOLD):
+    """질문별 정답 문서: 평가자 중 threshold 비율 이상이 선택한 문서 (best_rank: 선택 당시 가장 높은 순위)"""
+    grouped = docs.groupby(['query_key', 'dataset', 'chapter', 'article'], sort=False)
+    gold = grouped.agg(title=('title', 'last'), votes=('user_name', 'size'), best_rank=('rank', 'min')).reset_index()
+    raters = frame.groupby('query_key').size()
+    gold['raters'] = raters.reindex(gold['query_key']).to_numpy()
+    gold['support'] = gold['votes'] / gold['raters']
+    gold = gold[gold['support'] >= threshold]
+    gold['query'] = frame.groupby('query_key')['query'].last().reindex(gold['query_key']).to_numpy()
+    gold = gold.sort_values(['query_key', 'support', 'best_rank'], ascending=[True, False, True])
+    return gold[_COLUMNS['gold']].reset_index(drop=True)
+
+
+def compute(frame, threshold=DEFAULT_THRESHOLD):
+    """judgments() 결과(일부 질문만이어도 됨)로 queries/pairs/gold 테이블 계산"""
+    frame = frame.reset_index(drop=True)
+    docs = _selected_docs(frame)
+    pairs = rater_pairs(frame, docs)
+    gold = gold_set(frame, docs, threshold)
+    return {'queries': query_table(frame, pairs, gold), 'pairs': pairs, 'gold': gold}
+
+
+# -------------------------------
+# 전체 일치도 (저장된 테이블에서 집계)
+# -------------------------------
+def fleiss_kappa(queries):
+    """평가자가 2명 이상인 질문의 평가 분포로 Fleiss' kappa (질문마다 평가자 수가 달라도 됨)"""
+    rated = queries[queries[_RATING_COUNTS].sum(axis=1) >= 2]
+    if rated.empty:
+        return None
+    counts = rated[_RATING_COUNTS].to_numpy(dtype=float)
+    n = counts.sum(axis=1)
+    observed = (((counts ** 2).sum(axis=1) - n) / (n * (n - 1))).mean()
+    expected = ((counts.sum(axis=0) / n.sum()) ** 2).sum()
+    if expected >= 1:
+        return None
+    return float((observed - expected) / (1 - expected))
+
+
+def cohen_kappa(pairs):
+    """평가자 쌍별 공통 질문 수, 평가 일치율, Cohen's kappa, 평균 선택 문서 Jaccard"""
+    columns = ['user_a', 'user_b', 'shared', 'agreement', 'kappa', 'mean_jaccard']
+    if pairs.empty:
+        return pd.DataFrame(columns=columns)
+    keys = ['user_a', 'user_b']
+    grouped = pairs.assign(agree=pairs['rating_a'] == pairs['rating_b']).groupby(keys)
+    table = grouped.agg(shared=('agree', 'size'), agreement=('agree', 'mean'), mean_jaccard=('jaccard', 'mean'))
+    margin_a = pairs.groupby(keys)['rating_a'].value_counts().unstack(fill_value=0)
+    margin_b = pairs.groupby(keys)['rating_b'].value_counts().unstack(fill_value=0)
+    margin_a = margin_a.reindex(index=table.index, columns=list(RATINGS), fill_value=0)
+    margin_b = margin_b.reindex(index=table.index, columns=list(RATINGS), fill_value=0)
+    expected = (margin_a * margin_b).sum(axis=1) / table['shared'] ** 2
+    table['kappa'] = ((table['agreement'] - expected) / (1 - expected)).where(expected < 1)
+    return table.reset_index()[columns].sort_values('shared', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def summary(tables):
+    """전체 일치도 요약 (Fleiss' kappa, 공통 질문 수로 가중한 평균 Cohen's kappa/Jaccard, 정답 문서 수)"""
+    queries, pairs = tables['queries'], tables['pairs']
+    by_pair = cohen_kappa(pairs)
+    weighted = by_pair.dropna(subset=['kappa'])
+    mean_kappa = None
+    if not weighted.empty:
+        mean_kappa = float(np.average(weighted['kappa'], weights=weighted['shared']))
+    jaccard = pairs['jaccard'].dropna()
+    return {
+        'queries': int(len(queries)),
+        'multi_rater_queries': int((queries['raters'] >= 2).sum()),
+        'judgments': int(queries['raters'].sum()),
+        'fleiss_kappa': fleiss_kappa(queries),
+        'mean_cohen_kappa': mean_kappa,
+        'mean_jaccard': float(jaccard.mean()) if len(jaccard) else None,
+        'gold_docs': int(len(tables['gold'])),
+        'rater_pairs': by_pair,
+    }
+
+
+# -------------------------------
+# 증분 저장
+# -------------------------------
+def _empty_tables():
+    return {name: pd.DataFrame(columns=columns) for name, columns in _COLUMNS.items()}
+
+
+def read_manifest(path):
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {'threshold': None, 'queries': 0, 'updated_at': None}
+    with open(manifest_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_atomic(path, name, write):
+    target = os.path.join(path, name)
+    tmp_path = target + '.tmp'
+    write(tmp_path)
+    os.replace(tmp_path, target)
+
+
+def _dump_json(obj, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2)
+
+
+def load_tables(path):
+    """저장된 queries/pairs/gold 테이블 로드 (없으면 빈 테이블)"""
+    if read_manifest(path)['updated_at'] is None:
+        return _empty_tables()
+    return {name: pd.read_parquet(os.path.join(path, f'{name}.parquet')) for name in TABLE_NAMES}
+
+
+def update(path, entries, threshold=DEFAULT_THRESHOLD, full=False):
+    """
+    평가 지문이 바뀐 질문만 다시 계산해 저장된 테이블을 갱신.
+    full=True이거나 threshold가 이전 실행과 다르면 전체를 다시 계산한다.
+    (테이블, {'queries', 'recomputed', 'removed'}) 반환.
+    """
+    os.makedirs(path, exist_ok=True)
+    manifest = read_manifest(path)
+    frame = judgments(entries)
+    current = fingerprints(frame)
+
+    previous = _empty_tables() if full or manifest['threshold'] != threshold else load_tables(path)
+    known = previous['queries'].set_index('query_key')['fingerprint']
+    changed = current.index[current.ne(known.reindex(current.index))]
+    removed = known.index.difference(current.index)
+    stale = changed.union(removed)
+
+    fresh = compute(frame[frame['query_key'].isin(changed)], threshold) if len(changed) else _empty_tables()
+    tables = {}
+    for name in TABLE_NAMES:
+        kept = previous[name][~previous[name]['query_key'].isin(stale)]
+        parts = [part for part in (kept, fresh[name]) if not part.empty]
+        table = pd.concat(parts, ignore_index=True) if parts else previous[name].iloc[:0]
+        tables[name] = table.sort_values('query_key', kind='stable').reset_index(drop=True)
+        _write_atomic(path, f'{name}.parquet', lambda tmp, table=table: table.to_parquet(tmp, index=False))
+
+    manifest = {'threshold': threshold, 'queries': len(tables['queries']),
+                'updated_at': time.strftime('%Y-%m-%d %H:%M:%S')}
+    _write_atomic(path, MANIFEST_NAME, lambda tmp: _dump_json(manifest, tmp))
+    return tables, {'queries': len(tables['queries']), 'recomputed': len(changed), 'removed': len(removed)}
+
+
+def _fmt(value):
+    return '-' if value is None else f"{value:.4f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="평가자 간 일치도와 질문별 정답 문서 집합")
+    parser.add_argument('path', help="결과를 저장할 디렉터리")
+    parser.add_argument('--history', help="시트를 내려받은 CSV 파일 (기본: 피드백 저장소에서 로드)")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="정답 문서로 볼 최소 선택 비율 (선택한 평가자 수 / 평가자 수)")
+    parser.add_argument('--full', action='store_true', help="저장된 결과를 무시하고 전체 다시 계산")
+    parser.add_argument('--format', choices=['text', 'json'], default='text')
+    args = parser.parse_args(argv)
+
+    import history
+    if args.history:
+        entries = history.load_history_file(args.history)
+    else:
+        import storage
+        entries = storage.get_store().history()
+
+    tables, stats = update(args.path, entries, args.threshold, args.full)
+    print(f"질문 {stats['queries']}개 중 {stats['recomputed']}개 다시 계산, {stats['removed']}개 삭제: {args.path}",
+          file=sys.stderr)
+    report = summary(tables)
+    by_pair = report.pop('rater_pairs')
+    if args.format == 'json':
+        report['rater_pairs'] = json.loads(by_pair.to_json(orient='records', force_ascii=False))
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print("## 평가자 간 일치도")
+        print(f"질문 {report['queries']}개 (평가자 2명 이상 {report['multi_rater_queries']}개), 평가 {report['judgments']}건")
+        print(f"Fleiss' kappa (평가): {_fmt(report['fleiss_kappa'])}")
+        print(f"평균 Cohen's kappa (평가, 공통 질문 수 가중): {_fmt(report['mean_cohen_kappa'])}")
+        print(f"평균 Jaccard (선택 문서): {_fmt(report['mean_jaccard'])}")
+        print(f"정답 문서: {report['gold_docs']}건 (선택 비율 {args.threshold:g} 이상)")
+        print()
+        if not by_pair.empty:
+            print("## 평가자 쌍별 일치도")
+            with pd.option_context('display.width', 200, 'display.float_format', '{:.4f}'.format):
+                print(by_pair.to_string(index=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
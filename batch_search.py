@@ -0,0 +1,137 @@
+"""
+질문 목록을 MISO 검색 API로 일괄 실행하는 CLI.
+
+    python batch_search.py queries.txt -o results.jsonl.gz --concurrency 8 --rate 5
+
+입력 파일은 한 줄에 질문 하나(.txt) 또는 {"query": ...} 형식의 JSON Lines(.jsonl)이며,
+결과는 질문마다 한 줄씩 점수순으로 정렬된 문서 목록을 JSON Lines로 기록한다.
+출력 파일명이 .gz로 끝나면 gzip으로 압축한다.
+"""
+import argparse
+import gzip
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import config
+import miso_api
+from parsing import parse_outputs, parse_search_results
+
+
+class RateLimiter:
+    """초당 rate회로 호출을 제한하는 토큰 버킷 (스레드 안전)"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def load_queries(path):
+    """질문 파일 로드 (.jsonl: 줄마다 {"query": ...}, 그 외: 줄마다 질문 하나)"""
+    queries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith('.jsonl'):
+                line = json.loads(line)['query']
+            queries.append(line)
+    return queries
+
+
+def rank_results(response_data):
+    """응답을 점수 내림차순 [dataset, chapter, article, score] 목록으로 변환"""
+    results = parse_outputs(parse_search_results(response_data))
+    results.sort(key=lambda x: x.score, reverse=True)
+    return [[r.dataset_name, r.chapter, r.article, r.score] for r in results]
+
+
+def run_query(index, query, args, client):
+    record = {'index': index, 'query': query}
+    started = time.perf_counter()
+    try:
+        payload = miso_api.build_payload(query, args.user_name, args.position, args.company)
+        response_data = client.search(payload)
+        record['hyde_query'] = response_data.get("data", {}).get("outputs", {}).get("hyde_query")
+        record['results'] = rank_results(response_data)
+    except Exception as e:
+        record['error'] = str(e)
+    record['elapsed'] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def open_output(path):
+    if path == '-':
+        return sys.stdout
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MISO 검색 API 일괄 실행")
+    parser.add_argument('queries', help="질문 파일 (.txt 또는 .jsonl)")
+    parser.add_argument('-o', '--output', default='-', help="결과 파일 (.jsonl / .jsonl.gz, 기본: 표준출력)")
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help="동시 요청 수")
+    parser.add_argument('-r', '--rate', type=float, default=0, help="초당 최대 요청 수, 재시도 포함 (0이면 제한 없음)")
+    parser.add_argument('--timeout', type=float, default=miso_api.DEFAULT_READ_TIMEOUT, help="응답 타임아웃(초)")
+    parser.add_argument('--max-retries', type=int, default=miso_api.DEFAULT_MAX_RETRIES,
+                        help="5xx/429/연결 오류 시 재시도 횟수")
+    parser.add_argument('--user-name', default='batch', help="요청에 사용할 사용자 이름")
+    parser.add_argument('--position', default=miso_api.DEFAULT_POSITION)
+    parser.add_argument('--company', default=miso_api.DEFAULT_COMPANY)
+    parser.add_argument('--api-url', default=config.API_URL)
+    parser.add_argument('--api-key', default=config.API_KEY)
+    args = parser.parse_args(argv)
+
+    if not args.api_url:
+        parser.error("MISO_API_URL이 설정되지 않았습니다. (--api-url로 지정 가능)")
+
+    queries = load_queries(args.queries)
+    limiter = RateLimiter(args.rate, burst=args.concurrency) if args.rate > 0 else None
+
+    # 동시 요청 수만큼 keep-alive 커넥션 재사용, 속도 제한은 재시도를 포함한 요청마다 적용
+    client = miso_api.MisoClient(args.api_url, args.api_key, read_timeout=args.timeout,
+                                 max_retries=args.max_retries, pool_maxsize=args.concurrency, limiter=limiter)
+
+    failed = 0
+    started = time.perf_counter()
+    out = open_output(args.output)
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            futures = [executor.submit(run_query, i, q, args, client) for i, q in enumerate(queries)]
+            for done, future in enumerate(as_completed(futures), start=1):
+                record = future.result()
+                if 'error' in record:
+                    failed += 1
+                out.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+                print(f"\r{done}/{len(queries)} 완료 (실패 {failed})", end='', file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"\n총 {len(queries)}건, 실패 {failed}건, {elapsed:.1f}초", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+피드백 히스토리 재생(replay) 기반 순위 회귀 벤치마크.
+
+    # 실제(또는 후보) 엔드포인트 대상
+    python benchmark.py --endpoint https://.../workflows/run --limit 200 -o report.json
+
+    # 오프라인(CI): 번들된 스텁 서버 + 기록 응답 사용
+    python benchmark.py --history fixtures/sample_history.csv --stub fixtures/miso_recordings.jsonl
+
+    # 현재 엔드포인트 응답을 스텁용 기록 파일로 저장
+    python benchmark.py --record fixtures/miso_recordings.jsonl
+
+히스토리의 질문을 다시 검색해, 평가자가 관련 문서로 선택한 문서의 순위가 저장 당시(순위: i/N)와
+비교해 얼마나 올라가거나 내려갔는지, 그리고 응답 시간 분위수를 보고한다.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import history
+import miso_api
+from parsing import build_doc_index, parse_outputs, parse_search_results, parse_selected_doc
+from search_cache import normalize_query
+
+LATENCY_PERCENTILES = (50, 90, 95, 99)
+
+_record_lock = threading.Lock()
+
+
+def percentile(sorted_values, q):
+    """정렬된 값 목록의 q 분위수 (선형 보간)"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def build_cases(entries, limit=None):
+    """
+    히스토리를 질문(정규화 기준)별 재생 케이스로 묶기.
+    같은 질문의 평가가 여러 건이면 관련 문서를 합치고, 문서별 순위는 가장 최근 평가 값을 사용한다.
+    entries는 최신순이어야 한다.
+    """
+    cases = {}
+    for entry in entries:
+        docs = [parse_selected_doc(text) for text in entry['selected_documents'] if text.strip()]
+        docs = [d for d in docs if d]
+        if not docs:
+            continue
+        key = normalize_query(entry['query'])
+        case = cases.get(key)
+        if case is None:
+            if limit and len(cases) >= limit:
+                continue
+            case = cases[key] = {'query': entry['query'], 'relevant': {}}
+        for doc in docs:
+            case['relevant'].setdefault((doc['dataset'], doc['chapter'], doc['article']), doc['rank'])
+    return list(cases.values())
+
+
+def replay_case(case, args, client):
+    """케이스 1건 재검색 후 관련 문서별 순위 변화 계산"""
+    payload = miso_api.build_payload(case['query'], args.user_name)
+    started = time.perf_counter()
+    try:
+        response_data = client.search(payload)
+    except Exception as e:
+        return {'query': case['query'], 'error': str(e), 'latency': time.perf_counter() - started}
+    latency = time.perf_counter() - started
+
+    if args.record:
+        from miso_stub import save_recording
+        with _record_lock:
+            save_recording(args.record, case['query'], response_data)
+
+    results = parse_outputs(parse_search_results(response_data))
+    index = build_doc_index(results)
+    docs = []
+    for key, old_rank in case['relevant'].items():
+        result = index.get(key)
+        new_rank = result.position if result else None
+        docs.append({
+            'doc': ' - '.join(key),
+            'old_rank': old_rank,
+            'new_rank': new_rank,
+            # 양수: 순위 상승, 음수: 하락, None: 결과에서 사라짐
+            'shift': old_rank - new_rank if new_rank is not None else None
+        })
+    return {'query': case['query'], 'latency': latency, 'total': len(results), 'docs': docs}
+
+
+def summarize(records):
+    latencies = sorted(r['latency'] for r in records if 'error' not in r)
+    docs = [d for r in records for d in r.get('docs', [])]
+    shifts = [d['shift'] for d in docs if d['shift'] is not None]
+    return {
+        'queries': len(records),
+        'errors': sum(1 for r in records if 'error' in r),
+        'relevant_docs': len(docs),
+        'improved': sum(1 for s in shifts if s > 0),
+        'unchanged': sum(1 for s in shifts if s == 0),
+        'worsened': sum(1 for s in shifts if s < 0),
+        'dropped': sum(1 for d in docs if d['shift'] is None),
+        'mean_shift': sum(shifts) / len(shifts) if shifts else None,
+        'latency': {
+            **{f'p{q}': percentile(latencies, q) for q in LATENCY_PERCENTILES},
+            'mean': sum(latencies) / len(latencies) if latencies else None,
+            'max': latencies[-1] if latencies else None
+        }
+    }
+
+
+def print_report(summary, records, verbose=False):
+    print(f"질문 {summary['queries']}건 (오류 {summary['errors']}건), 관련 문서 {summary['relevant_docs']}건")
+    print(f"  순위 상승 {summary['improved']} · 유지 {summary['unchanged']} · "
+          f"하락 {summary['worsened']} · 결과에서 사라짐 {summary['dropped']}")
+    if summary['mean_shift'] is not None:
+        print(f"  평균 순위 변화 {summary['mean_shift']:+.2f}")
+    latency = summary['latency']
+    if latency['mean'] is not None:
+        parts = ' · '.join(f"p{q} {latency[f'p{q}'] * 1000:.0f}ms" for q in LATENCY_PERCENTILES)
+        print(f"  응답 시간 {parts} · 최대 {latency['max'] * 1000:.0f}ms")
+
+    for record in records:
+        changed = [d for d in record.get('docs', []) if d['shift'] != 0]
+        if 'error' in record:
+            print(f"\n[오류] {record['query']}: {record['error']}")
+        elif changed or verbose:
+            print(f"\n{record['query']}")
+            for d in record['docs']:
+                new_rank = d['new_rank'] if d['new_rank'] is not None else '-'
+                shift = f"{d['shift']:+d}" if d['shift'] is not None else '사라짐'
+                print(f"  {d['doc']}: {d['old_rank']} → {new_rank} ({shift})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="히스토리 재생 기반 순위 회귀 벤치마크")
+    parser.add_argument('--history', help="시트를 내려받은 CSV 파일 (기본: 피드백 저장소에서 로드)")
+    parser.add_argument('--endpoint', default=config.API_URL, help="검색 API URL (기본: MISO_API_URL)")
+    parser.add_argument('--api-key', default=config.API_KEY or '')
+    parser.add_argument('--stub', metavar='RECORDINGS', help="기록 파일로 로컬 스텁 서버를 띄워 대상 엔드포인트로 사용")
+    parser.add_argument('--record', metavar='RECORDINGS', help="받은 응답을 스텁용 기록 파일에 추가")
+    parser.add_argument('--limit', type=int, help="최근 질문 N개만 재생")
+    parser.add_argument('-c', '--concurrency', type=int, default=4)
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--user-name', default='benchmark')
+    parser.add_argument('-o', '--output', help="결과 JSON 파일")
+    parser.add_argument('-v', '--verbose', action='store_true', help="순위 변화가 없는 질문도 출력")
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help="순위가 하락했거나 사라진 문서가 있으면 종료 코드 1")
+    parser.add_argument('--history-endpoint', default=history.PRODUCTION_ENDPOINT, metavar='NAME',
+                        help="재생할 평가의 A/B 비교 엔드포인트 이름 (기본: 일반 검색으로 저장된 운영 평가)")
+    args = parser.parse_args(argv)
+
+    if args.history:
+        entries = history.load_history_file(args.history)
+    else:
+        import storage
+        entries = storage.get_store().history()
+    # A/B 비교 평가는 엔드포인트마다 한 행씩 저장되므로 한 엔드포인트의 평가(저장 당시 순위)만 재생
+    cases = build_cases(history.for_endpoint(entries, args.history_endpoint), args.limit)
+
+    stub = None
+    if args.stub:
+        from miso_stub import StubServer, load_recordings
+        stub = StubServer(load_recordings(args.stub)).start()
+        args.endpoint = stub.url
+    if not args.endpoint:
+        parser.error("검색 API URL이 없습니다. (--endpoint 또는 --stub 지정)")
+
+    # 응답 시간을 그대로 측정하기 위해 재시도/헤지 없이 호출
+    client = miso_api.MisoClient(args.endpoint, args.api_key, read_timeout=args.timeout,
+                                 max_retries=0, hedge=False, pool_maxsize=args.concurrency)
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            records = list(executor.map(lambda case: replay_case(case, args, client), cases))
+    finally:
+        if stub:
+            stub.stop()
+
+    summary = summarize(records)
+    print_report(summary, records, args.verbose)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'queries': records}, f, ensure_ascii=False, indent=2)
+
+    if args.fail_on_regression and (summary['worsened'] or summary['dropped'] or summary['errors']):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import config
+import miso_api
+from result_set import ResultSet
+
+# -------------------------------
+# A/B 검색 비교
+#    같은 요청을 설정된 엔드포인트(COMPARE_ENDPOINTS) 모두에 동시에 보내고,
+#    문서(dataset, chapter, article)별 순위/관련도 차이를 첫 번째 엔드포인트 기준으로 계산
+# -------------------------------
+MAX_WORKERS = 8
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='compare')
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def load_endpoints():
+    """
+    COMPARE_ENDPOINTS 설정을 [{'name', 'url', 'api_key'}] 목록으로 반환.
+    JSON 배열 문자열(환경변수) 또는 secrets의 배열 모두 허용하며, api_key가 없으면 MISO_API_KEY를 사용한다.
+    """
+    value = config.get_setting('COMPARE_ENDPOINTS')
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = json.loads(value)
+    endpoints = []
+    for item in value:
+        item = dict(item)
+        endpoints.append({
+            'name': item.get('name') or urlparse(item['url']).netloc,
+            'url': item['url'],
+            'api_key': item.get('api_key') or config.API_KEY
+        })
+    return endpoints
+
+
+def get_client(endpoint):
+    """엔드포인트별 프로세스 공유 클라이언트 (비교 화면의 응답 시간을 그대로 보여주기 위해 헤지 없음)"""
+    key = (endpoint['url'], endpoint['api_key'])
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = miso_api.MisoClient(endpoint['url'], endpoint['api_key'], max_retries=0)
+        return client
+
+
+def _search_one(endpoint, payload):
+    started = time.perf_counter()
+    try:
+        response_data = get_client(endpoint).search(payload)
+        result_set = ResultSet.from_response(response_data)
+    except Exception as e:
+        return {'name': endpoint['name'], 'latency': time.perf_counter() - started, 'error': str(e)}
+    return {'name': endpoint['name'], 'latency': time.perf_counter() - started, 'result_set': result_set}
+
+
+def fan_out(endpoints, payload):
+    """
+    모든 엔드포인트에 동시에 검색 요청.
+    엔드포인트 순서대로 {'name', 'latency', 'result_set' 또는 'error'} 목록을 반환하며,
+    전체 대기 시간은 가장 느린 엔드포인트의 응답 시간과 같다.
+    """
+    futures = [_executor.submit(_search_one, endpoint, payload) for endpoint in endpoints]
+    return [future.result() for future in futures]
+
+
+def compare_rows(responses):
+    """
+    문서별 비교 행 목록.
+    ranks/scores는 엔드포인트 순서의 원본 순위(1부터)/관련도이며, 결과에 없으면 None.
+    rank_deltas/score_deltas는 첫 번째 엔드포인트 대비 차이(순위는 양수면 상승)이다.
+    """
+    result_sets = [r.get('result_set') for r in responses]
+    keys = {}
+    for n, result_set in enumerate(result_sets):
+        if result_set is None:
+            continue
+        for i in range(len(result_set)):
+            entry = keys.setdefault(result_set.key(i), [None] * len(result_sets))
+            if entry[n] is None:  # 같은 키는 원본 순서상 첫 문서
+                entry[n] = i
+
+    rows = []
+    for key, indexes in keys.items():
+        ranks = [i + 1 if i is not None else None for i in indexes]
+        scores = [result_sets[n].scores[i] if i is not None else None for n, i in enumerate(indexes)]
+        rows.append({
+            'key': key,
+            'ranks': ranks,
+            'scores': scores,
+            'rank_deltas': [ranks[0] - r if ranks[0] is not None and r is not None else None for r in ranks],
+            'score_deltas': [s - scores[0] if scores[0] is not None and s is not None else None for s in scores]
+        })
+    # 어느 엔드포인트에서든 가장 높은 순위 기준 정렬
+    rows.sort(key=lambda row: min(r for r in row['ranks'] if r is not None))
+    return rows
@@ -0,0 +1,50 @@
+import os
+from dotenv import load_dotenv
+
+# -------------------------------
+# 환경 변수 로드
+#    로컬(.env / 터미널 환경변수) / Streamlit Cloud(secrets) 분기
+# -------------------------------
+env_path = os.path.join(os.path.dirname(__file__), '.env')
+if os.path.exists(env_path):
+    load_dotenv(env_path)
+
+
+# secrets 파일이 없음을 확인했는지 여부 (로컬 환경에서 설정을 조회할 때마다 파일을 다시 찾지 않음)
+_secrets_missing = False
+
+
+def _get_secret(name, default=None):
+    """Streamlit secrets 조회 (secrets 파일이 없거나 Streamlit 밖이면 default)"""
+    global _secrets_missing
+    if _secrets_missing:
+        return default
+    try:
+        import streamlit as st
+        return st.secrets.get(name, default)
+    except FileNotFoundError:
+        _secrets_missing = True
+        return default
+    except Exception:
+        return default
+
+
+def get_setting(name, default=None):
+    """환경변수 → Streamlit secrets 순서로 설정값 조회"""
+    value = os.getenv(name)
+    if value:
+        return value
+    return _get_secret(name, default)
+
+
+def get_gcp_service_account():
+    """Streamlit secrets의 GCP 서비스 계정 정보 반환"""
+    return dict(_get_secret("gcp_service_account", {}))
+
+
+API_URL = get_setting("MISO_API_URL")
+API_KEY = get_setting("MISO_API_KEY")
+GOOGLE_SHEET_ID = get_setting("GOOGLE_SHEET_ID")
+
+# 로컬 개발 환경용 서비스 계정 키 파일
+GCP_CREDENTIALS_FILE = 'credentials.json'
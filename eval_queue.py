@@ -0,0 +1,170 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import miso_api
+import perf
+import search_cache
+
+# -------------------------------
+# 평가 큐
+#    사용자별로 배정된 질문 목록과 진행 상황을 SQLite에 저장하고(새로고침 후에도 이어서 진행),
+#    현재 질문을 평가하는 동안 다음 질문을 백그라운드에서 미리 검색해 검색 캐시에 넣어 둔다.
+# -------------------------------
+DEFAULT_QUEUE_PATH = os.path.join(os.path.dirname(__file__), 'eval_queue.db')
+# 미리 검색할 다음 질문 수
+DEFAULT_PREFETCH_DEPTH = 2
+
+PENDING = 'pending'
+DONE = 'done'
+SKIPPED = 'skipped'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue_item (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    query TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    updated_at REAL NOT NULL,
+    UNIQUE (user_name, position)
+);
+CREATE INDEX IF NOT EXISTS idx_queue_item_user_status ON queue_item (user_name, status, position);
+"""
+
+
+def parse_queries(text, jsonl=False):
+    """질문 목록 파일 내용 파싱 (jsonl: 줄마다 {"query": ...}, 그 외: 줄마다 질문 하나)"""
+    queries = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        queries.append(json.loads(line)['query'] if jsonl else line)
+    return queries
+
+
+class EvalQueue:
+    """사용자별 평가 질문 목록 (스레드 안전)"""
+
+    def __init__(self, path, prefetch_depth=DEFAULT_PREFETCH_DEPTH):
+        self.path = path
+        self.prefetch_depth = prefetch_depth
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(_SCHEMA)
+
+        self._executor = ThreadPoolExecutor(max_workers=max(1, prefetch_depth), thread_name_prefix='prefetch')
+        self._inflight = set()
+        self._inflight_lock = threading.Lock()
+
+    # -------------------------------
+    # 질문 목록 / 진행 상황
+    # -------------------------------
+    def assign(self, user_name, queries):
+        """사용자의 질문 목록을 새 목록으로 교체"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.execute('DELETE FROM queue_item WHERE user_name = ?', (user_name,))
+                self._conn.executemany(
+                    'INSERT INTO queue_item (user_name, position, query, updated_at) VALUES (?, ?, ?, ?)',
+                    [(user_name, position, query, now) for position, query in enumerate(queries, 1)]
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def upcoming(self, user_name, limit=1):
+        """아직 평가하지 않은 질문 limit개 (첫 번째가 현재 질문)"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, position, query FROM queue_item WHERE user_name = ? AND status = ? '
+                'ORDER BY position LIMIT ?',
+                (user_name, PENDING, limit)
+            ).fetchall()
+        return [{'id': row[0], 'position': row[1], 'query': row[2]} for row in rows]
+
+    def current(self, user_name):
+        items = self.upcoming(user_name, 1)
+        return items[0] if items else None
+
+    def mark(self, item_id, status):
+        with self._lock:
+            self._conn.execute(
+                'UPDATE queue_item SET status = ?, updated_at = ? WHERE id = ?',
+                (status, time.time(), item_id)
+            )
+
+    def progress(self, user_name):
+        """{'total', 'done', 'skipped', 'pending'}"""
+        with self._lock:
+            counts = dict(self._conn.execute(
+                'SELECT status, COUNT(*) FROM queue_item WHERE user_name = ? GROUP BY status',
+                (user_name,)
+            ).fetchall())
+        return {
+            'total': sum(counts.values()),
+            'done': counts.get(DONE, 0),
+            'skipped': counts.get(SKIPPED, 0),
+            'pending': counts.get(PENDING, 0)
+        }
+
+    def clear(self, user_name):
+        with self._lock:
+            self._conn.execute('DELETE FROM queue_item WHERE user_name = ?', (user_name,))
+
+    # -------------------------------
+    # 미리 검색
+    # -------------------------------
+    def _prefetch_one(self, payload, key):
+        try:
+            cache = search_cache.get_search_cache()
+            if cache.contains(payload):
+                return
+            with perf.timed('prefetch'):
+                response_data = miso_api.get_client().search(payload)
+            cache.put(payload, response_data)
+            perf.incr('prefetched')
+        except Exception:
+            # 미리 검색 실패는 무시 (해당 질문 차례에 일반 검색으로 다시 시도)
+            perf.incr('prefetch_errors')
+        finally:
+            with self._inflight_lock:
+                self._inflight.discard(key)
+
+    def prefetch(self, payloads):
+        """검색 캐시에 없는 요청을 백그라운드에서 검색해 캐시에 저장 (이미 진행 중인 요청은 건너뜀)"""
+        cache = search_cache.get_search_cache()
+        for payload in payloads:
+            key = search_cache.cache_key(payload)
+            if cache.contains(payload):
+                continue
+            with self._inflight_lock:
+                if key in self._inflight:
+                    continue
+                self._inflight.add(key)
+            self._executor.submit(self._prefetch_one, payload, key)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_eval_queue():
+    """프로세스 공유 평가 큐 반환"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = EvalQueue(
+                config.get_setting('EVAL_QUEUE_PATH', DEFAULT_QUEUE_PATH),
+                prefetch_depth=int(config.get_setting('EVAL_PREFETCH_DEPTH', DEFAULT_PREFETCH_DEPTH))
+            )
+        return _queue
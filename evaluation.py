@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import miso_api
+import perf
+import search_cache
+from parsing import build_doc_index
+
+# -------------------------------
+# 평가 공통 처리
+#    Streamlit 화면(ui)과 헤드리스 API(headless_api)가 함께 쓰는 검색/피드백 검증/시트 행 구성
+# -------------------------------
+# 검색 결과 품질 평가 선택지
+RATINGS = ("A", "B", "C")
+
+
+def search(payload, refresh=False):
+    """
+    검색 캐시를 거쳐 검색 API 호출 (캐시/클라이언트는 프로세스 공유).
+    refresh=True면 캐시를 무시하고 다시 호출한 뒤 결과로 캐시를 갱신한다.
+    (응답 JSON, 캐시 사용 여부) 반환. 호출 실패 시 miso_api의 예외를 그대로 던진다.
+    """
+    cache = search_cache.get_search_cache()
+    if not refresh:
+        cached = cache.get(payload)
+        if cached is not None:
+            return cached, True
+    with perf.timed('miso_api'):
+        response_data = miso_api.get_client().search(payload)
+    cache.put(payload, response_data)
+    return response_data, False
+
+
+def validate_feedback(user_name, feedback_data):
+    """피드백 1건의 오류 메시지 목록 (문제가 없으면 빈 목록)"""
+    errors = []
+    if not user_name:
+        errors.append("사용자 이름을 입력해주세요.")
+    if not feedback_data['rating']:
+        errors.append("검색 결과 품질 평가를 선택해주세요.")
+    elif feedback_data['rating'] not in RATINGS:
+        errors.append(f"검색 결과 품질 평가는 {', '.join(RATINGS)} 중 하나여야 합니다.")
+    if not feedback_data['selected_documents']:
+        errors.append("관련 문서를 하나 이상 선택해주세요.")
+    return errors
+
+
+def build_feedback_row(feedback_data):
+    """
+    피드백 1건을 시트 한 행(컬럼 순서대로의 값 리스트)으로 변환.
+    선택 문서는 (dataset, chapter, article) 인덱스로 바로 찾는다.
+    """
+    # 현재 시간
+    feedback_data['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    # 선택된 문서 정보 가공 (all_results: 원본 순서의 SearchResult 목록)
+    all_results = feedback_data['all_results']
+    doc_index = build_doc_index(all_results)
+    selected_docs_info = []
+    for doc_key in feedback_data['selected_documents']:
+        result = doc_index.get(tuple(doc_key))
+        if result is None:
+            continue
+        doc_info = f"{result.dataset_name} - {result.chapter} - {result.article}"
+        if result.title:
+            doc_info += f" ({result.title})"
+        doc_info += f" (관련도: {result.score:.4f}, 순위: {result.position}/{len(all_results)})"
+        selected_docs_info.append(doc_info)
+
+    # 행 단위로 시트에 추가할 데이터 구성
+    return [
+        feedback_data['timestamp'],
+        feedback_data['user_name'],
+        feedback_data['query'],
+        feedback_data['rating'],
+        feedback_data['comment'],
+        '; '.join(selected_docs_info),
+        feedback_data.get('endpoint', '')
+    ]
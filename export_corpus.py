@@ -0,0 +1,188 @@
+"""
+평가 코퍼스 컬럼형(Parquet/Arrow) 내보내기.
+
+    python export_corpus.py corpus/                       # 피드백 저장소에서 새 평가만 추가 내보내기
+    python export_corpus.py corpus/ --history history.csv
+    python export_corpus.py corpus/ --format arrow
+
+선택 문서 1건당 1행(선택 문서가 없는 평가는 문서 컬럼이 비어 있는 1행)으로 펼치고,
+"선택된 문서" 문자열을 dataset/chapter/article/title/score/rank/total 컬럼으로 파싱해 저장한다.
+실행할 때마다 이전 스냅샷 이후 추가된 평가만 새 part 파일로 쓰며, 진행 위치는 _manifest.json에 기록한다.
+
+분석 노트북에서는:
+
+    from export_corpus import load_corpus
+    df = load_corpus('corpus/', columns=['query', 'dataset', 'rank'])
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from parsing import SELECTED_DOC_PATTERN
+
+MANIFEST_NAME = '_manifest.json'
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+SCHEMA = pa.schema([
+    ('timestamp', pa.timestamp('s')),
+    ('user_name', pa.dictionary(pa.int32(), pa.string())),
+    ('query', pa.string()),
+    ('rating', pa.dictionary(pa.int8(), pa.string())),
+    ('comment', pa.string()),
+    ('endpoint', pa.dictionary(pa.int8(), pa.string())),
+    ('doc_position', pa.int16()),
+    ('doc_text', pa.string()),
+    ('dataset', pa.dictionary(pa.int32(), pa.string())),
+    ('chapter', pa.string()),
+    ('article', pa.string()),
+    ('title', pa.string()),
+    ('score', pa.float64()),
+    ('rank', pa.int32()),
+    ('total', pa.int32()),
+])
+
+_FEEDBACK_COLUMNS = ['timestamp', 'user_name', 'query', 'rating', 'comment', 'selected_documents', 'endpoint']
+
+
+def _entry_key(entry):
+    return [entry['timestamp'], entry['user_name'], entry['query'], entry.get('endpoint', '')]
+
+
+def judgments_table(entries):
+    """히스토리 항목 목록을 선택 문서 단위 Arrow 테이블로 변환"""
+    feedback = pd.DataFrame.from_records(entries, columns=_FEEDBACK_COLUMNS)
+    feedback['endpoint'] = feedback['endpoint'].fillna('')
+    feedback['selected_documents'] = feedback['selected_documents'].map(
+        lambda docs: [d.strip() for d in docs if d.strip()] or [None]
+    )
+    rows = feedback.explode('selected_documents').rename(columns={'selected_documents': 'doc_text'})
+    rows['doc_position'] = rows.groupby(level=0).cumcount().where(rows['doc_text'].notna())
+
+    # 같은 문서 문자열이 반복되므로 고유 문자열만 정규식으로 파싱
+    texts = rows['doc_text']
+    codes, uniques = pd.factorize(texts)
+    parsed = pd.Series(uniques, dtype=object).str.extract(SELECTED_DOC_PATTERN)
+    parsed = parsed.reindex(codes).set_axis(rows.index)  # 코드 -1(문서 없음)은 빈 값
+    rows = pd.concat([rows, parsed], axis=1).reset_index(drop=True)
+
+    rows['timestamp'] = pd.to_datetime(rows['timestamp'], errors='coerce')
+    rows['score'] = pd.to_numeric(rows['score'], errors='coerce')
+    rows['rank'] = pd.to_numeric(rows['rank'], errors='coerce').astype('Int32')
+    rows['total'] = pd.to_numeric(rows['total'], errors='coerce').astype('Int32')
+    rows['doc_position'] = rows['doc_position'].astype('Int16')
+    rows['title'] = rows['title'].where(rows['dataset'].isna(), rows['title'].fillna(''))
+    return pa.Table.from_pandas(rows[SCHEMA.names], schema=SCHEMA, preserve_index=False)
+
+
+def read_manifest(path):
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {'parts': [], 'rows': 0, 'cursor': None, 'last_timestamp': None, 'boundary': []}
+    with open(manifest_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_manifest(path, manifest):
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def new_entries(entries, manifest, cursor_based):
+    """
+    이전 스냅샷 이후 항목만 선택.
+    저장소가 증분 cursor를 지원하면 받은 항목 전체, 아니면 마지막으로 내보낸 시각 이후 항목
+    (같은 시각의 항목은 이미 내보낸 키를 제외)을 사용한다.
+    """
+    if cursor_based:
+        return list(entries)
+    last = manifest['last_timestamp']
+    if last is None:
+        return list(entries)
+    boundary = {tuple(key) for key in manifest['boundary']}
+    return [e for e in entries
+            if e['timestamp'] > last or (e['timestamp'] == last and tuple(_entry_key(e)) not in boundary)]
+
+
+def write_snapshot(path, entries, cursor=None, cursor_based=False, file_format='parquet'):
+    """새 항목을 part 파일 1개로 저장하고 manifest 갱신. 저장한 행 수 반환 (새 항목이 없으면 0)"""
+    os.makedirs(path, exist_ok=True)
+    manifest = read_manifest(path)
+    entries = new_entries(entries, manifest, cursor_based)
+    if cursor is not None:
+        manifest['cursor'] = cursor
+    if not entries:
+        _write_manifest(path, manifest)
+        return 0
+
+    table = judgments_table(entries)
+    name = f"part-{len(manifest['parts']):05d}-{int(time.time())}{FORMATS[file_format]}"
+    part_path = os.path.join(path, name)
+    if file_format == 'parquet':
+        pq.write_table(table, part_path, compression='zstd')
+    else:
+        feather.write_feather(table, part_path, compression='zstd')
+
+    last = max(e['timestamp'] for e in entries)
+    boundary = [_entry_key(e) for e in entries if e['timestamp'] == last]
+    if last == manifest['last_timestamp']:
+        boundary += manifest['boundary']
+    if manifest['last_timestamp'] is None or last >= manifest['last_timestamp']:
+        manifest['last_timestamp'] = last
+        manifest['boundary'] = boundary
+    manifest['parts'].append({'file': name, 'rows': table.num_rows, 'judgments': len(entries)})
+    manifest['rows'] += table.num_rows
+    _write_manifest(path, manifest)
+    return table.num_rows
+
+
+def load_corpus(path, columns=None, filter=None, as_pandas=True):
+    """
+    내보낸 코퍼스 로드 (manifest의 part 파일 전체).
+    filter는 pyarrow.dataset 식 (예: ds.field('rating') == 'A'), as_pandas=False면 Arrow 테이블 반환.
+    """
+    parts = [os.path.join(path, p['file']) for p in read_manifest(path)['parts']]
+    if not parts:
+        table = SCHEMA.empty_table()
+        table = table.select(columns) if columns else table
+    else:
+        file_format = 'parquet' if parts[0].endswith('.parquet') else 'feather'
+        table = ds.dataset(parts, schema=SCHEMA, format=file_format).to_table(columns=columns, filter=filter)
+    return table.to_pandas() if as_pandas else table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="평가 코퍼스 Parquet/Arrow 증분 내보내기")
+    parser.add_argument('path', help="내보낼 디렉터리")
+    parser.add_argument('--history', help="시트를 내려받은 CSV 파일 (기본: 피드백 저장소에서 로드)")
+    parser.add_argument('--format', choices=list(FORMATS), default='parquet')
+    args = parser.parse_args(argv)
+
+    manifest = read_manifest(args.path)
+    if manifest['parts'] and not manifest['parts'][0]['file'].endswith(FORMATS[args.format]):
+        parser.error("기존 스냅샷과 다른 형식으로는 추가할 수 없습니다.")
+
+    if args.history:
+        import history
+        entries, cursor = history.load_history_file(args.history), None
+    else:
+        import storage
+        entries, cursor = storage.get_store().updates(manifest['cursor'])
+    rows = write_snapshot(args.path, entries, cursor, cursor_based=cursor is not None, file_format=args.format)
+    total = read_manifest(args.path)['rows']
+    print(f"{rows}행 추가 (총 {total}행): {args.path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,212 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+
+import config
+import history
+import sheets
+
+# -------------------------------
+# 피드백 write-behind 큐
+#    제출은 로컬 SQLite 스풀에 기록 후 즉시 반환,
+#    백그라운드 워커가 모아서 구글 시트로 전송
+# -------------------------------
+DEFAULT_SPOOL_PATH = os.path.join(os.path.dirname(__file__), 'feedback_spool.db')
+
+PENDING = 'pending'
+FLUSHED = 'flushed'
+
+# 한 번에 시트로 전송할 최대 행 수
+DEFAULT_BATCH_SIZE = 50
+# 전송 실패 시 재시도 대기(초): base * 2^n (최대 max), 지터 적용
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 60.0
+# 대기 중인 항목이 없을 때 스풀을 다시 확인하는 주기(초)
+IDLE_INTERVAL = 5.0
+# 전송 완료 항목 보관 기간(초)
+FLUSHED_RETENTION = 24 * 60 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS spool (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_name TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    flushed_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_spool_status ON spool (status, id);
+CREATE INDEX IF NOT EXISTS idx_spool_user ON spool (user_name, status);
+"""
+
+
+class FeedbackQueue:
+    """
+    피드백 행을 SQLite 스풀에 영속화하고 writer(rows)로 일괄 전송하는 큐.
+    writer는 실패 시 예외를 던져야 하며, 전송된 행은 FLUSHED로 표시된다.
+    전송 직후 프로세스가 종료되면 같은 행이 다시 전송될 수 있다(at-least-once).
+    """
+
+    def __init__(self, path, writer, batch_size=DEFAULT_BATCH_SIZE,
+                 base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY, on_flush=None):
+        self.path = path
+        self._writer = writer
+        self.batch_size = batch_size
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._on_flush = on_flush
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute(
+            'DELETE FROM spool WHERE status = ? AND flushed_at < ?',
+            (FLUSHED, time.time() - FLUSHED_RETENTION)
+        )
+
+    # -------------------------------
+    # 적재 / 조회
+    # -------------------------------
+    def enqueue(self, rows):
+        """행 목록을 스풀에 기록하고 항목 ID 목록 반환 (디스크 기록 후 반환)"""
+        now = time.time()
+        ids = []
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                for row in rows:
+                    cursor = self._conn.execute(
+                        'INSERT INTO spool (user_name, payload, created_at) VALUES (?, ?, ?)',
+                        (row[1], json.dumps(row, ensure_ascii=False), now)
+                    )
+                    ids.append(cursor.lastrowid)
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        self._wake.set()
+        return ids
+
+    def status(self, ids):
+        """{항목 ID: 상태} 반환 (보관 기간이 지나 삭제된 항목은 FLUSHED로 간주)"""
+        if not ids:
+            return {}
+        placeholders = ','.join('?' * len(ids))
+        with self._lock:
+            found = dict(self._conn.execute(
+                f'SELECT id, status FROM spool WHERE id IN ({placeholders})', list(ids)
+            ).fetchall())
+        return {i: found.get(i, FLUSHED) for i in ids}
+
+    def counts(self):
+        """{'pending': n, 'flushed': m} 반환"""
+        with self._lock:
+            result = dict(self._conn.execute(
+                'SELECT status, COUNT(*) FROM spool GROUP BY status'
+            ).fetchall())
+        return {PENDING: result.get(PENDING, 0), FLUSHED: result.get(FLUSHED, 0)}
+
+    def pending_rows(self, user_name):
+        """사용자의 전송 대기 중인 행 목록 (최신순)"""
+        with self._lock:
+            payloads = self._conn.execute(
+                'SELECT payload FROM spool WHERE user_name = ? AND status = ? ORDER BY id DESC',
+                (user_name, PENDING)
+            ).fetchall()
+        return [json.loads(p) for (p,) in payloads]
+
+    # -------------------------------
+    # 전송
+    # -------------------------------
+    def flush_once(self):
+        """대기 항목을 최대 batch_size개 전송하고 전송한 개수 반환 (실패 시 예외)"""
+        with self._lock:
+            batch = self._conn.execute(
+                'SELECT id, payload FROM spool WHERE status = ? ORDER BY id LIMIT ?',
+                (PENDING, self.batch_size)
+            ).fetchall()
+        if not batch:
+            return 0
+
+        ids = [i for i, _ in batch]
+        placeholders = ','.join('?' * len(ids))
+        try:
+            self._writer([json.loads(p) for _, p in batch])
+        except Exception as e:
+            with self._lock:
+                self._conn.execute(
+                    f'UPDATE spool SET attempts = attempts + 1, last_error = ? WHERE id IN ({placeholders})',
+                    [str(e)] + ids
+                )
+            raise
+
+        with self._lock:
+            self._conn.execute(
+                f'UPDATE spool SET status = ?, flushed_at = ?, last_error = NULL WHERE id IN ({placeholders})',
+                [FLUSHED, time.time()] + ids
+            )
+        if self._on_flush:
+            self._on_flush(len(ids))
+        return len(ids)
+
+    def _run(self):
+        failures = 0
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                flushed = self.flush_once()
+            except Exception as e:
+                self.last_error = str(e)
+                failures += 1
+                delay = min(self.max_delay, self.base_delay * (2 ** (failures - 1)))
+                self._stop.wait(delay * random.uniform(0.5, 1.0))
+                continue
+            failures = 0
+            self.last_error = None
+            if not flushed:
+                self._wake.wait(IDLE_INTERVAL)
+
+    def start(self):
+        """백그라운드 전송 워커 시작 (이미 실행 중이면 무시)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='feedback-queue', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_feedback_queue():
+    """프로세스 공유 피드백 큐 반환 (최초 호출 시 워커 시작)"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            sheet_id = config.GOOGLE_SHEET_ID
+            _queue = FeedbackQueue(
+                config.get_setting('FEEDBACK_SPOOL_PATH', DEFAULT_SPOOL_PATH),
+                writer=lambda rows: sheets.append_rows(sheet_id, rows),
+                # 전송된 행이 사이드바 히스토리에 바로 보이도록 캐시 만료
+                on_flush=lambda n: history.get_history_cache(sheet_id).invalidate()
+            )
+            _queue.start()
+        return _queue
@@ -0,0 +1,362 @@
+"""
+헤드리스 평가 API (Streamlit 없이 검색/피드백/히스토리 제공).
+
+    python headless_api.py --port 8502              # 사이드카로 실행
+    HEADLESS_API_PORT=8502 streamlit run app.py     # Streamlit 앱 프로세스 안에서 함께 실행
+
+    POST /search    {"query", "user_name", "position"?, "company"?, "refresh"?, "include_content"?}
+    POST /feedback  {"user_name", "query", "rating", "comment"?, "selected_documents": [[dataset, chapter, article], ...],
+                     "position"?, "company"?}
+    GET  /history?user_name=...&limit=...
+    GET  /healthz
+
+화면과 같은 요청 본문(miso_api.build_payload), 검색 캐시, 응답 파싱(ResultSet), 피드백 검증(evaluation.validate_feedback),
+피드백 저장소를 사용한다. 피드백의 선택 문서 관련도/순위는 같은 질문의 검색 결과(대개 검색 캐시)에서 찾아 화면과 같은
+형식으로 기록한다. HEADLESS_API_TOKEN을 설정하면 Authorization: Bearer <token> 헤더가 필요하다.
+"""
+import argparse
+import hmac
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+import config
+import evaluation
+import miso_api
+import perf
+import search_cache
+import storage
+from parsing import build_doc_index
+from result_set import ResultSet
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8502
+DEFAULT_HISTORY_LIMIT = 100
+# 요청 본문 최대 크기(바이트)
+MAX_BODY_SIZE = 1 << 20
+# 요청 소켓 타임아웃(초)
+REQUEST_TIMEOUT = 30
+
+
+class ApiError(Exception):
+    """HTTP 오류 응답 (status, 오류 메시지 목록)"""
+
+    def __init__(self, status, *errors):
+        super().__init__(errors[0] if errors else str(status))
+        self.status = status
+        self.errors = list(errors)
+
+
+# -------------------------------
+# 요청 처리
+# -------------------------------
+def _text(body, name):
+    """문자열 필드 값 (없으면 빈 문자열, 문자열이 아니면 400)"""
+    value = body.get(name)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise ApiError(400, f"{name}은(는) 문자열이어야 합니다.")
+    return value
+
+
+def _document_keys(body):
+    """selected_documents 필드를 (dataset, chapter, article) 튜플 목록으로 변환 (형식이 다르면 400)"""
+    value = body.get('selected_documents')
+    if value is None:
+        return []
+    if not isinstance(value, list) or not all(
+        isinstance(key, list) and len(key) == 3 and all(isinstance(part, str) for part in key) for key in value
+    ):
+        raise ApiError(400, "selected_documents는 [dataset, chapter, article] 문자열 목록의 목록이어야 합니다.")
+    return [tuple(key) for key in value]
+
+
+def _payload(body):
+    query = _text(body, 'query').strip()
+    if not query:
+        raise ApiError(400, "질문을 입력해주세요.")
+    return miso_api.build_payload(
+        query,
+        _text(body, 'user_name'),
+        _text(body, 'position') or miso_api.DEFAULT_POSITION,
+        _text(body, 'company') or miso_api.DEFAULT_COMPANY
+    )
+
+
+def _search(payload, refresh=False):
+    """(ResultSet, 캐시 사용 여부) 반환. 검색 API 오류는 ApiError로 변환"""
+    try:
+        response_data, cached = evaluation.search(payload, refresh)
+    except miso_api.CircuitOpenError as e:
+        raise ApiError(503, str(e))
+    except (requests.RequestException, json.JSONDecodeError) as e:
+        raise ApiError(502, str(e))
+    with perf.timed('parse'):
+        return ResultSet.from_response(response_data), cached
+
+
+def result_records(result_set, include_content=True):
+    """검색 결과를 관련도 내림차순 dict 목록으로 변환 (position은 원본 순서, rank는 전체 관련도 순위)"""
+    records = []
+    for rank, i in enumerate(result_set.order, 1):
+        record = {
+            'rank': rank,
+            'position': i + 1,
+            'dataset': result_set.dataset(i),
+            'chapter': result_set.chapters[i],
+            'article': result_set.articles[i],
+            'title': result_set.titles[i],
+            'score': result_set.scores[i],
+            'is_faq': result_set.is_faq(i),
+            'faq_display': result_set.faq_displays[i],
+        }
+        if include_content:
+            record['content'] = result_set.contents[i]
+        records.append(record)
+    return records
+
+
+def handle_search(body):
+    payload = _payload(body)
+    result_set, cached = _search(payload, refresh=bool(body.get('refresh')))
+    return 200, {
+        'query': payload['query'],
+        'cached': cached,
+        'hyde_query': result_set.hyde_query,
+        'total': len(result_set),
+        'results': result_records(result_set, body.get('include_content', True))
+    }
+
+
+def handle_feedback(body):
+    feedback_data = {
+        'user_name': _text(body, 'user_name').strip(),
+        'query': _text(body, 'query').strip(),
+        'rating': _text(body, 'rating'),
+        'comment': _text(body, 'comment'),
+        'selected_documents': _document_keys(body),
+    }
+    errors = evaluation.validate_feedback(feedback_data['user_name'], feedback_data)
+    if not feedback_data['query']:
+        errors.insert(0, "질문을 입력해주세요.")
+    if errors:
+        raise ApiError(400, *errors)
+
+    # 선택 문서의 관련도/순위는 같은 질문의 검색 결과에서 찾음 (화면에서 검색한 결과와 같은 캐시)
+    result_set, _ = _search(_payload(body))
+    all_results = result_set.results()
+    doc_index = build_doc_index(all_results)
+    unknown = [list(key) for key in feedback_data['selected_documents'] if key not in doc_index]
+    if unknown:
+        raise ApiError(400, f"검색 결과에 없는 문서입니다: {json.dumps(unknown, ensure_ascii=False)}")
+    feedback_data['all_results'] = all_results
+
+    row = evaluation.build_feedback_row(feedback_data)
+    with perf.timed('feedback_save'):
+        feedback_ids = storage.get_store().save([row])
+    return 201, {'feedback_ids': feedback_ids, 'row': row}
+
+
+def handle_history(params):
+    user_name = (params.get('user_name') or [''])[0].strip()
+    if not user_name:
+        raise ApiError(400, "user_name을 지정해주세요.")
+    try:
+        limit = int((params.get('limit') or [DEFAULT_HISTORY_LIMIT])[0])
+    except ValueError:
+        raise ApiError(400, "limit은 정수여야 합니다.")
+    store = storage.get_store()
+    with perf.timed('history_load'):
+        pending = [dict(item, pending=True) for item in store.pending(user_name)]
+        entries = pending + store.history(user_name)
+    return 200, {'user_name': user_name, 'stale': store.is_stale(), 'total': len(entries), 'history': entries[:limit]}
+
+
+def handle_healthz(params):
+    return 200, {
+        'status': 'ok',
+        'storage': storage.get_backend(),
+        'search_cache': search_cache.get_search_cache().stats(),
+        'miso_api': miso_api.get_client().stats()
+    }
+
+
+ROUTES = {
+    ('POST', '/search'): handle_search,
+    ('POST', '/feedback'): handle_feedback,
+    ('GET', '/history'): handle_history,
+    ('GET', '/healthz'): handle_healthz,
+}
+
+
+# -------------------------------
+# HTTP 서버
+# -------------------------------
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # keep-alive 연결에서 헤더와 본문을 따로 보낼 때 Nagle 지연(~40ms)이 생기지 않도록 함
+    disable_nagle_algorithm = True
+    # 본문을 보내지 않거나 유휴 상태인 연결이 요청 스레드를 계속 붙잡지 않도록 소켓 타임아웃(초)
+    timeout = REQUEST_TIMEOUT
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        """
+        JSON 객체 본문 읽기.
+        본문을 끝까지 읽지 못한 채 응답하는 오류는 keep-alive 연결에 남은 바이트가 다음 요청으로 해석되지 않도록 연결을 닫는다.
+        """
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            raise ApiError(400, "Content-Length가 올바르지 않습니다.")
+        if length > MAX_BODY_SIZE:
+            self.close_connection = True
+            raise ApiError(413, "요청 본문이 너무 큽니다.")
+        data = self.rfile.read(length)
+        if len(data) < length:
+            self.close_connection = True
+            raise ApiError(400, "요청 본문이 Content-Length보다 짧습니다.")
+        try:
+            body = json.loads(data or b'{}')
+        except ValueError:
+            raise ApiError(400, "요청 본문이 올바른 JSON이 아닙니다.")
+        if not isinstance(body, dict):
+            raise ApiError(400, "요청 본문은 JSON 객체여야 합니다.")
+        return body
+
+    def _check_token(self):
+        token = self.server.token
+        if not token:
+            return
+        header = self.headers.get('Authorization', '')
+        if not hmac.compare_digest(header.encode('utf-8'), f'Bearer {token}'.encode('utf-8')):
+            raise ApiError(401, "인증 토큰이 올바르지 않습니다.")
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        handler = ROUTES.get((method, url.path))
+        perf.incr('headless_requests')
+        started = time.perf_counter()
+        arg = None
+        try:
+            if handler is None:
+                raise ApiError(404, f"{method} {url.path}를 찾을 수 없습니다.")
+            self._check_token()
+            arg = self._read_body() if method == 'POST' else parse_qs(url.query)
+            status, body = handler(arg)
+        except ApiError as e:
+            status, body = e.status, {'errors': e.errors}
+            if method == 'POST' and arg is None:
+                # 본문을 읽기 전에 거절한 요청 (경로 없음/인증 실패): 남은 본문이 있으므로 연결 종료
+                self.close_connection = True
+        except Exception as e:
+            perf.incr('headless_errors')
+            status, body = 500, {'errors': [f"오류 발생: {str(e)}"]}
+        self._send_json(status, body)
+        if handler is not None:
+            perf.observe(f"headless{url.path.replace('/', '_')}", time.perf_counter() - started)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+
+class HeadlessServer:
+    """헤드리스 API 서버를 백그라운드 스레드로 실행 (요청마다 스레드 1개)"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, token=None):
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.token = token
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='headless-api', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+_server = None
+_server_lock = threading.Lock()
+_start_failed = False
+
+
+def ensure_started():
+    """
+    HEADLESS_API_PORT가 설정되어 있으면 현재 프로세스에서 헤드리스 API를 1회 시작 (Streamlit 앱과 캐시/저장소 공유).
+    실행 중인 서버(설정이 없거나 시작하지 못했으면 None) 반환.
+    포트 사용 중 등으로 시작하지 못하면 오류를 한 번만 출력하고, 재실행마다 다시 시도하지 않는다 (화면은 그대로 동작).
+    """
+    global _server, _start_failed
+    if _server is not None or _start_failed:
+        return _server
+    with _server_lock:
+        if _server is None and not _start_failed:
+            port = config.get_setting('HEADLESS_API_PORT')
+            if not port:
+                return None
+            host = config.get_setting('HEADLESS_API_HOST', DEFAULT_HOST)
+            try:
+                _server = HeadlessServer(host, int(port), config.get_setting('HEADLESS_API_TOKEN')).start()
+            except (OSError, ValueError) as e:
+                _start_failed = True
+                print(f"헤드리스 API를 시작하지 못했습니다 ({host}:{port}): {e}", file=sys.stderr)
+        return _server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="헤드리스 평가 API 서버")
+    parser.add_argument('--host', default=config.get_setting('HEADLESS_API_HOST', DEFAULT_HOST))
+    parser.add_argument('--port', type=int, default=int(config.get_setting('HEADLESS_API_PORT', DEFAULT_PORT)))
+    args = parser.parse_args(argv)
+
+    server = HeadlessServer(args.host, args.port, config.get_setting('HEADLESS_API_TOKEN'))
+    print(f"헤드리스 API: {server.url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
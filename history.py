@@ -0,0 +1,186 @@
+import csv
+import threading
+import time
+
+import perf
+import sheets
+
+# -------------------------------
+# 질문 히스토리 공유 캐시
+#    세션 간 공유, 마지막으로 읽은 행 이후만 추가로 읽기
+# -------------------------------
+HEADER_ROWS = 1
+NUM_COLUMNS = 7
+
+# 이 시간(초) 안에는 시트를 다시 읽지 않음
+DEFAULT_TTL = 30
+# 시트에서 직접 수정/삭제된 행을 반영하기 위한 전체 재로드 주기(초)
+DEFAULT_FULL_REFRESH_INTERVAL = 600
+
+
+def parse_row(row):
+    """시트 한 행을 히스토리 항목으로 변환 (빈 행은 None)"""
+    if not any(row):
+        return None
+    row = list(row) + [''] * (NUM_COLUMNS - len(row))
+    selected_docs = row[5].split(';') if row[5] else []
+    return {
+        'timestamp': row[0],
+        'user_name': row[1],
+        'query': row[2],
+        'rating': row[3],
+        'comment': row[4],
+        'selected_documents': selected_docs,
+        'endpoint': row[6]  # A/B 비교 모드에서 평가한 엔드포인트 (일반 검색은 빈 값)
+    }
+
+
+def _newest_first(entries):
+    return sorted(entries, key=lambda x: x['timestamp'], reverse=True)
+
+
+class HistoryCache:
+    """
+    질문 히스토리 캐시.
+    fetch_rows(start_row)는 start_row(1부터, 헤더 포함)부터 마지막 행까지의 값을 반환해야 한다.
+    """
+
+    def __init__(self, fetch_rows, ttl=DEFAULT_TTL, full_refresh_interval=DEFAULT_FULL_REFRESH_INTERVAL):
+        self._fetch_rows = fetch_rows
+        self.ttl = ttl
+        self.full_refresh_interval = full_refresh_interval
+        self._lock = threading.Lock()
+        self._rows_read = 0      # 지금까지 읽은 시트 행 수 (헤더 포함)
+        self._entries = []       # 전체 히스토리 (최신순)
+        self._appended = []      # 전체 히스토리 (시트 행 순서, 증분 조회용)
+        self._generation = 0     # 전체 재로드로 기존 행이 바뀔 때마다 증가 (증분 조회 cursor 무효화)
+        self._by_user = {}       # {user_name: [항목, ...]} (최신순)
+        self._checked_at = None  # 마지막 시트 조회 시각
+        self._full_at = None     # 마지막 전체 로드 시각
+        self.stale = False       # 할당량 초과로 마지막 스냅샷을 사용 중인지 여부
+
+    def _is_fresh(self, now):
+        return self._checked_at is not None and now - self._checked_at < self.ttl
+
+    def _reload(self):
+        rows = self._fetch_rows(1)
+        previous = self._appended
+        self._rows_read = len(rows)
+        self._entries = []
+        self._appended = []
+        self._by_user = {}
+        self._merge(rows[HEADER_ROWS:])
+        # 기존 행 뒤에 새 행만 추가된 경우가 아니면(행 삭제/수정) 이전 cursor로 증분 조회할 수 없음
+        if self._appended[:len(previous)] != previous:
+            self._generation += 1
+
+    def _read_tail(self):
+        rows = self._fetch_rows(self._rows_read + 1)
+        # 헤더를 아직 읽지 않은 상태(빈 시트)였다면 헤더 행은 건너뜀
+        skip = max(0, HEADER_ROWS - self._rows_read)
+        self._rows_read += len(rows)
+        self._merge(rows[skip:])
+
+    def _merge(self, rows):
+        """
+        새 행을 인덱스에 반영.
+        다른 세션이 읽는 중인 리스트는 건드리지 않고 새 리스트로 교체한다.
+        """
+        new_entries = [e for e in (parse_row(r) for r in rows) if e]
+        if not new_entries:
+            return
+        by_user = {}
+        for entry in new_entries:
+            by_user.setdefault(entry['user_name'], []).append(entry)
+        # 새 항목이 들어온 사용자 목록만 다시 정렬 (대부분 이미 정렬된 상태라 선형 시간)
+        for user_name, user_entries in by_user.items():
+            self._by_user[user_name] = _newest_first(self._by_user.get(user_name, []) + user_entries)
+        self._entries = _newest_first(self._entries + new_entries)
+        self._appended = self._appended + new_entries
+
+    def refresh(self):
+        """
+        TTL이 지났으면 새 행만(전체 재로드 주기가 지났으면 전체를) 읽어 캐시 갱신.
+        시트 할당량을 초과하면 오류 대신 마지막으로 읽은 스냅샷을 그대로 두고(stale), TTL이 지나면 다시 시도한다.
+        """
+        if self._is_fresh(time.monotonic()):
+            return
+        with self._lock:
+            now = time.monotonic()
+            # 대기하는 동안 다른 세션이 이미 갱신했으면 그대로 사용
+            if self._is_fresh(now):
+                return
+            try:
+                if self._full_at is None or now - self._full_at >= self.full_refresh_interval:
+                    self._reload()
+                    self._full_at = now
+                else:
+                    self._read_tail()
+            except sheets.QuotaExceededError:
+                self.stale = True
+                perf.incr('history_stale_reads')
+            else:
+                self.stale = False
+            self._checked_at = now
+
+    def invalidate(self):
+        """다음 조회 때 새 행을 바로 읽도록 TTL 만료 처리"""
+        with self._lock:
+            self._checked_at = None
+
+    def entries(self):
+        """전체 히스토리 (최신순)"""
+        self.refresh()
+        return self._entries
+
+    def for_user(self, user_name):
+        """사용자별 히스토리 (최신순)"""
+        self.refresh()
+        return self._by_user.get(user_name, [])
+
+    def updates(self, cursor=None):
+        """
+        cursor 이후 시트에 추가된 항목(시트 행 순서)과 다음 조회에 쓸 cursor 반환.
+        cursor가 없거나 전체 재로드로 기존 행이 바뀌었으면 전체 히스토리를 반환한다.
+        """
+        self.refresh()
+        with self._lock:
+            entries, generation = self._appended, self._generation
+        if cursor is None or cursor[0] != generation:
+            return self._entries, (generation, len(entries))
+        return entries[cursor[1]:], (generation, len(entries))
+
+
+def load_history_file(path):
+    """시트를 CSV로 내려받은 파일에서 히스토리 로드 (오프라인 분석용, 최신순)"""
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.reader(f))
+    return _newest_first([e for e in (parse_row(r) for r in rows[HEADER_ROWS:]) if e])
+
+
+# 일반 검색(운영 엔드포인트)으로 저장된 평가의 엔드포인트 값
+PRODUCTION_ENDPOINT = ''
+
+
+def for_endpoint(entries, endpoint=PRODUCTION_ENDPOINT):
+    """
+    엔드포인트별 평가만 선택.
+    A/B 비교 모드는 같은 평가를 엔드포인트마다 한 행씩 저장하므로, 지표 계산 시 엔드포인트를 하나로 고르지 않으면
+    같은 평가가 엔드포인트 수만큼 집계되고 후보 엔드포인트의 순위가 섞인다.
+    기본값은 일반 검색(엔드포인트가 빈 값)으로 저장된 평가이며, A/B 비교 엔드포인트 이름을 지정하면 그 행만 반환한다.
+    """
+    return [e for e in entries if e.get('endpoint', '') == endpoint]
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_history_cache(sheet_id):
+    """시트 ID별 프로세스 공유 히스토리 캐시 반환"""
+    with _caches_lock:
+        cache = _caches.get(sheet_id)
+        if cache is None:
+            cache = HistoryCache(lambda start_row: sheets.read_rows(sheet_id, start_row))
+            _caches[sheet_id] = cache
+        return cache
@@ -0,0 +1,362 @@
+"""
+동시 평가자 부하 테스트.
+
+    python loadtest.py                                   # 기본: 평가자 10명, 1인당 질문 3개
+    python loadtest.py --users 50 --iterations 5 --no-cache
+    python loadtest.py --users 20 --sheets-latency 0.3 --sheets-quota 60 --format json > baseline.json
+    python loadtest.py --users 20 --baseline baseline.json           # p99/처리량이 기준보다 20% 넘게 나빠지면 종료 코드 1
+    python loadtest.py --max-p99-ms 2000 --min-throughput 20
+
+로컬 MISO 스텁 서버(fixtures/miso_recordings.jsonl)와 프로세스 내 가짜 구글 시트(sheets_stub)로 app.py를 실행하고,
+평가자 N명을 각각 AppTest 세션(스레드 1개)으로 동시에 흉내 낸다. 평가자마다
+    name     이름 입력 (사이드바 히스토리 로드)
+    search   질문 입력 후 "Data 검색"
+    select   검색 결과 문서 체크박스 클릭 (문서 2개)
+    rate     품질 평가 선택
+    submit   "피드백 제출"
+을 질문 수만큼 반복하며, 상호작용별/전체 응답 시간 p50/p99, 처리량(상호작용/초, 피드백/초),
+세션당 메모리(최대 RSS 증가분 / 평가자 수), 검색 API/시트 호출 수, 시트 호출 대기 시간(sheets p50/p99)과
+종료 후 스풀에 남은 피드백이 시트로 전송되기까지 걸린 시간을 출력한다.
+측정 전에 평가자 1명으로 같은 흐름을 한 번 실행해 import/캐시를 데운다.
+"""
+import argparse
+import contextlib
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RECORDINGS = os.path.join(ROOT, 'fixtures', 'miso_recordings.jsonl')
+DEFAULT_USERS = 10
+DEFAULT_ITERATIONS = 3
+DEFAULT_HISTORY_SIZE = 200
+DEFAULT_SHEETS_LATENCY = 0.2
+DEFAULT_SHEETS_QUOTA = 60
+DEFAULT_DRAIN_TIMEOUT = 60.0
+# --baseline 비교 시 허용하는 악화 비율 (p99 증가, 처리량 감소)
+DEFAULT_TOLERANCE = 0.2
+SHEET_ID = 'loadtest'
+INTERACTIONS = ('name', 'search', 'select', 'rate', 'submit')
+UPSTREAM_COUNTERS = ('api_calls', 'search_cache_hits', 'search_cache_misses', 'sheets_calls',
+                     'sheets_coalesced', 'sheets_quota_exceeded', 'history_stale_reads')
+# 문서 체크박스를 클릭할 결과 수
+SELECT_DOCS = 2
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))] if ordered else None
+
+
+def _peak_rss_mb():
+    """프로세스 최대 RSS(MB)"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _seed_rows(query, size):
+    """시트에 기존 피드백 size건 (평가자 이름과 겹치지 않는 사용자)"""
+    return [
+        [f'2024-01-01 00:{n // 60:02d}:{n % 60:02d}', f'seed-{n % 10}', f'{query} {n}', 'A', '',
+         '취업규칙.pdf - 제5장 - 제32조 (연차유급휴가) (관련도: 0.8731, 순위: 2/4)', '']
+        for n in range(size)
+    ]
+
+
+@contextlib.contextmanager
+def _shared_runtime():
+    """
+    with 블록 안에서 모든 AppTest 세션이 실제 서버처럼 하나의 Streamlit Runtime(미디어/캐시 저장소)과 스크립트 캐시를
+    공유하도록 설정하고, 블록이 끝나면 바꾼 Streamlit 내부 속성을 원래대로 돌린다.
+    AppTest는 실행할 때마다 전역 Runtime을 새로 만들고 끝나면 지우므로, 여러 세션을 동시에 실행하면
+    먼저 끝난 세션이 다른 세션이 실행 중인 Runtime을 지운다. Runtime 하나를 고정해 두고 AppTest가 바꾸는 대상은
+    자리표시용 클래스로 돌린다. 또 실행마다 app.py를 새로 컴파일하면 여러 스레드의 동시 컴파일이
+    실패할 수 있으므로(Python 3.11), 컴파일 결과도 서버처럼 한 번만 만들어 공유한다 (streamlit 1.32 AppTest 기준).
+    """
+    from unittest.mock import MagicMock
+
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    saved = (Runtime._instance, app_test.Runtime, local_script_runner.ScriptCache)
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage('/mock/media'))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    script_cache = ScriptCache()
+    Runtime._instance = runtime
+    app_test.Runtime = type('Runtime', (), {'_instance': None})
+    local_script_runner.ScriptCache = lambda: script_cache
+    try:
+        yield
+    finally:
+        Runtime._instance, app_test.Runtime, local_script_runner.ScriptCache = saved
+
+
+def _find(widgets, label):
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    raise LookupError(f"화면에 '{label}'이(가) 없습니다.")
+
+
+class Evaluator:
+    """평가자 1명의 AppTest 세션과 상호작용별 응답 시간"""
+
+    def __init__(self, app_path, user_name, queries, iterations, refresh=False, timeout=120):
+        from streamlit.testing.v1 import AppTest
+
+        self.at = AppTest.from_file(app_path, default_timeout=timeout)
+        self.user_name = user_name
+        self.queries = queries
+        self.iterations = iterations
+        self.refresh = refresh
+        self.latencies = {name: [] for name in INTERACTIONS}
+        self.submitted = 0
+        self.error = None
+
+    def _step(self, name, interact):
+        interact(self.at)
+        started = time.perf_counter()
+        self.at.run()
+        self.latencies[name].append(time.perf_counter() - started)
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].value)
+
+    def run(self):
+        try:
+            self.at.run()
+            self._step('name', lambda at: at.sidebar.text_input[0].input(self.user_name))
+            for i in range(self.iterations):
+                self._evaluate(self.queries[i % len(self.queries)])
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        return self
+
+    def _evaluate(self, query):
+        at = self.at
+        _find(at.text_area, "질문 입력").input(query)
+        if self.refresh:
+            _find(at.checkbox, "캐시 무시하고 새로 검색").check()
+        self._step('search', lambda at: _find(at.button, "Data 검색").click())
+        if at.error:
+            raise RuntimeError(at.error[0].value)
+        for i in range(SELECT_DOCS):
+            key = f'doc_checkbox_{i}'
+            if at.checkbox(key=key) is None:
+                break
+            self._step('select', lambda at: at.checkbox(key=key).set_value(not at.checkbox(key=key).value))
+        self._step('rate', lambda at: _find(at.radio, "검색 결과 품질 평가").set_value('A'))
+        self._step('submit', lambda at: _find(at.button, "피드백 제출").click())
+        if not at.success:
+            raise RuntimeError(at.error[0].value if at.error else "피드백이 저장되지 않았습니다.")
+        self.submitted += 1
+
+
+def _run_evaluators(evaluators):
+    """모든 평가자를 동시에 시작해 끝날 때까지 대기, 경과 시간(초) 반환"""
+    barrier = threading.Barrier(len(evaluators) + 1)
+
+    def target(evaluator):
+        barrier.wait()
+        evaluator.run()
+
+    threads = [threading.Thread(target=target, args=(evaluator,), daemon=True) for evaluator in evaluators]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def _drain(queue, timeout):
+    """스풀의 대기 피드백이 모두 전송될 때까지 대기, (걸린 시간, 남은 건수) 반환"""
+    started = time.perf_counter()
+    while True:
+        pending = queue.counts()['pending']
+        elapsed = time.perf_counter() - started
+        if not pending or elapsed >= timeout:
+            return elapsed, pending
+        time.sleep(0.1)
+
+
+def _summary_ms(values):
+    return {
+        'count': len(values),
+        'p50_ms': (_percentile(values, 50) or 0) * 1000,
+        'p99_ms': (_percentile(values, 99) or 0) * 1000,
+    }
+
+
+def run_loadtest(recordings_path=DEFAULT_RECORDINGS, users=DEFAULT_USERS, iterations=DEFAULT_ITERATIONS,
+                 refresh=False, miso_latency=0.0, sheets_latency=DEFAULT_SHEETS_LATENCY,
+                 sheets_quota=DEFAULT_SHEETS_QUOTA, history_size=DEFAULT_HISTORY_SIZE,
+                 drain_timeout=DEFAULT_DRAIN_TIMEOUT):
+    workdir = tempfile.mkdtemp(prefix='loadtest_')
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    # 설정은 config import(miso_stub 포함) 전에 지정해야 함
+    os.environ.update({
+        'MISO_API_URL': f'http://127.0.0.1:{port}/',
+        'MISO_API_KEY': 'loadtest',
+        'STORAGE_BACKEND': 'sheets',
+        'GOOGLE_SHEET_ID': SHEET_ID,
+        'SHEETS_QUOTA_PER_MINUTE': str(sheets_quota),
+        'FEEDBACK_SPOOL_PATH': os.path.join(workdir, 'feedback_spool.db'),
+        'EVAL_QUEUE_PATH': os.path.join(workdir, 'eval_queue.db'),
+    })
+    sys.path.insert(0, ROOT)
+    from miso_stub import StubServer, load_recordings
+    recordings = load_recordings(recordings_path)
+    stub = StubServer(recordings, port=port, latency=miso_latency).start()
+
+    import feedback_queue
+    import perf
+    import sheets
+    import sheets_stub
+
+    client = sheets_stub.StubClient(latency=sheets_latency, quota_per_minute=sheets_quota)
+    queries = list(recordings)
+    client.seed(SHEET_ID, _seed_rows(queries[0], history_size))
+    sheets.set_client(client)
+
+    app_path = os.path.join(ROOT, 'app.py')
+    try:
+        with _shared_runtime():
+            warmup = Evaluator(app_path, 'loadtest-warmup', queries, 1, refresh).run()
+            if warmup.error:
+                raise RuntimeError(warmup.error)
+            _drain(feedback_queue.get_feedback_queue(), drain_timeout)
+
+            perf.reset()
+            stub_requests = stub.request_count
+            sheets_counts = dict(client.counts)
+            rss_before = _peak_rss_mb()
+            evaluators = [
+                Evaluator(app_path, f'loadtest-{n}', queries[n % len(queries):] + queries[:n % len(queries)],
+                          iterations, refresh)
+                for n in range(users)
+            ]
+            elapsed = _run_evaluators(evaluators)
+            rss_after = _peak_rss_mb()
+            drain_seconds, undrained = _drain(feedback_queue.get_feedback_queue(), drain_timeout)
+
+            snap = perf.snapshot()
+            latencies = {name: [s for e in evaluators for s in e.latencies[name]] for name in INTERACTIONS}
+            everything = [s for values in latencies.values() for s in values]
+            submitted = sum(e.submitted for e in evaluators)
+            sheets_stage = snap['stages'].get('sheets', {})
+            return {
+                'users': users,
+                'iterations': iterations,
+                'elapsed_s': elapsed,
+                'errors': [f"{e.user_name}: {e.error}" for e in evaluators if e.error],
+                'throughput': {
+                    'interactions_per_s': len(everything) / elapsed if elapsed else 0,
+                    'feedback_per_s': submitted / elapsed if elapsed else 0,
+                    'feedback': submitted,
+                },
+                'latency': {'all': _summary_ms(everything), **{name: _summary_ms(v) for name, v in latencies.items()}},
+                'memory_mb_per_session': (rss_after - rss_before) / users,
+                'upstream': {
+                    'miso_requests': stub.request_count - stub_requests,
+                    **{f'sheets_{kind}': client.counts[kind] - sheets_counts[kind] for kind in client.counts},
+                    **{name: snap['counters'][name] for name in UPSTREAM_COUNTERS if name in snap['counters']},
+                },
+                'sheets_wait': {
+                    'p50_ms': (sheets_stage.get('p50') or 0) * 1000,
+                    'p99_ms': (sheets_stage.get('p99') or 0) * 1000,
+                },
+                'drain': {'seconds': drain_seconds, 'pending': undrained},
+            }
+    finally:
+        stub.stop()
+        # 실제 시트 클라이언트를 다시 만들도록 스텁 클라이언트 해제
+        sheets.reset()
+
+
+def check_regressions(report, max_p99_ms=None, min_throughput=None, baseline=None, tolerance=DEFAULT_TOLERANCE):
+    """
+    전체 상호작용 p99(ms)와 처리량(상호작용/초)을 기준값과 비교해 회귀 메시지 목록 반환 (없으면 빈 목록).
+    baseline은 이전에 --format json으로 저장한 보고서이며, tolerance 비율까지의 악화는 허용한다.
+    """
+    p99 = report['latency']['all']['p99_ms']
+    throughput = report['throughput']['interactions_per_s']
+    regressions = []
+    if max_p99_ms is not None and p99 > max_p99_ms:
+        regressions.append(f"p99 {p99:.1f} ms > 기준 {max_p99_ms:.1f} ms")
+    if min_throughput is not None and throughput < min_throughput:
+        regressions.append(f"처리량 {throughput:.1f}회/초 < 기준 {min_throughput:.1f}회/초")
+    if baseline is not None:
+        base_p99 = baseline['latency']['all']['p99_ms']
+        base_throughput = baseline['throughput']['interactions_per_s']
+        if p99 > base_p99 * (1 + tolerance):
+            regressions.append(f"p99 {p99:.1f} ms > 기준 보고서 {base_p99:.1f} ms × {1 + tolerance:.2f}")
+        if throughput < base_throughput * (1 - tolerance):
+            regressions.append(f"처리량 {throughput:.1f}회/초 < 기준 보고서 {base_throughput:.1f}회/초 × {1 - tolerance:.2f}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="동시 평가자 부하 테스트")
+    parser.add_argument('--recordings', default=DEFAULT_RECORDINGS, help="스텁 서버 기록 파일 (JSON Lines)")
+    parser.add_argument('--users', type=int, default=DEFAULT_USERS, help="동시 평가자 수")
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help="평가자 1명당 평가할 질문 수")
+    parser.add_argument('--no-cache', action='store_true', help="\"캐시 무시하고 새로 검색\"을 선택해 매번 검색 API 호출")
+    parser.add_argument('--miso-latency', type=float, default=0.0, help="검색 API 응답 지연(초)")
+    parser.add_argument('--sheets-latency', type=float, default=DEFAULT_SHEETS_LATENCY, help="시트 API 호출 지연(초)")
+    parser.add_argument('--sheets-quota', type=int, default=DEFAULT_SHEETS_QUOTA, help="시트 분당 요청 한도")
+    parser.add_argument('--history-size', type=int, default=DEFAULT_HISTORY_SIZE, help="시트에 미리 넣을 피드백 수")
+    parser.add_argument('--format', choices=['text', 'json'], default='text')
+    parser.add_argument('--max-p99-ms', type=float, help="전체 상호작용 p99(ms)가 이 값을 넘으면 종료 코드 1")
+    parser.add_argument('--min-throughput', type=float, help="처리량(상호작용/초)이 이 값보다 낮으면 종료 코드 1")
+    parser.add_argument('--baseline', metavar='REPORT', help="기준 보고서(--format json 출력)보다 p99/처리량이 나빠지면 종료 코드 1")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="--baseline 비교 시 허용하는 악화 비율 (기본: 0.2)")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    report = run_loadtest(args.recordings, args.users, args.iterations, args.no_cache, args.miso_latency,
+                          args.sheets_latency, args.sheets_quota, args.history_size)
+    report['regressions'] = check_regressions(report, args.max_p99_ms, args.min_throughput, baseline, args.tolerance)
+    failed = bool(report['errors'] or report['regressions'])
+    if args.format == 'json':
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 1 if failed else 0
+
+    throughput = report['throughput']
+    print(f"평가자 {report['users']}명 × 질문 {report['iterations']}개: {report['elapsed_s']:.1f}초, "
+          f"상호작용 {throughput['interactions_per_s']:.1f}회/초, 피드백 {throughput['feedback']}건 "
+          f"({throughput['feedback_per_s']:.2f}건/초)")
+    print(f"세션당 메모리: {report['memory_mb_per_session']:.1f} MB (최대 RSS 증가분 기준)")
+    print(f"{'상호작용':<10}{'횟수':>6}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, result in report['latency'].items():
+        print(f"{name:<10}{result['count']:>6}{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}")
+    print("외부 호출: " + ', '.join(f"{k}={v}" for k, v in report['upstream'].items()))
+    print(f"시트 호출 대기 포함 소요: p50 {report['sheets_wait']['p50_ms']:.0f} ms, "
+          f"p99 {report['sheets_wait']['p99_ms']:.0f} ms")
+    print(f"종료 후 시트 전송 완료까지: {report['drain']['seconds']:.1f}초 (미전송 {report['drain']['pending']}건)")
+    for error in report['errors']:
+        print(f"오류: {error}", file=sys.stderr)
+    for regression in report['regressions']:
+        print(f"회귀: {regression}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+피드백 히스토리 기반 검색 품질 지표 (Recall@k, MRR, nDCG@k, Hit@k).
+
+    python metrics.py --k 1 3 5 10
+    python metrics.py --history history.csv --format json
+
+평가자가 선택한 문서를 관련 문서로 보고, 시트에 저장된 순위(순위: i/N)로 지표를 계산한다.
+저장된 순위는 데이터셋별 순위가 아니라 응답(output1 → output3을 이어 붙인 목록) 안의 위치이므로,
+데이터셋별 행도 "해당 데이터셋의 관련 문서가 응답 전체에서 몇 번째에 나왔는가" 기준이다.
+(뒤쪽 출력에 담기는 데이터셋은 값이 낮게 나오므로 데이터셋 간 비교가 아닌 같은 데이터셋의 시점 간 비교에 사용)
+A/B 비교 모드 평가는 엔드포인트마다 한 행씩 저장되므로 기본은 일반 검색 평가만 사용하며,
+--endpoint로 A/B 비교 엔드포인트 이름을 지정하면 그 엔드포인트의 평가로 계산한다.
+질문(평가 1건) × 데이터셋 단위로 계산한 뒤 데이터셋별로 평균내며, ALL 행은 데이터셋 구분 없이
+평가 1건 단위로 계산한 값이다.
+"""
+import argparse
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+import history
+from parsing import SELECTED_DOC_PATTERN
+
+DEFAULT_K_VALUES = (1, 3, 5, 10)
+RANK_BINS = [0, 1, 3, 5, 10, 20, 50, np.inf]
+RANK_BIN_LABELS = ['1', '2-3', '4-5', '6-10', '11-20', '21-50', '51+']
+ALL = 'ALL'
+
+
+def judgments_frame(entries):
+    """
+    히스토리 항목 목록(또는 같은 컬럼의 DataFrame)을 컬럼형 DataFrame 2개로 변환.
+    - queries: 평가 1건당 1행 (query_id, timestamp, user_name, query, rating)
+    - docs: 선택 문서 1건당 1행 (query_id, dataset, chapter, article, title, score, rank, total, rating)
+    """
+    columns = ['timestamp', 'user_name', 'query', 'rating', 'selected_documents']
+    if isinstance(entries, pd.DataFrame):
+        queries = entries[columns].reset_index(drop=True)
+    else:
+        queries = pd.DataFrame.from_records(entries, columns=columns)
+    queries.index.name = 'query_id'
+    queries = queries.reset_index()
+
+    docs = queries[['query_id', 'rating', 'selected_documents']].explode('selected_documents')
+    texts = docs['selected_documents'].dropna().astype(str).str.strip()
+    # 같은 문서 문자열이 반복되므로 고유 문자열만 정규식으로 파싱한 뒤 펼침
+    codes, uniques = pd.factorize(texts)
+    parsed = pd.Series(uniques, dtype=object).str.extract(SELECTED_DOC_PATTERN)
+    parsed = parsed.take(codes).set_axis(texts.index).dropna(subset=['rank'])
+    docs = docs.loc[parsed.index.unique(), ['query_id', 'rating']].join(parsed)
+    docs['title'] = docs['title'].fillna('')
+    docs = docs.astype({'score': float, 'rank': int, 'total': int})
+    docs = docs.drop_duplicates(['query_id', 'dataset', 'chapter', 'article']).reset_index(drop=True)
+
+    return queries.drop(columns='selected_documents'), docs
+
+
+def _ideal_dcg(max_relevant):
+    """IDCG 조회 테이블: table[n] = 관련 문서 n개가 1~n위에 있을 때의 DCG"""
+    return np.concatenate([[0.0], np.cumsum(1.0 / np.log2(np.arange(2, max_relevant + 2)))])
+
+
+def _group_metrics(docs, keys, k_values):
+    """keys 단위(한 그룹 = 평가 1건)로 지표 계산 (rank는 응답 내 위치)"""
+    ranks = docs['rank']
+    discount = 1.0 / np.log2(ranks + 1)
+    columns = {'best_rank': ranks, 'relevant': 1}
+    for k in k_values:
+        in_k = ranks <= k
+        columns[f'hits_{k}'] = in_k.astype(int)
+        columns[f'dcg_{k}'] = discount.where(in_k, 0.0)
+    grouped = docs[keys].assign(**columns).groupby(keys)
+    sums = grouped.sum()
+    sums['best_rank'] = grouped['best_rank'].min()
+
+    relevant = sums['relevant'].to_numpy()
+    ideal = _ideal_dcg(int(relevant.max()) if len(relevant) else 0)
+    result = pd.DataFrame(index=sums.index)
+    result['relevant'] = relevant
+    result['mrr'] = 1.0 / sums['best_rank']
+    for k in k_values:
+        hits = sums[f'hits_{k}']
+        result[f'recall@{k}'] = hits / relevant
+        result[f'hit@{k}'] = (hits > 0).astype(float)
+        result[f'ndcg@{k}'] = sums[f'dcg_{k}'] / ideal[np.minimum(relevant, k)]
+    return result
+
+
+def retrieval_metrics(docs, k_values=DEFAULT_K_VALUES):
+    """데이터셋별(+ALL) Recall@k, Hit@k, nDCG@k, MRR"""
+    k_values = sorted(set(k_values))
+    metric_columns = ['mrr'] + [f'{m}@{k}' for k in k_values for m in ('recall', 'hit', 'ndcg')]
+    if docs.empty:
+        return pd.DataFrame(columns=['queries', 'relevant_docs'] + metric_columns)
+
+    per_dataset = _group_metrics(docs, ['dataset', 'query_id'], k_values)
+    per_query = _group_metrics(docs, ['query_id'], k_values)
+
+    table = per_dataset.groupby(level='dataset')[metric_columns].mean()
+    table.insert(0, 'relevant_docs', per_dataset.groupby(level='dataset')['relevant'].sum())
+    table.insert(0, 'queries', per_dataset.groupby(level='dataset').size())
+    overall = per_query[metric_columns].mean()
+    overall['queries'] = len(per_query)
+    overall['relevant_docs'] = per_query['relevant'].sum()
+    table.loc[ALL] = overall[table.columns]
+    return table.astype({'queries': int, 'relevant_docs': int})
+
+
+def rank_distribution(docs):
+    """데이터셋별 관련 문서의 응답 내 위치 구간 분포 (문서 수)"""
+    buckets = pd.cut(docs['rank'], bins=RANK_BINS, labels=RANK_BIN_LABELS)
+    table = pd.crosstab(docs['dataset'], buckets).reindex(columns=RANK_BIN_LABELS, fill_value=0)
+    table.loc[ALL] = table.sum()
+    return table
+
+
+def rating_breakdown(queries, docs):
+    """평가(A/B/C) 분포: 데이터셋별(해당 데이터셋 문서가 선택된 평가 기준) + ALL"""
+    rated = docs[['dataset', 'query_id', 'rating']].drop_duplicates(['dataset', 'query_id'])
+    table = pd.crosstab(rated['dataset'], rated['rating'])
+    overall = queries['rating'].value_counts().to_frame(ALL).T
+    return pd.concat([table, overall]).fillna(0).astype(int)
+
+
+def quality_report(entries, k_values=DEFAULT_K_VALUES, endpoint=history.PRODUCTION_ENDPOINT):
+    """
+    히스토리 항목 목록으로 전체 지표 계산.
+    A/B 비교 평가가 엔드포인트 수만큼 중복 집계되지 않도록 한 엔드포인트의 평가만 사용한다
+    (기본: 일반 검색으로 저장된 운영 평가, A/B 비교 엔드포인트 이름을 지정하면 그 엔드포인트의 평가).
+    """
+    queries, docs = judgments_frame(history.for_endpoint(entries, endpoint))
+    return {
+        'metrics': retrieval_metrics(docs, k_values),
+        'rank_distribution': rank_distribution(docs),
+        'ratings': rating_breakdown(queries, docs),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="피드백 히스토리 기반 검색 품질 지표")
+    parser.add_argument('--k', type=int, nargs='+', default=list(DEFAULT_K_VALUES), help="Recall/Hit/nDCG의 k 값")
+    parser.add_argument('--history', help="시트를 내려받은 CSV 파일 (기본: 피드백 저장소에서 로드)")
+    parser.add_argument('--endpoint', default=history.PRODUCTION_ENDPOINT,
+                        help="A/B 비교 엔드포인트 이름 (기본: 일반 검색으로 저장된 운영 평가)")
+    parser.add_argument('--format', choices=['text', 'json'], default='text')
+    args = parser.parse_args(argv)
+
+    if args.history:
+        entries = history.load_history_file(args.history)
+    else:
+        import storage
+        entries = storage.get_store().history()
+
+    report = quality_report(entries, args.k, args.endpoint)
+    if args.format == 'json':
+        json.dump({name: json.loads(table.to_json(orient='index', force_ascii=False))
+                   for name, table in report.items()}, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        titles = {'metrics': "검색 품질 지표", 'rank_distribution': "관련 문서 순위 분포", 'ratings': "평가 분포"}
+        with pd.option_context('display.width', 200, 'display.float_format', '{:.4f}'.format):
+            for name, table in report.items():
+                print(f"## {titles[name]}")
+                print(table.to_string())
+                print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,451 @@
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+import perf
+from parsing import OUTPUT_KEYS
+
+# -------------------------------
+# MISO 검색 워크플로 API 호출
+# -------------------------------
+DEFAULT_POSITION = "매니저"
+DEFAULT_COMPANY = "GSPOGE"
+
+
+def build_payload(query, user_name, position=DEFAULT_POSITION, company=DEFAULT_COMPANY):
+    """검색 워크플로 요청 본문 구성"""
+    return {
+        "user": {
+            "name": user_name,
+            "position": position,
+            "company": company
+        },
+        "inputs": {
+            "query": query
+        },
+        "query": query
+    }
+
+
+def build_headers(api_key):
+    return {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}"
+    }
+
+
+def iter_sse_events(response):
+    """text/event-stream 응답에서 이벤트(JSON)를 하나씩 반환"""
+    data_lines = []
+    # chunk_size=None: 청크가 도착하는 즉시 처리 (고정 크기만큼 모일 때까지 기다리지 않음)
+    # str.splitlines는 \x85 등도 줄바꿈으로 취급하므로 바이트 단위로 나눈 뒤 UTF-8로 디코딩
+    for raw_line in response.iter_lines(chunk_size=None):
+        line = raw_line.decode('utf-8')
+        if line:
+            if line.startswith('data:'):
+                data_lines.append(line[5:].lstrip())
+            continue
+        # 빈 줄: 이벤트 하나 종료
+        if data_lines:
+            data = '\n'.join(data_lines)
+            data_lines = []
+            try:
+                yield json.loads(data)
+            except json.JSONDecodeError:
+                continue
+    if data_lines:
+        try:
+            yield json.loads('\n'.join(data_lines))
+        except json.JSONDecodeError:
+            pass
+
+
+def search_stream(api_url, api_key, payload, on_output=None, session=None, timeout=None):
+    """
+    스트리밍 모드(response_mode=streaming)로 검색 API 호출.
+    이벤트에 hyde_query / output1~3이 포함되어 도착하는 즉시 on_output(key, value)를 호출하고,
+    workflow_finished 이벤트를 받으면 일반(blocking) 모드와 같은 형태의 응답을 반환한다.
+    서버가 이벤트 스트림이 아닌 JSON으로 응답하면 그 JSON을 그대로 반환한다.
+    """
+    post = session.post if session is not None else requests.post
+    headers = dict(build_headers(api_key), Accept="text/event-stream")
+    payload = dict(payload, response_mode="streaming")
+    with post(api_url, headers=headers, json=payload, timeout=timeout, stream=True) as response:
+        if response.status_code != 200:
+            raise requests.HTTPError(
+                f"API 오류 - 상태코드: {response.status_code}, 응답: {response.text[:200]}",
+                response=response
+            )
+        if 'text/event-stream' not in response.headers.get('Content-Type', ''):
+            return response.json()
+
+        outputs = {}
+        for event in iter_sse_events(response):
+            event_type = event.get('event')
+            data = event.get('data') or {}
+            if event_type == 'error':
+                raise requests.HTTPError(f"워크플로 오류: {event.get('message', event)}", response=response)
+
+            for key in OUTPUT_KEYS:
+                value = (data.get('outputs') or {}).get(key)
+                if value is not None and key not in outputs:
+                    outputs[key] = value
+                    if on_output:
+                        on_output(key, value)
+
+            if event_type == 'workflow_finished':
+                if data.get('status') not in (None, 'succeeded'):
+                    raise requests.HTTPError(f"워크플로 실패: {data.get('error') or data.get('status')}", response=response)
+                data = dict(data, outputs=dict(outputs, **(data.get('outputs') or {})))
+                return {
+                    'workflow_run_id': event.get('workflow_run_id'),
+                    'task_id': event.get('task_id'),
+                    'data': data
+                }
+
+    raise requests.HTTPError("워크플로 종료 이벤트 없이 스트림이 끝났습니다.", response=response)
+
+
+# -------------------------------
+# 복원력 있는 검색 API 클라이언트
+#    커넥션 풀 재사용, 연결/응답 타임아웃, 지터 백오프 재시도(재시도 예산 내),
+#    p95 초과 시 헤지 요청, 연속 실패 시 서킷 브레이커
+# -------------------------------
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 120.0
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_POOL_MAXSIZE = 32
+
+# 재시도 대상 상태코드
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(requests.RequestException):
+    """서킷 브레이커가 열려 요청을 보내지 않음"""
+
+
+class RetryableError(requests.RequestException):
+    """재시도 가능한 실패 (5xx/429, 연결 오류, 타임아웃)"""
+
+    def __init__(self, message, retry_after=None, **kwargs):
+        super().__init__(message, **kwargs)
+        self.retry_after = retry_after
+
+
+def _is_client_error(error):
+    """요청 자체의 문제(4xx)로 실패했는지 여부 (서버 장애가 아니므로 서킷 브레이커 실패로 세지 않음)"""
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return (isinstance(error, requests.HTTPError) and status is not None
+            and 400 <= status < 500 and status not in RETRYABLE_STATUS)
+
+
+class RetryBudget:
+    """
+    재시도 예산: 요청마다 ratio만큼 적립하고 재시도마다 1씩 사용.
+    장애 시 재시도가 전체 요청량의 일정 비율을 넘어 부하를 키우지 않도록 제한한다.
+    min_per_second만큼은 요청량과 관계없이 매초 적립된다.
+    """
+
+    def __init__(self, ratio=0.2, min_per_second=0.5, capacity=10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, amount):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + amount + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def deposit(self):
+        with self._lock:
+            self._refill(self.ratio)
+
+    def withdraw(self):
+        with self._lock:
+            self._refill(0)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+class CircuitBreaker:
+    """
+    연속 실패가 failure_threshold회에 도달하면 reset_timeout초 동안 요청 차단(open),
+    이후 시험 요청 1건을 허용(half-open)해 성공하면 다시 닫는다.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                return True
+            if self.state == self.HALF_OPEN:
+                # 시험 요청 결과가 나올 때까지 추가 요청 차단
+                return False
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def record_cancelled(self):
+        """
+        결과 없이 중단된 요청 (재실행/중지 예외, KeyboardInterrupt 등).
+        시험 요청이 중단되었으면 다시 열어 reset_timeout 뒤에 새 시험 요청을 허용한다 (닫힌 상태에서는 영향 없음).
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class LatencyWindow:
+    """최근 응답 시간 window개로 분위수 계산"""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q, min_samples=1):
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
+
+
+class MisoClient:
+    """
+    검색 API 클라이언트 (스레드 안전, Streamlit 페이지와 배치 도구에서 공용).
+    hedge=True면 응답이 최근 p95보다 늦을 때 같은 요청을 한 번 더 보내 먼저 온 응답을 사용한다.
+    (늦게 도착한 응답은 버려지며, 진행 중인 요청을 취소하지는 않는다)
+    limiter(acquire()를 제공하는 객체, 예: batch_search.RateLimiter)를 지정하면 재시도/헤지를 포함한
+    실제 요청마다 토큰을 1개씩 사용한다.
+    """
+
+    def __init__(self, api_url, api_key, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=0.5, backoff_max=8.0, retry_budget=None, breaker=None,
+                 hedge=False, hedge_min_samples=20, pool_maxsize=DEFAULT_POOL_MAXSIZE, limiter=None):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_budget = retry_budget or RetryBudget()
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.limiter = limiter
+        self.latency = LatencyWindow()
+        self.counters = {'requests': 0, 'retries': 0, 'hedges': 0, 'failures': 0, 'rejected': 0}
+        self._counter_lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._hedge_executor = ThreadPoolExecutor(max_workers=pool_maxsize, thread_name_prefix='miso-hedge') if hedge else None
+
+    def _count(self, name):
+        with self._counter_lock:
+            self.counters[name] += 1
+
+    def _post(self, payload):
+        """요청 1회 (재시도 가능한 실패는 RetryableError로 변환)"""
+        if self.limiter is not None:
+            self.limiter.acquire()
+        self._count('requests')
+        perf.incr('api_calls')
+        started = time.perf_counter()
+        try:
+            response = self.session.post(self.api_url, headers=build_headers(self.api_key),
+                                         json=payload, timeout=self.timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            raise RetryableError(f"연결 오류: {str(e)}") from e
+
+        if response.status_code in RETRYABLE_STATUS:
+            retry_after = response.headers.get('Retry-After')
+            raise RetryableError(
+                f"API 오류 - 상태코드: {response.status_code}, 응답: {response.text[:200]}",
+                retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+                response=response
+            )
+        if response.status_code != 200 or not response.text.strip():
+            raise requests.HTTPError(
+                f"API 오류 - 상태코드: {response.status_code}, 응답: {response.text[:200]}",
+                response=response
+            )
+        response_data = response.json()
+        self.latency.add(time.perf_counter() - started)
+        return response_data
+
+    def _post_hedged(self, payload):
+        """p95가 지나도 응답이 없으면 같은 요청을 한 번 더 보내 먼저 성공한 응답 사용"""
+        hedge_after = self.latency.percentile(95, self.hedge_min_samples) if self.hedge else None
+        if hedge_after is None:
+            return self._post(payload)
+
+        pending = {self._hedge_executor.submit(self._post, payload)}
+        done, pending = wait(pending, timeout=hedge_after)
+        if not done:
+            self._count('hedges')
+            perf.incr('api_hedges')
+            pending.add(self._hedge_executor.submit(self._post, payload))
+        error = None
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+            if not pending:
+                raise error
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+    def _backoff(self, attempt, retry_after=None):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        delay = random.uniform(0, delay)  # full jitter
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        time.sleep(delay)
+
+    def _allow(self):
+        if not self.breaker.allow():
+            self._count('rejected')
+            raise CircuitOpenError("검색 API 연속 실패로 잠시 요청을 중단했습니다. 잠시 후 다시 시도해주세요.")
+
+    def search(self, payload):
+        """검색 API 호출 후 응답 JSON 반환 (실패 시 예외)"""
+        self._allow()
+        try:
+            return self._search(payload)
+        except Exception:
+            raise
+        except BaseException:
+            # 결과를 기록하지 못한 채 중단되어도 시험 요청(half-open) 상태가 남지 않도록 함
+            self.breaker.record_cancelled()
+            raise
+
+    def _search(self, payload):
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                response_data = self._post_hedged(payload)
+            except RetryableError as e:
+                if attempt >= self.max_retries or not self.retry_budget.withdraw():
+                    self._count('failures')
+                    self.breaker.record_failure()
+                    raise
+                self._count('retries')
+                perf.incr('api_retries')
+                self._backoff(attempt, e.retry_after)
+                attempt += 1
+                continue
+            except Exception as e:
+                # 4xx 등 요청 자체의 문제는 서버 장애로 보지 않음
+                if _is_client_error(e):
+                    self.breaker.record_success()
+                else:
+                    self._count('failures')
+                    self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+            return response_data
+
+    def search_stream(self, payload, on_output=None):
+        """
+        스트리밍 모드 검색 (이벤트 수신 후에는 재시도하지 않음).
+        on_output에서 발생한 예외(Streamlit 재실행 등)로 중단되면 서킷 브레이커에는 중단으로 기록한다.
+        """
+        self._allow()
+        try:
+            return self._search_stream(payload, on_output)
+        except Exception:
+            raise
+        except BaseException:
+            self.breaker.record_cancelled()
+            raise
+
+    def _search_stream(self, payload, on_output):
+        if self.limiter is not None:
+            self.limiter.acquire()
+        self._count('requests')
+        perf.incr('api_calls')
+        started = time.perf_counter()
+        try:
+            response_data = search_stream(self.api_url, self.api_key, payload, on_output,
+                                          session=self.session, timeout=self.timeout)
+        except Exception as e:
+            # search()와 같은 기준: 4xx 응답은 서버 장애로 보지 않음
+            if _is_client_error(e):
+                self.breaker.record_success()
+            else:
+                self._count('failures')
+                self.breaker.record_failure()
+            raise
+        self.latency.add(time.perf_counter() - started)
+        self.breaker.record_success()
+        return response_data
+
+    def stats(self):
+        with self._counter_lock:
+            counters = dict(self.counters)
+        return dict(counters, circuit=self.breaker.state, p95=self.latency.percentile(95))
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """설정값(MISO_*)으로 만든 프로세스 공유 검색 API 클라이언트"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = MisoClient(
+                config.API_URL,
+                config.API_KEY,
+                connect_timeout=float(config.get_setting('MISO_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT)),
+                read_timeout=float(config.get_setting('MISO_READ_TIMEOUT', DEFAULT_READ_TIMEOUT)),
+                max_retries=int(config.get_setting('MISO_MAX_RETRIES', DEFAULT_MAX_RETRIES)),
+                hedge=str(config.get_setting('MISO_HEDGE', 'false')).lower() == 'true'
+            )
+        return _client
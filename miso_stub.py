@@ -0,0 +1,184 @@
+"""
+MISO 검색 워크플로 API 로컬 스텁 서버.
+
+    python miso_stub.py fixtures/miso_recordings.jsonl --port 8765
+
+기록 파일(JSON Lines)의 각 줄은 {"query": ..., "response": {...}} 형식이며,
+요청 본문의 query(정규화 기준)와 일치하는 기록 응답(data.outputs.output1/2/3, hyde_query)을 그대로 반환한다.
+response_mode가 streaming이면 출력 키마다 node_finished 이벤트를 보낸 뒤 workflow_finished로 끝나는
+이벤트 스트림(SSE)으로 응답한다. 기록이 없는 질문은 404를 반환한다.
+실제 서비스 없이 벤치마크/부하 테스트를 결정적으로 실행하기 위한 용도.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from parsing import OUTPUT_KEYS
+from search_cache import normalize_query
+
+
+def load_recordings(path):
+    """{정규화된 질문: 응답} 로드"""
+    recordings = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                recordings[normalize_query(record['query'])] = record['response']
+    return recordings
+
+
+def save_recording(path, query, response_data):
+    """기록 파일에 응답 1건 추가"""
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'query': query, 'response': response_data}, ensure_ascii=False) + '\n')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        stub = self.server.stub
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except json.JSONDecodeError:
+            self._send_json(400, {'message': 'invalid json'})
+            return
+        stub.count_request()
+        stub.sleep()
+
+        response_data = stub.recordings.get(normalize_query(payload.get('query', '')))
+        if response_data is None:
+            self._send_json(404, {'message': 'no recording for query'})
+            return
+        if payload.get('response_mode') == 'streaming':
+            self._send_stream(response_data)
+            return
+        self._send_json(200, response_data)
+
+    def _send_event(self, event):
+        """이벤트 1개를 chunked 인코딩 청크 1개로 전송"""
+        data = f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_stream(self, response_data):
+        """기록 응답을 워크플로 이벤트 스트림으로 전송 (출력 키마다 stream_delay초 간격)"""
+        stub = self.server.stub
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        run_id = response_data.get('workflow_run_id', 'stub-run')
+        data = response_data.get('data', {})
+        outputs = data.get('outputs', {})
+        self._send_event({'event': 'workflow_started', 'workflow_run_id': run_id, 'data': {}})
+        for key in OUTPUT_KEYS:
+            if key in outputs:
+                time.sleep(stub.stream_delay)
+                self._send_event({
+                    'event': 'node_finished',
+                    'workflow_run_id': run_id,
+                    'data': {'node_id': key, 'status': 'succeeded', 'outputs': {key: outputs[key]}}
+                })
+        self._send_event({
+            'event': 'workflow_finished',
+            'workflow_run_id': run_id,
+            'data': dict(data, status='succeeded')
+        })
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class StubServer:
+    """
+    스텁 서버를 백그라운드 스레드로 실행.
+    latency/jitter(초)로 응답 지연을 흉내 내며, seed를 고정하면 지연도 결정적이다.
+    stream_delay(초)는 스트리밍 모드에서 출력 이벤트 사이의 간격이다.
+    """
+
+    def __init__(self, recordings, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, seed=0, stream_delay=0.0):
+        self.recordings = recordings
+        self.latency = latency
+        self.jitter = jitter
+        self.stream_delay = stream_delay
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def count_request(self):
+        with self._lock:
+            self.request_count += 1
+
+    def sleep(self):
+        if not self.latency and not self.jitter:
+            return
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        time.sleep(delay)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='miso-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MISO 검색 API 로컬 스텁 서버")
+    parser.add_argument('recordings', help="기록 응답 파일 (.jsonl)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="응답 지연(초)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="추가 무작위 지연 최대값(초)")
+    parser.add_argument('--stream-delay', type=float, default=0.0, help="스트리밍 모드 출력 이벤트 간격(초)")
+    args = parser.parse_args(argv)
+
+    stub = StubServer(load_recordings(args.recordings), args.host, args.port, args.latency, args.jitter,
+                      stream_delay=args.stream_delay)
+    print(f"MISO 스텁 서버 실행 중: {stub.url} (기록 {len(stub.recordings)}건)")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub._server.server_close()
+
+
+if __name__ == '__main__':
+    main()
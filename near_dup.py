@@ -0,0 +1,226 @@
+"""
+유사(near-duplicate) 질문 인덱스.
+
+띄어쓰기/문장부호/조사 정도만 다른 질문을 찾기 위해, 공백과 문장부호를 제거한 문자 2-gram(음절 bigram) 집합의
+MinHash(63개 해시)를 LSH(21밴드 × 3행)로 색인하고, 후보만 실제 Jaccard 유사도로 확인한다.
+밴드 버킷 키는 (질문 수 × 밴드) 배열에 보관하며, 조회 시 배열 전체를 한 번에 비교해 후보를 찾는다.
+항목은 추가만 되므로(증분 색인) 피드백이 쌓여도 전체를 다시 만들 필요가 없다.
+
+    python near_dup.py "연차 휴가는 며칠 인가요"      # 피드백 저장소 기준 유사 질문 조회
+    python near_dup.py --history history.csv "..."
+"""
+import argparse
+import re
+import sys
+import threading
+import unicodedata
+
+import numpy as np
+
+NGRAM = 2
+BANDS = 21
+ROWS_PER_BAND = 3
+NUM_PERM = BANDS * ROWS_PER_BAND
+DEFAULT_THRESHOLD = 0.5
+# 일괄 색인 시 한 번에 MinHash를 계산할 질문 수
+BATCH_SIZE = 4096
+DEFAULT_LIMIT = 5
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.RandomState(20240501)
+_PERM_A = _rng.randint(1, 1 << 32, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERM).astype(np.uint64)
+# 밴드 내 ROWS_PER_BAND개 해시를 하나의 버킷 키로 합치는 계수 (충돌은 Jaccard 확인 단계에서 걸러짐)
+_BAND_MIX = _rng.randint(1, 1 << 62, size=ROWS_PER_BAND, dtype=np.int64).astype(np.uint64) | np.uint64(1)
+
+# 공백, 문장부호, 기호 제거 (한글/영문/숫자만 남김)
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def normalize(query):
+    """비교용 정규화: NFC, 소문자, 공백/문장부호 제거"""
+    return _NON_WORD.sub('', unicodedata.normalize('NFC', query or '').lower())
+
+
+def shingles(normalized):
+    """
+    문자 n-gram의 32비트 해시 집합 (n보다 짧으면 문자열 전체 하나).
+    인덱스는 프로세스 메모리에만 있으므로 내장 hash를 사용한다.
+    """
+    if len(normalized) <= NGRAM:
+        grams = [normalized] if normalized else []
+    else:
+        grams = [normalized[i:i + NGRAM] for i in range(len(normalized) - NGRAM + 1)]
+    return frozenset(hash(g) & 0xFFFFFFFF for g in grams)
+
+
+def _permute(values):
+    return (np.outer(values, _PERM_A) + _PERM_B) % _MERSENNE_PRIME & _MAX_HASH
+
+
+def minhash(shingle_set):
+    """shingle 해시 집합의 MinHash 서명 (NUM_PERM개)"""
+    return _permute(np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))).min(axis=0)
+
+
+def minhash_many(shingle_sets):
+    """여러 shingle 집합의 MinHash 서명을 한 번에 계산 (행마다 서명 1개, 빈 집합은 없어야 함)"""
+    lengths = np.fromiter((len(s) for s in shingle_sets), dtype=np.int64, count=len(shingle_sets))
+    values = np.fromiter((h for s in shingle_sets for h in s), dtype=np.uint64, count=int(lengths.sum()))
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    return np.minimum.reduceat(_permute(values), starts, axis=0)
+
+
+def band_keys(signatures):
+    """서명 행렬(n × NUM_PERM)을 밴드별 버킷 키 행렬(n × BANDS)로 변환"""
+    rows = signatures.reshape(len(signatures), BANDS, ROWS_PER_BAND)
+    return (rows * _BAND_MIX).sum(axis=2)
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class NearDupIndex:
+    """
+    질문별 이전 평가 색인 (스레드 안전).
+    같은 정규화 문자열의 질문은 한 항목으로 묶이며, 평가 목록은 추가된 순서대로 보관한다.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._ids = {}        # {정규화 문자열: 질문 ID}
+        self._queries = []    # 질문 ID → 원문(처음 추가된 것)
+        self._shingles = []   # 질문 ID → shingle 집합
+        self._judgments = []  # 질문 ID → [히스토리 항목, ...]
+        self._keys = np.empty((1024, BANDS), dtype=np.uint64)  # 질문 ID → 밴드별 버킷 키 (앞 len(self)행 사용)
+        self._seen = set()    # 추가한 히스토리 항목 (timestamp, user_name, query, endpoint)
+        self._synced = None   # 마지막으로 동기화한 히스토리 목록 (같은 객체면 건너뜀)
+        self.cursor = None    # 저장소 증분 조회 위치 (FeedbackStore.updates)
+
+    def __len__(self):
+        return len(self._queries)
+
+    def add(self, entry):
+        """히스토리 항목 1건 추가 (이미 추가한 항목이면 무시)"""
+        self.add_many([entry])
+
+    def add_many(self, entries):
+        """히스토리 항목 여러 건 추가 (새 질문의 MinHash는 BATCH_SIZE개씩 한 번에 계산)"""
+        with self._lock:
+            new = {}  # {정규화 문자열: 원문} (이번에 처음 보는 질문)
+            fresh = []
+            for entry in entries:
+                entry_key = (entry['timestamp'], entry['user_name'], entry['query'], entry.get('endpoint', ''))
+                # 증분 조회가 전체 히스토리를 돌려줄 때도 이미 본 항목은 정규화하지 않고 건너뜀
+                if entry_key in self._seen:
+                    continue
+                self._seen.add(entry_key)
+                normalized = normalize(entry['query'])
+                if not normalized:
+                    continue
+                if normalized not in self._ids:
+                    new.setdefault(normalized, entry['query'])
+                fresh.append((normalized, entry))
+
+            items = list(new.items())
+            for start in range(0, len(items), BATCH_SIZE):
+                batch = items[start:start + BATCH_SIZE]
+                shingle_sets = [shingles(normalized) for normalized, _ in batch]
+                keys = band_keys(minhash_many(shingle_sets))
+                size = len(self._queries)
+                if size + len(batch) > len(self._keys):
+                    grown = np.empty((max(2 * len(self._keys), size + len(batch)), BANDS), dtype=np.uint64)
+                    grown[:size] = self._keys[:size]
+                    self._keys = grown
+                self._keys[size:size + len(batch)] = keys
+                for (normalized, query), shingle_set in zip(batch, shingle_sets):
+                    self._ids[normalized] = len(self._queries)
+                    self._queries.append(query)
+                    self._shingles.append(shingle_set)
+                    self._judgments.append([])
+
+            for normalized, entry in fresh:
+                self._judgments[self._ids[normalized]].append(entry)
+
+    def sync(self, entries):
+        """저장소 히스토리 중 아직 추가하지 않은 항목만 추가"""
+        if entries is self._synced:
+            return
+        self.add_many(entries)
+        self._synced = entries
+
+    def lookup(self, query, limit=DEFAULT_LIMIT, threshold=None):
+        """
+        유사한 이전 질문 목록 (유사도 내림차순).
+        [{'query', 'similarity', 'judgments': [히스토리 항목, ...] (최신순)}]
+        """
+        threshold = self.threshold if threshold is None else threshold
+        normalized = normalize(query)
+        if not normalized:
+            return []
+        shingle_set = shingles(normalized)
+        keys = band_keys(minhash(shingle_set)[np.newaxis])
+        with self._lock:
+            # 밴드 하나라도 버킷 키가 같으면 후보
+            candidates = set(np.flatnonzero((self._keys[:len(self._queries)] == keys).any(axis=1)).tolist())
+            exact = self._ids.get(normalized)
+            if exact is not None:
+                candidates.add(exact)
+            matches = []
+            for query_id in candidates:
+                similarity = 1.0 if query_id == exact else jaccard(shingle_set, self._shingles[query_id])
+                if similarity >= threshold:
+                    matches.append({
+                        'query': self._queries[query_id],
+                        'similarity': similarity,
+                        'judgments': sorted(self._judgments[query_id], key=lambda e: e['timestamp'], reverse=True)
+                    })
+        matches.sort(key=lambda m: m['similarity'], reverse=True)
+        return matches[:limit]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_near_dup_index():
+    """프로세스 공유 유사 질문 인덱스 (피드백 저장소 히스토리와 동기화)"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = NearDupIndex()
+    import storage
+    entries, cursor = storage.get_store().updates(_index.cursor)
+    _index.sync(entries)
+    _index.cursor = cursor
+    return _index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="유사 질문 조회")
+    parser.add_argument('query')
+    parser.add_argument('--history', help="시트를 내려받은 CSV 파일 (기본: 피드백 저장소에서 로드)")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT)
+    args = parser.parse_args(argv)
+
+    if args.history:
+        import history
+        index = NearDupIndex()
+        index.sync(history.load_history_file(args.history))
+    else:
+        index = get_near_dup_index()
+    for match in index.lookup(args.query, args.limit, args.threshold):
+        print(f"{match['similarity']:.2f}  {match['query']} (평가 {len(match['judgments'])}건)")
+        for entry in match['judgments']:
+            print(f"      {entry['timestamp']} {entry['user_name']} {entry['rating']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import re
+
+# -------------------------------
+# MISO 검색 응답 파싱
+# -------------------------------
+# 검색 결과 목록이 담기는 워크플로 출력 키
+RESULT_KEYS = ("output1", "output2", "output3")
+# 워크플로 출력 키 전체 (가상문서 + 검색 결과)
+OUTPUT_KEYS = ("hyde_query",) + RESULT_KEYS
+
+def parse_search_results(response_data):
+    """
+    API 응답에서 output1, output2, output3 모두 꺼내
+    하나의 리스트로 모아서 반환
+    """
+    outputs = []
+    data = response_data.get("data", {}).get("outputs", {})
+    
+    for key in RESULT_KEYS:
+        if key in data:
+            val = data[key]
+            if isinstance(val, list):
+                outputs.extend(val)
+            else:
+                outputs.append(val)
+    return outputs
+
+# content 안의 라벨 → 필드 이름
+_CONTENT_FIELDS = (
+    ('장번호', 'chapter'),
+    ('조번호', 'article'),
+    ('조제목', 'title'),
+    ('row_id', 'row_id'),
+    ('질문', 'faq_question'),
+)
+
+def parse_content(content):
+    """
+    content('장번호: ..;조번호: ..;...')를 한 번만 훑어 필드 dict로 반환.
+    라벨이 포함된 첫 번째 조각의 값을 사용한다.
+    """
+    fields = {}
+    for part in content.split(';'):
+        for label, name in _CONTENT_FIELDS:
+            if name not in fields and label in part:
+                segments = part.split(':')
+                fields[name] = segments[1].strip() if len(segments) > 1 else ''
+    return fields
+
+class SearchResult:
+    """파싱된 검색 결과 1건"""
+    __slots__ = ('dataset_name', 'chapter', 'article', 'title', 'score',
+                 'content', 'is_faq', 'faq_display', 'position')
+
+    def __init__(self, dataset_name, chapter, article, title, score, content,
+                 is_faq=False, faq_display='', position=0):
+        self.dataset_name = dataset_name
+        self.chapter = chapter
+        self.article = article
+        self.title = title
+        self.score = score
+        self.content = content
+        self.is_faq = is_faq
+        self.faq_display = faq_display
+        self.position = position  # 원본 응답(output1~3) 내 순서 (1부터)
+
+    @property
+    def key(self):
+        """문서 식별 키 (dataset, chapter, article)"""
+        return (self.dataset_name, self.chapter, self.article)
+
+    def to_dict(self):
+        result = {
+            'dataset_name': self.dataset_name,
+            'chapter': self.chapter,
+            'article': self.article,
+            'title': self.title,
+            'score': self.score,
+            'content': self.content,
+            'is_faq': self.is_faq
+        }
+        if self.is_faq:
+            result['faq_display'] = self.faq_display
+        return result
+
+def parse_output(output, position=0):
+    """단일 output 딕셔너리를 SearchResult로 파싱"""
+    content = output.get('content', '')
+    metadata = output.get('metadata', {})
+    
+    dataset_name = metadata.get('dataset_name', 'N/A')
+    score = metadata.get('score', 0)
+    
+    # 문서 정보 파싱
+    fields = parse_content(content)
+    title = fields.get('title', '')
+    if title.lower() == 'nan':
+        title = ''
+    
+    # FAQ 등 특수 케이스 처리
+    row_id = fields.get('row_id', '')
+    faq_question = fields.get('faq_question', '')
+    if dataset_name == 'FAQ.csv' and row_id and faq_question:
+        return SearchResult(dataset_name, row_id, '', '', score, content,
+                            is_faq=True, faq_display=f"{row_id} - {faq_question}", position=position)
+    
+    # 일반 문서
+    return SearchResult(dataset_name, fields.get('chapter', 'N/A'), fields.get('article', 'N/A'),
+                        title, score, content, position=position)
+
+def parse_outputs(outputs):
+    """output 목록을 원본 순서 그대로 SearchResult 목록으로 파싱"""
+    return [parse_output(o, position) for position, o in enumerate(outputs, 1)]
+
+def build_doc_index(results):
+    """{(dataset, chapter, article): SearchResult} 인덱스 (같은 키는 원본 순서상 첫 문서)"""
+    index = {}
+    for result in results:
+        index.setdefault(result.key, result)
+    return index
+
+def process_output(output):
+    """단일 output 딕셔너리를 파싱하여 필요한 정보만 추출"""
+    return parse_output(output).to_dict()
+
+# -------------------------------
+# 시트 "선택된 문서" 컬럼 파싱
+#    형식: dataset - chapter - article (title) (관련도: x, 순위: i/N)
+# -------------------------------
+SELECTED_DOC_PATTERN = (
+    r'^(?P<dataset>.+?) - (?P<chapter>.*?) - (?P<article>.*?)'
+    r'(?: \((?P<title>.*)\))? \(관련도: (?P<score>[-+\d.eE]+), 순위: (?P<rank>\d+)/(?P<total>\d+)\)$'
+)
+_SELECTED_DOC_RE = re.compile(SELECTED_DOC_PATTERN)
+
+def parse_selected_doc(text):
+    """선택된 문서 문자열 1건을 dict로 파싱 (형식이 다르면 None)"""
+    match = _SELECTED_DOC_RE.match(text.strip())
+    if not match:
+        return None
+    doc = match.groupdict()
+    doc['title'] = doc['title'] or ''
+    doc['score'] = float(doc['score'])
+    doc['rank'] = int(doc['rank'])
+    doc['total'] = int(doc['total'])
+    return doc
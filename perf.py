@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import ContextDecorator
+
+# -------------------------------
+# 성능 계측
+#    단계별 소요 시간(최근 window개 기준 p50/p95/p99)과 누적 카운터를 프로세스 단위로 집계
+#    (사용법) with perf.timed('miso_api'): ...  /  @perf.timed('render')  /  perf.incr('api_calls')
+# -------------------------------
+DEFAULT_WINDOW = 1000
+PERCENTILES = (50, 95, 99)
+METRIC_PREFIX = 'rag_tester'
+
+
+class Histogram:
+    """최근 window개 측정값의 분위수 + 누적 횟수/합계"""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self._samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def summary(self):
+        ordered = sorted(self._samples)
+        summary = {'count': self.count, 'sum': self.total}
+        for q in PERCENTILES:
+            summary[f'p{q}'] = ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))] if ordered else None
+        return summary
+
+
+class Registry:
+    """단계별 히스토그램과 카운터 모음 (스레드 안전)"""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.started_at = time.time()
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram(self.window)
+            histogram.observe(seconds)
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def snapshot(self):
+        """{'stages': {단계: {count, sum, p50, p95, p99}}, 'counters': {이름: 값}}"""
+        with self._lock:
+            return {
+                'stages': {stage: h.summary() for stage, h in sorted(self._histograms.items())},
+                'counters': dict(sorted(self._counters.items()))
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+
+class timed(ContextDecorator):
+    """with 블록 또는 데코레이터로 감싼 구간의 소요 시간을 stage 이름으로 기록 (예외가 나도 기록)"""
+
+    def __init__(self, stage, registry=None):
+        self.stage = stage
+        self.registry = registry
+
+    def _recreate_cm(self):
+        # 데코레이터로 쓸 때 호출마다 새 인스턴스 사용 (여러 세션 스레드가 동시에 실행)
+        return timed(self.stage, self.registry)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        (self.registry or _registry).observe(self.stage, time.perf_counter() - self._started)
+        return False
+
+
+_registry = Registry()
+
+
+def observe(stage, seconds):
+    _registry.observe(stage, seconds)
+
+
+def incr(name, amount=1):
+    _registry.incr(name, amount)
+
+
+def snapshot():
+    return _registry.snapshot()
+
+
+def reset():
+    _registry.reset()
+
+
+def to_prometheus(snap=None):
+    """Prometheus 텍스트 노출 형식 (단계별 summary + 카운터)"""
+    snap = snap or snapshot()
+    lines = [
+        f'# HELP {METRIC_PREFIX}_stage_seconds 단계별 소요 시간(초)',
+        f'# TYPE {METRIC_PREFIX}_stage_seconds summary',
+    ]
+    for stage, s in snap['stages'].items():
+        for q in PERCENTILES:
+            if s[f'p{q}'] is not None:
+                lines.append(f'{METRIC_PREFIX}_stage_seconds{{stage="{stage}",quantile="{q / 100}"}} {s[f"p{q}"]:.6f}')
+        lines.append(f'{METRIC_PREFIX}_stage_seconds_sum{{stage="{stage}"}} {s["sum"]:.6f}')
+        lines.append(f'{METRIC_PREFIX}_stage_seconds_count{{stage="{stage}"}} {s["count"]}')
+    for name, value in snap['counters'].items():
+        metric = f'{METRIC_PREFIX}_{name}_total'
+        lines.append(f'# TYPE {metric} counter')
+        lines.append(f'{metric} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def to_json_lines(snap=None):
+    """단계/카운터마다 한 줄씩 JSON Lines (로그 수집기 적재용, 모든 줄에 같은 시각 기록)"""
+    snap = snap or snapshot()
+    now = round(time.time(), 3)
+    lines = [json.dumps(dict(ts=now, type='stage', name=stage, **s), ensure_ascii=False)
+             for stage, s in snap['stages'].items()]
+    lines += [json.dumps({'ts': now, 'type': 'counter', 'name': name, 'value': value}, ensure_ascii=False)
+              for name, value in snap['counters'].items()]
+    return '\n'.join(lines) + '\n' if lines else ''
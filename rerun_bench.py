@@ -0,0 +1,161 @@
+"""
+Streamlit 재실행(rerun) 비용 벤치마크.
+
+    python rerun_bench.py                    # 기본: 재실행 50회, 히스토리 200건
+    python rerun_bench.py --reruns 200 --history-size 1000
+
+로컬 MISO 스텁 서버(fixtures/miso_recordings.jsonl)와 임시 SQLite 저장소로 app.py를 AppTest로 실행해
+이름 입력 → 질문 입력 → 검색까지 진행한 뒤, 아래 상호작용을 반복하며 1회 재실행 비용을 측정한다.
+    idle      변경 없이 재실행
+    option    "스트리밍 모드" 체크박스 클릭 (검색 결과 유지)
+    document  검색 결과의 문서 체크박스 클릭
+스크립트 실행 시간(script_run)과 결과 렌더링 시간(render)의 p50/p95, 둘의 차이(재실행 고정 비용),
+재실행 중 발생한 저장소/API 조회 횟수를 출력한다. 고정 비용이 작고 조회 횟수가 0이면
+체크박스 클릭은 해당 화면을 다시 그리는 비용만 든다는 뜻이다.
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RECORDINGS = os.path.join(ROOT, 'fixtures', 'miso_recordings.jsonl')
+DEFAULT_RERUNS = 50
+DEFAULT_HISTORY_SIZE = 200
+USER_NAME = 'rerun-bench'
+# 첫 실행 후 import되지 않아야 하는 모듈 (해당 화면을 쓸 때만 import)
+LAZY_MODULES = ('gspread', 'oauth2client', 'pandas', 'numpy', 'pyarrow')
+# 재실행 중 0이어야 하는 조회 (단계 이름 또는 카운터)
+UPSTREAM_STAGES = ('history_load', 'near_dup', 'miso_api', 'sheets')
+UPSTREAM_COUNTERS = ('api_calls', 'sheets_calls')
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))] if ordered else None
+
+
+def _seed_history(store, query, size):
+    """벤치마크 사용자의 히스토리 size건 저장 (사이드바 히스토리 로드 비용을 재현)"""
+    rows = [
+        [f'2024-01-01 00:{n // 60:02d}:{n % 60:02d}', USER_NAME, f'{query} {n}', 'A', '',
+         '취업규칙.pdf - 제5장 - 제32조 (연차유급휴가) (관련도: 0.8731, 순위: 2/4)', '']
+        for n in range(size)
+    ]
+    store.save(rows)
+
+
+def _measure(at, perf, interact, reruns):
+    """interact(at) 후 재실행을 reruns회 반복한 측정 결과"""
+    perf.reset()
+    wall = []
+    for _ in range(reruns):
+        interact(at)
+        started = time.perf_counter()
+        at.run()
+        wall.append(time.perf_counter() - started)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    snap = perf.snapshot()
+    stages = snap['stages']
+    script = stages.get('script_run', {})
+    render = stages.get('render', {})
+    result = {
+        'wall_p50_ms': _percentile(wall, 50) * 1000,
+        'script_p50_ms': (script.get('p50') or 0) * 1000,
+        'script_p95_ms': (script.get('p95') or 0) * 1000,
+        'render_p50_ms': (render.get('p50') or 0) * 1000,
+        'render_p95_ms': (render.get('p95') or 0) * 1000,
+        'upstream': {
+            **{name: stages[name]['count'] for name in UPSTREAM_STAGES if name in stages},
+            **{name: snap['counters'][name] for name in UPSTREAM_COUNTERS if name in snap['counters']}
+        }
+    }
+    result['overhead_p50_ms'] = result['script_p50_ms'] - result['render_p50_ms']
+    return result
+
+
+def run_bench(recordings_path=DEFAULT_RECORDINGS, reruns=DEFAULT_RERUNS, history_size=DEFAULT_HISTORY_SIZE):
+    workdir = tempfile.mkdtemp(prefix='rerun_bench_')
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    # 설정은 config import(miso_stub 포함) 전에 지정해야 함
+    os.environ.update({
+        'MISO_API_URL': f'http://127.0.0.1:{port}/',
+        'MISO_API_KEY': 'rerun-bench',
+        'STORAGE_BACKEND': 'sqlite',
+        'STORAGE_PATH': os.path.join(workdir, 'feedback.db'),
+        'SHEETS_EXPORT': 'false',
+        'FEEDBACK_SPOOL_PATH': os.path.join(workdir, 'feedback_spool.db'),
+        'EVAL_QUEUE_PATH': os.path.join(workdir, 'eval_queue.db'),
+    })
+    sys.path.insert(0, ROOT)
+    from streamlit.testing.v1 import AppTest
+
+    from miso_stub import StubServer, load_recordings
+    recordings = load_recordings(recordings_path)
+    stub = StubServer(recordings, port=port).start()
+
+    import perf
+    import storage
+
+    query = next(iter(recordings))
+    _seed_history(storage.get_store(), query, history_size)
+    try:
+        at = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=60)
+        started = time.perf_counter()
+        at.run()
+        report = {
+            'first_run_ms': (time.perf_counter() - started) * 1000,
+            'lazy_modules_loaded': [name for name in LAZY_MODULES if name in sys.modules]
+        }
+        at.sidebar.text_input[0].input(USER_NAME)
+        at.text_area[0].input(query)
+        at.run()
+        [button for button in at.button if button.label == "Data 검색"][0].click()
+        at.run()
+        if not at.checkbox(key='doc_checkbox_0'):
+            raise RuntimeError("검색 결과가 표시되지 않았습니다.")
+
+        option = [checkbox for checkbox in at.checkbox if checkbox.label == "스트리밍 모드"][0]
+        report['scenarios'] = {
+            'idle': _measure(at, perf, lambda at: None, reruns),
+            'option': _measure(at, perf, lambda at: at.checkbox(key=option.key).set_value(
+                not at.checkbox(key=option.key).value), reruns),
+            'document': _measure(at, perf, lambda at: at.checkbox(key='doc_checkbox_0').set_value(
+                not at.checkbox(key='doc_checkbox_0').value), reruns),
+        }
+        return report
+    finally:
+        stub.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streamlit 재실행 비용 벤치마크")
+    parser.add_argument('--recordings', default=DEFAULT_RECORDINGS, help="스텁 서버 기록 파일 (JSON Lines)")
+    parser.add_argument('--reruns', type=int, default=DEFAULT_RERUNS, help="상호작용별 재실행 횟수")
+    parser.add_argument('--history-size', type=int, default=DEFAULT_HISTORY_SIZE, help="사이드바 히스토리 건수")
+    parser.add_argument('--format', choices=['text', 'json'], default='text')
+    args = parser.parse_args(argv)
+
+    report = run_bench(args.recordings, args.reruns, args.history_size)
+    if args.format == 'json':
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"첫 실행: {report['first_run_ms']:.0f} ms "
+          f"(import된 무거운 모듈: {', '.join(report['lazy_modules_loaded']) or '없음'})")
+    print(f"{'상호작용':<10}{'wall p50':>10}{'script p50':>12}{'render p50':>12}{'고정 비용':>10}  재실행 중 조회")
+    for name, result in report['scenarios'].items():
+        upstream = ', '.join(f"{k}={v}" for k, v in result['upstream'].items()) or '없음'
+        print(f"{name:<10}{result['wall_p50_ms']:>10.1f}{result['script_p50_ms']:>12.1f}"
+              f"{result['render_p50_ms']:>12.1f}{result['overhead_p50_ms']:>10.1f}  {upstream}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import json
+import sys
+import zlib
+from array import array
+
+from parsing import SearchResult, parse_outputs, parse_search_results
+
+# -------------------------------
+# 세션 보관용 검색 결과
+#    응답을 한 번만 파싱해 컬럼(배열/튜플) 형태로 보관하고, 원본 JSON은 압축해 둔다.
+#    재실행 시에는 파싱/정렬 없이 그대로 렌더링한다.
+# -------------------------------
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class ResultSet:
+    """
+    검색 결과 목록 (읽기 전용).
+    행 번호 i는 원본 응답(output1~3) 순서이며, 원본 순위(position)는 i + 1이다.
+    dataset/chapter/article/title은 세션 간에 같은 문자열을 공유하도록 intern한다.
+    """
+    __slots__ = ('datasets', 'dataset_codes', 'chapters', 'articles', 'titles', 'faq_displays',
+                 'contents', 'scores', 'faq_bits', 'order', 'groups', 'hyde_query', '_raw')
+
+    def __init__(self, results, hyde_query=None, raw=b''):
+        # 점수 내림차순 (같은 점수는 원본 순서)
+        order = sorted(range(len(results)), key=lambda i: -results[i].score)
+        # 데이터셋 코드: 점수순으로 처음 등장한 순서 (화면의 데이터셋 그룹 순서)
+        codes = {}
+        for i in order:
+            codes.setdefault(results[i].dataset_name, len(codes))
+
+        self.datasets = tuple(_intern(name) for name in codes)
+        self.dataset_codes = array('H', (codes[r.dataset_name] for r in results))
+        self.chapters = tuple(_intern(r.chapter) for r in results)
+        self.articles = tuple(_intern(r.article) for r in results)
+        self.titles = tuple(_intern(r.title) for r in results)
+        self.faq_displays = tuple(r.faq_display for r in results)
+        self.contents = tuple(r.content for r in results)
+        self.scores = array('d', (float(r.score) for r in results))
+        self.faq_bits = sum(1 << i for i, r in enumerate(results) if r.is_faq)
+        self.order = array('I', order)
+        groups = [array('I') for _ in codes]
+        for i in order:
+            groups[self.dataset_codes[i]].append(i)
+        self.groups = tuple(groups)
+        self.hyde_query = hyde_query
+        self._raw = raw
+
+    @classmethod
+    def from_response(cls, response_data):
+        """API 응답 JSON을 파싱해 ResultSet 생성 (원본은 zlib 압축 보관)"""
+        results = parse_outputs(parse_search_results(response_data))
+        hyde_query = response_data.get("data", {}).get("outputs", {}).get("hyde_query")
+        raw = zlib.compress(json.dumps(response_data, ensure_ascii=False).encode('utf-8'))
+        return cls(results, hyde_query, raw)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def dataset(self, i):
+        return self.datasets[self.dataset_codes[i]]
+
+    def is_faq(self, i):
+        return bool(self.faq_bits >> i & 1)
+
+    def key(self, i):
+        """문서 식별 키 (dataset, chapter, article)"""
+        return (self.dataset(i), self.chapters[i], self.articles[i])
+
+    def result(self, i):
+        """행 i를 SearchResult로 반환"""
+        return SearchResult(self.dataset(i), self.chapters[i], self.articles[i], self.titles[i],
+                            self.scores[i], self.contents[i], is_faq=self.is_faq(i),
+                            faq_display=self.faq_displays[i], position=i + 1)
+
+    def results(self):
+        """원본 순서의 SearchResult 목록"""
+        return [self.result(i) for i in range(len(self))]
+
+    def raw_response(self):
+        """압축 보관한 원본 응답 JSON 복원"""
+        return json.loads(zlib.decompress(self._raw).decode('utf-8'))
+
+
+# -------------------------------
+# 선택 상태 비트셋 (int, 비트 i = 행 i 선택 여부)
+# -------------------------------
+def set_bit(bits, i, on):
+    return bits | (1 << i) if on else bits & ~(1 << i)
+
+
+def has_bit(bits, i):
+    return bool(bits >> i & 1)
+
+
+def iter_bits(bits):
+    """선택된 행 번호 (오름차순)"""
+    i = 0
+    while bits:
+        if bits & 1:
+            yield i
+        bits >>= 1
+        i += 1
@@ -0,0 +1,183 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import config
+import perf
+
+# -------------------------------
+# 검색 결과 캐시
+#    (정규화된 질문, 직위, 회사) 기준 LRU + TTL, 선택적으로 SQLite에 영속화
+# -------------------------------
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL = 60 * 60
+# SQLite에 보관할 최대 응답 수 (초과분은 오래된 것부터 삭제)
+DEFAULT_MAX_DISK_ENTRIES = 4096
+# 이 횟수만큼 저장할 때마다(또는 마지막 정리 후 TTL이 지나면) 만료/초과 행 정리
+PRUNE_INTERVAL = 64
+
+_WHITESPACE = re.compile(r'\s+')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_cache (
+    key TEXT PRIMARY KEY,
+    stored_at REAL NOT NULL,
+    response TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_search_cache_stored_at ON search_cache (stored_at);
+"""
+
+
+def normalize_query(query):
+    """유니코드 정규화(NFC) + 앞뒤 공백 제거 + 연속 공백 축약"""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFC', query or '')).strip()
+
+
+def cache_key(payload):
+    """검색 요청 본문에서 캐시 키 생성 (정규화된 질문 + 사용자 직위/회사)"""
+    user = payload.get("user", {})
+    return json.dumps(
+        [normalize_query(payload.get("query", "")), user.get("position", ""), user.get("company", "")],
+        ensure_ascii=False
+    )
+
+
+class SearchCache:
+    """
+    검색 응답 캐시 (스레드 안전).
+    path를 지정하면 SQLite에 함께 저장해 프로세스 재시작 후에도 재사용한다.
+    디스크의 행도 같은 TTL로 만료되며 최대 max_disk_entries개(정리 주기 사이에는 PRUNE_INTERVAL개까지 초과)만 보관한다.
+    반환되는 응답 dict는 여러 세션이 공유하므로 수정하면 안 된다.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, path=None,
+                 max_disk_entries=DEFAULT_MAX_DISK_ENTRIES):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()  # {key: (stored_at, response_data)}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._conn = None
+        self._puts_since_prune = 0
+        self._pruned_at = 0.0
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(_SCHEMA)
+            self._prune(time.time())
+
+    def _prune(self, now):
+        """디스크에서 만료된 행과 최근 max_disk_entries개를 넘는 오래된 행 삭제"""
+        self._conn.execute('DELETE FROM search_cache WHERE stored_at < ?', (now - self.ttl,))
+        self._conn.execute(
+            'DELETE FROM search_cache WHERE key IN '
+            '(SELECT key FROM search_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_disk_entries,)
+        )
+        self._puts_since_prune = 0
+        self._pruned_at = now
+
+    def _load_from_disk(self, key, now):
+        if self._conn is None:
+            return None
+        row = self._conn.execute(
+            'SELECT stored_at, response FROM search_cache WHERE key = ? AND stored_at >= ?',
+            (key, now - self.ttl)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, payload):
+        """캐시된 응답 반환 (없거나 만료되었으면 None)"""
+        key = cache_key(payload)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] >= self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                entry = self._load_from_disk(key, now)
+                if entry is not None:
+                    self._store(key, entry)
+            else:
+                self._entries.move_to_end(key)
+
+            if entry is None:
+                self.misses += 1
+                perf.incr('search_cache_misses')
+                return None
+            self.hits += 1
+            perf.incr('search_cache_hits')
+            return entry[1]
+
+    def contains(self, payload):
+        """유효한 캐시 항목이 있는지 확인 (적중/미적중 횟수와 LRU 순서에는 반영하지 않음)"""
+        key = cache_key(payload)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return now - entry[0] < self.ttl
+            if self._conn is None:
+                return False
+            return self._conn.execute(
+                'SELECT 1 FROM search_cache WHERE key = ? AND stored_at >= ?', (key, now - self.ttl)
+            ).fetchone() is not None
+
+    def put(self, payload, response_data):
+        key = cache_key(payload)
+        entry = (time.time(), response_data)
+        with self._lock:
+            self._store(key, entry)
+            if self._conn is not None:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO search_cache (key, stored_at, response) VALUES (?, ?, ?)',
+                    (key, entry[0], json.dumps(response_data, ensure_ascii=False))
+                )
+                self._puts_since_prune += 1
+                if self._puts_since_prune >= PRUNE_INTERVAL or entry[0] >= self._pruned_at + self.ttl:
+                    self._prune(entry[0])
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache():
+    """프로세스 공유 검색 캐시 반환 (SEARCH_CACHE_PATH 설정 시 디스크 영속화)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SearchCache(
+                max_entries=int(config.get_setting('SEARCH_CACHE_SIZE', DEFAULT_MAX_ENTRIES)),
+                ttl=float(config.get_setting('SEARCH_CACHE_TTL', DEFAULT_TTL)),
+                path=config.get_setting('SEARCH_CACHE_PATH'),
+                max_disk_entries=int(config.get_setting('SEARCH_CACHE_DISK_SIZE', DEFAULT_MAX_DISK_ENTRIES))
+            )
+        return _cache
@@ -0,0 +1,315 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from requests.adapters import HTTPAdapter
+
+import config
+import perf
+
+# -------------------------------
+# 프로세스 공유 구글 시트 클라이언트
+#    Streamlit 재실행/세션마다 인증하지 않고 프로세스당 1개만 유지
+#    gspread/oauth2client는 처음 시트에 접근할 때 import (시트를 쓰지 않는 실행은 import 비용 없음)
+# -------------------------------
+SCOPE = ['https://spreadsheets.google.com/feeds',
+         'https://www.googleapis.com/auth/drive']
+
+# 동시 평가자(20~30명) 요청을 커버할 커넥션 풀 크기
+POOL_MAXSIZE = 32
+
+# 클라이언트를 재생성해야 하는 인증 오류 상태코드
+AUTH_ERROR_STATUS = (401, 403)
+# 할당량 초과 상태코드
+QUOTA_ERROR_STATUS = 429
+
+# 시트 API 할당량 (사용자/서비스 계정당 분당 요청 수)과 한 번에 몰아서 보낼 수 있는 요청 수
+DEFAULT_QUOTA_PER_MINUTE = 60
+DEFAULT_BURST = 10
+# 토큰을 기다리는 최대 시간(초): 읽기는 짧게 기다린 뒤 마지막 스냅샷으로 대체, 쓰기는 백그라운드라 길게 대기
+DEFAULT_READ_WAIT = 3.0
+DEFAULT_WRITE_WAIT = 60.0
+# 429 응답 후 요청을 멈추는 시간(초, Retry-After가 없을 때)
+DEFAULT_QUOTA_COOLDOWN = 30.0
+
+_lock = threading.RLock()
+_client = None
+_worksheets = {}
+
+
+def _build_credentials():
+    """서비스 계정 자격 증명 생성 (로컬 credentials.json / Streamlit secrets)"""
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    if os.path.exists(config.GCP_CREDENTIALS_FILE):
+        return ServiceAccountCredentials.from_json_keyfile_name(config.GCP_CREDENTIALS_FILE, SCOPE)
+    return ServiceAccountCredentials.from_json_keyfile_dict(config.get_gcp_service_account(), SCOPE)
+
+
+def _build_client():
+    """
+    gspread 클라이언트 생성.
+    내부 AuthorizedSession이 토큰 만료 시 자동으로 갱신하므로
+    같은 세션(커넥션 풀)을 계속 재사용할 수 있다.
+    """
+    import gspread
+
+    client = gspread.authorize(_build_credentials())
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+    client.session.mount('https://', adapter)
+    return client
+
+
+def get_client():
+    """프로세스 공유 클라이언트 반환 (최초 호출 시에만 인증)"""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = _build_client()
+        return _client
+
+
+def set_client(client):
+    """
+    공유 클라이언트를 직접 지정 (open_by_key(sheet_id).sheet1을 제공하는 객체, 예: sheets_stub.StubClient).
+    실제 시트 없이 부하 테스트를 실행할 때 사용한다.
+    """
+    global _client
+    with _lock:
+        _client = client
+        _worksheets.clear()
+
+
+def get_worksheet(sheet_id):
+    """시트 ID별 첫 번째 워크시트 반환 (open_by_key 결과 재사용)"""
+    with _lock:
+        worksheet = _worksheets.get(sheet_id)
+        if worksheet is None:
+            worksheet = get_client().open_by_key(sheet_id).sheet1
+            _worksheets[sheet_id] = worksheet
+        return worksheet
+
+
+def reset():
+    """공유 클라이언트와 워크시트 캐시 폐기 (다음 호출 시 재인증)"""
+    global _client
+    with _lock:
+        _client = None
+        _worksheets.clear()
+
+
+def _is_auth_error(error):
+    import gspread
+    from google.auth.exceptions import RefreshError
+
+    if isinstance(error, RefreshError):
+        return True
+    if isinstance(error, gspread.exceptions.APIError):
+        return error.response.status_code in AUTH_ERROR_STATUS
+    return False
+
+
+# -------------------------------
+# 요청 스케줄러
+#    프로세스의 모든 시트 호출이 거치는 토큰 버킷(시트 할당량) + 쓰기 우선 + 같은 읽기 합치기(single-flight)
+# -------------------------------
+class QuotaExceededError(Exception):
+    """시트 할당량 초과 (토큰 대기 시간 초과 또는 429 응답)"""
+
+
+class RequestScheduler:
+    """
+    시트 요청 스케줄러 (스레드 안전).
+    분당 할당량만큼 토큰을 채우는 토큰 버킷으로 호출 속도를 제한하며,
+    쓰기 요청이 토큰을 기다리는 동안에는 읽기 요청이 토큰을 가져가지 않는다.
+    per_minute는 0보다 커야 하고 burst는 1 이상이어야 한다 (아니면 ValueError).
+    """
+
+    def __init__(self, per_minute=DEFAULT_QUOTA_PER_MINUTE, burst=DEFAULT_BURST,
+                 read_wait=DEFAULT_READ_WAIT, write_wait=DEFAULT_WRITE_WAIT, clock=time.monotonic):
+        if not per_minute > 0:
+            raise ValueError(f"시트 분당 요청 한도(SHEETS_QUOTA_PER_MINUTE)는 0보다 커야 합니다: {per_minute}")
+        if burst < 1:
+            raise ValueError(f"시트 요청 버스트(SHEETS_BURST)는 1 이상이어야 합니다: {burst}")
+        self.rate = per_minute / 60.0
+        self.capacity = burst
+        self.read_wait = read_wait
+        self.write_wait = write_wait
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._waiting_writes = 0
+        self._cond = threading.Condition()
+        self._inflight = {}  # {읽기 키: Future} (진행 중인 읽기)
+        self._inflight_lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, write=False):
+        """
+        요청 1건 분의 토큰 획득 (토큰이 없으면 대기).
+        읽기는 read_wait, 쓰기는 write_wait 안에 받지 못하면 QuotaExceededError.
+        """
+        deadline = self._clock() + (self.write_wait if write else self.read_wait)
+        throttled = False
+        with self._cond:
+            if write:
+                self._waiting_writes += 1
+            try:
+                while True:
+                    now = self._clock()
+                    self._refill(now)
+                    if now >= self._blocked_until and self._tokens >= 1 and (write or not self._waiting_writes):
+                        self._tokens -= 1
+                        return
+                    # 대기 시간 안에 할당량 초과 대기가 풀리지 않으면 바로 실패
+                    if now >= deadline or self._blocked_until >= deadline:
+                        perf.incr('sheets_quota_waits_exceeded')
+                        raise QuotaExceededError("구글 시트 요청 한도에 도달했습니다.")
+                    if not throttled:
+                        throttled = True
+                        perf.incr('sheets_throttled')
+                    if now >= self._blocked_until and self._tokens >= 1:
+                        # 쓰기 대기 중인 읽기: 쓰기가 토큰을 가져가면 깨어남
+                        wait = deadline - now
+                    else:
+                        # 다음 토큰이 찰 때까지
+                        wait = max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+                    self._cond.wait(min(wait, deadline - now))
+            finally:
+                if write:
+                    self._waiting_writes -= 1
+                    self._cond.notify_all()
+
+    def penalize(self, seconds):
+        """할당량 초과 응답을 받았을 때 seconds 동안 모든 요청을 멈춤"""
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+            self._tokens = 0.0
+
+    def single_flight(self, key, func):
+        """
+        같은 key의 요청이 진행 중이면 새로 호출하지 않고 그 결과(또는 예외)를 함께 받는다.
+        결과는 여러 호출자가 공유하므로 수정하면 안 된다.
+        """
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            perf.incr('sheets_coalesced')
+            return future.result()
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """프로세스 공유 시트 요청 스케줄러 (SHEETS_QUOTA_PER_MINUTE, SHEETS_BURST, SHEETS_READ_WAIT)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler(
+                per_minute=float(config.get_setting('SHEETS_QUOTA_PER_MINUTE', DEFAULT_QUOTA_PER_MINUTE)),
+                burst=int(config.get_setting('SHEETS_BURST', DEFAULT_BURST)),
+                read_wait=float(config.get_setting('SHEETS_READ_WAIT', DEFAULT_READ_WAIT))
+            )
+        return _scheduler
+
+
+def _quota_cooldown(error):
+    """429 응답이면 요청을 멈출 시간(초), 아니면 None"""
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) != QUOTA_ERROR_STATUS:
+        return None
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return DEFAULT_QUOTA_COOLDOWN
+
+
+def _call(sheet_id, func, write):
+    scheduler = get_scheduler()
+    scheduler.acquire(write)
+    perf.incr('sheets_calls')
+    try:
+        return func(get_worksheet(sheet_id))
+    except Exception as e:
+        cooldown = _quota_cooldown(e)
+        if cooldown is None:
+            raise
+        scheduler.penalize(cooldown)
+        perf.incr('sheets_quota_exceeded')
+        raise QuotaExceededError(f"구글 시트 요청 한도를 초과했습니다. ({e})") from e
+
+
+def run(sheet_id, func, write=False):
+    """
+    워크시트를 인자로 func를 실행 (호출마다 스케줄러 토큰 1개 사용, write=True면 우선 처리).
+    인증 오류가 발생하면 클라이언트를 재생성한 뒤 한 번 재시도한다.
+    할당량을 초과하면 QuotaExceededError.
+    """
+    with perf.timed('sheets'):
+        try:
+            return _call(sheet_id, func, write)
+        except QuotaExceededError:
+            raise
+        except Exception as e:
+            if not _is_auth_error(e):
+                raise
+            reset()
+            perf.incr('sheets_auth_retries')
+            return _call(sheet_id, func, write)
+
+
+def append_rows(sheet_id, rows):
+    """
+    여러 행을 한 번의 API 호출(values.append)로 시트 끝에 추가.
+    마지막 행 위치를 서버가 결정하므로 동시에 추가해도 행이 덮어써지지 않는다.
+    """
+    def append(sheet):
+        return sheet.append_rows(
+            rows,
+            value_input_option='USER_ENTERED',
+            insert_data_option='INSERT_ROWS',
+            table_range='A1'
+        )
+    return run(sheet_id, append, write=True)
+
+
+def read_rows(sheet_id, start_row, last_col='G'):
+    """
+    start_row(1부터 시작)부터 마지막 행까지 읽기.
+    시트 격자 범위를 넘는 위치를 요청하면 새 행이 없는 것으로 처리한다.
+    여러 세션이 같은 범위를 동시에 읽으면 한 번만 호출해 결과를 함께 사용한다 (반환값 수정 금지).
+    """
+    import gspread
+
+    def read(sheet):
+        return sheet.get_values(f"A{start_row}:{last_col}")
+
+    def read_or_empty():
+        try:
+            return run(sheet_id, read)
+        except gspread.exceptions.APIError as e:
+            if e.response.status_code == 400 and 'exceeds grid limits' in str(e):
+                return []
+            raise
+    return get_scheduler().single_flight((sheet_id, start_row, last_col), read_or_empty)
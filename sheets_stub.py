@@ -0,0 +1,105 @@
+"""
+구글 시트 로컬 스텁 (프로세스 내 가짜 시트 클라이언트).
+
+    import sheets, sheets_stub
+    client = sheets_stub.StubClient(latency=0.2, quota_per_minute=60)
+    sheets.set_client(client)
+
+sheets.py가 사용하는 워크시트 메서드(get_values, append_rows)만 흉내 내며, 행은 메모리에 보관한다.
+호출마다 latency(초)만큼 지연하고, 분당 요청 수가 quota_per_minute를 넘으면 실제 시트 API처럼
+429 응답 오류(Retry-After 포함)를 던진다. 실제 시트 없이 부하 테스트를 결정적으로 실행하기 위한 용도.
+"""
+import re
+import threading
+import time
+from collections import deque
+
+HEADER = ['타임스탬프', '사용자', '질문', '평가', '코멘트', '선택된 문서', '엔드포인트']
+
+_RANGE_START = re.compile(r'^[A-Z]+(\d+)')
+
+
+class StubResponse:
+    """오류 응답 (gspread APIError.response와 같은 status_code/headers 속성)"""
+
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class StubAPIError(Exception):
+    def __init__(self, status_code, message, headers=None):
+        super().__init__(f"{status_code}: {message}")
+        self.response = StubResponse(status_code, headers)
+
+
+class StubWorksheet:
+    """헤더 1행 + 피드백 행을 메모리에 보관하는 워크시트 (스레드 안전)"""
+
+    def __init__(self, client, rows=None):
+        self._client = client
+        self._lock = threading.Lock()
+        self._rows = [list(HEADER)] + [list(row) for row in rows or []]
+
+    def get_values(self, range_name):
+        """'A{start}:G' 형식 범위의 값 (start 이후 행이 없으면 빈 목록)"""
+        self._client.request('reads')
+        start = int(_RANGE_START.match(range_name).group(1))
+        with self._lock:
+            return [list(row) for row in self._rows[start - 1:]]
+
+    def append_rows(self, values, **kwargs):
+        self._client.request('writes')
+        with self._lock:
+            self._rows.extend(list(row) for row in values)
+        return {'updates': {'updatedRows': len(values)}}
+
+    def row_count(self):
+        with self._lock:
+            return len(self._rows)
+
+
+class _StubSpreadsheet:
+    def __init__(self, sheet1):
+        self.sheet1 = sheet1
+
+
+class StubClient:
+    """시트 ID별 워크시트 1개를 가진 가짜 클라이언트 (호출 지연, 분당 할당량, 호출 수 집계)"""
+
+    def __init__(self, latency=0.0, quota_per_minute=None, retry_after=5):
+        self.latency = latency
+        self.quota_per_minute = quota_per_minute
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._worksheets = {}
+        self._recent = deque()  # 최근 1분간 허용된 요청 시각
+        self.counts = {'reads': 0, 'writes': 0, 'rejected': 0}
+
+    def open_by_key(self, sheet_id):
+        with self._lock:
+            worksheet = self._worksheets.get(sheet_id)
+            if worksheet is None:
+                worksheet = self._worksheets[sheet_id] = StubWorksheet(self)
+            return _StubSpreadsheet(worksheet)
+
+    def seed(self, sheet_id, rows):
+        """시트에 기존 피드백 행 추가 (호출 수/할당량에 포함되지 않음)"""
+        worksheet = self.open_by_key(sheet_id).sheet1
+        with worksheet._lock:
+            worksheet._rows.extend(list(row) for row in rows)
+
+    def request(self, kind):
+        """할당량 확인 후 지연 (초과 시 429 오류)"""
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] >= 60:
+                self._recent.popleft()
+            if self.quota_per_minute is not None and len(self._recent) >= self.quota_per_minute:
+                self.counts['rejected'] += 1
+                raise StubAPIError(429, "Quota exceeded for quota metric 'Read requests'",
+                                   {'Retry-After': str(self.retry_after)})
+            self._recent.append(now)
+            self.counts[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
@@ -0,0 +1,294 @@
+"""
+피드백 저장소.
+
+    STORAGE_BACKEND=sheets  (기본) 구글 시트가 원본, 히스토리는 시트 공유 캐시에서 조회
+    STORAGE_BACKEND=sqlite  로컬 SQLite(STORAGE_PATH)가 원본, 구글 시트는 선택적 미러(SHEETS_EXPORT)
+
+저장 단위는 시트 한 행과 같은 7개 값 [timestamp, user_name, query, rating, comment, selected_documents, endpoint]이며,
+조회 결과는 history.parse_row와 같은 형식의 항목(최신순)이다.
+기존 시트 데이터를 SQLite로 옮길 때:
+
+    python storage.py import                 # 구글 시트에서
+    python storage.py import history.csv     # 시트를 CSV로 내려받은 파일에서
+"""
+import abc
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+
+import config
+import feedback_queue
+import history
+from parsing import parse_selected_doc
+
+BACKEND_SHEETS = 'sheets'
+BACKEND_SQLITE = 'sqlite'
+
+DEFAULT_STORAGE_PATH = os.path.join(os.path.dirname(__file__), 'feedback.db')
+
+# 시트 행의 선택 문서 구분자
+DOC_SEPARATOR = '; '
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    user_name TEXT NOT NULL,
+    query TEXT NOT NULL,
+    rating TEXT NOT NULL,
+    comment TEXT NOT NULL DEFAULT '',
+    endpoint TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_feedback_user_timestamp ON feedback (user_name, timestamp);
+CREATE INDEX IF NOT EXISTS idx_feedback_timestamp ON feedback (timestamp);
+CREATE INDEX IF NOT EXISTS idx_feedback_query ON feedback (query);
+
+CREATE TABLE IF NOT EXISTS selected_document (
+    feedback_id INTEGER NOT NULL REFERENCES feedback (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    dataset TEXT,
+    chapter TEXT,
+    article TEXT,
+    title TEXT,
+    score REAL,
+    rank INTEGER,
+    total INTEGER,
+    PRIMARY KEY (feedback_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_selected_document_doc ON selected_document (dataset, chapter, article);
+"""
+
+
+def split_documents(value):
+    """시트 행의 선택 문서 문자열을 문서 목록으로 분리"""
+    return [doc.strip() for doc in value.split(';') if doc.strip()] if value else []
+
+
+class FeedbackStore(abc.ABC):
+    """
+    피드백 저장소 인터페이스 (save, history는 구현 필수).
+    save(rows)는 시트 전송 현황 조회용 스풀 ID 목록을 반환한다(시트로 보내지 않으면 빈 목록).
+    """
+
+    @abc.abstractmethod
+    def save(self, rows):
+        """행 목록 저장"""
+
+    @abc.abstractmethod
+    def history(self, user_name=None):
+        """저장된 히스토리 (최신순), user_name 지정 시 해당 사용자만"""
+
+    def pending(self, user_name):
+        """저장은 되었지만 아직 history()에 보이지 않는 항목 (최신순)"""
+        return []
+
+    def is_stale(self):
+        """직전 history()가 원본 대신 마지막으로 읽은 스냅샷을 반환했는지 여부 (시트 할당량 초과)"""
+        return False
+
+    def updates(self, cursor=None):
+        """
+        cursor 이후 추가된 항목과 다음 조회에 쓸 cursor 반환 (증분 색인용).
+        기본 구현은 전체 히스토리를 반환한다(변경이 없으면 같은 목록 객체).
+        """
+        return self.history(), None
+
+
+class SheetsStore(FeedbackStore):
+    """구글 시트가 원본인 저장소 (쓰기는 스풀을 거쳐 백그라운드 전송, 읽기는 공유 캐시)"""
+
+    def __init__(self, sheet_id):
+        self.sheet_id = sheet_id
+
+    def save(self, rows):
+        return feedback_queue.get_feedback_queue().enqueue(rows)
+
+    def history(self, user_name=None):
+        cache = history.get_history_cache(self.sheet_id)
+        if user_name:
+            return cache.for_user(user_name)
+        return cache.entries()
+
+    def is_stale(self):
+        return history.get_history_cache(self.sheet_id).stale
+
+    def updates(self, cursor=None):
+        return history.get_history_cache(self.sheet_id).updates(cursor)
+
+    def pending(self, user_name):
+        rows = feedback_queue.get_feedback_queue().pending_rows(user_name)
+        return [item for item in (history.parse_row(row) for row in rows) if item]
+
+
+class SQLiteStore(FeedbackStore):
+    """
+    로컬 SQLite 저장소 (스레드 안전).
+    export=True면 저장한 행을 스풀에 함께 넣어 구글 시트로 미러링한다.
+    """
+
+    def __init__(self, path, export=False):
+        self.path = path
+        self.export = export
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        self._conn.executescript(_SCHEMA)
+        # endpoint 컬럼이 없던 기존 파일 마이그레이션
+        columns = [row[1] for row in self._conn.execute('PRAGMA table_info(feedback)')]
+        if 'endpoint' not in columns:
+            self._conn.execute("ALTER TABLE feedback ADD COLUMN endpoint TEXT NOT NULL DEFAULT ''")
+
+    def insert_rows(self, rows):
+        """시트 형식 행 목록을 한 트랜잭션으로 저장하고 feedback ID 목록 반환"""
+        ids = []
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                for row in rows:
+                    row = list(row) + [''] * (history.NUM_COLUMNS - len(row))
+                    cursor = self._conn.execute(
+                        'INSERT INTO feedback (timestamp, user_name, query, rating, comment, endpoint) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        row[:5] + row[6:7]
+                    )
+                    feedback_id = cursor.lastrowid
+                    docs = []
+                    for position, text in enumerate(split_documents(row[5])):
+                        doc = parse_selected_doc(text) or {}
+                        docs.append((
+                            feedback_id, position, text, doc.get('dataset'), doc.get('chapter'), doc.get('article'),
+                            doc.get('title'), doc.get('score'), doc.get('rank'), doc.get('total')
+                        ))
+                    self._conn.executemany('INSERT INTO selected_document VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', docs)
+                    ids.append(feedback_id)
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return ids
+
+    def save(self, rows):
+        self.insert_rows(rows)
+        if self.export:
+            return feedback_queue.get_feedback_queue().enqueue(rows)
+        return []
+
+    def _entries(self, where='', params=()):
+        with self._lock:
+            feedback = self._conn.execute(
+                f'SELECT id, timestamp, user_name, query, rating, comment, endpoint FROM feedback {where} '
+                'ORDER BY timestamp DESC, id DESC',
+                params
+            ).fetchall()
+            if not feedback:
+                return []
+            docs = {}
+            ids = [row[0] for row in feedback]
+            # SQLite 변수 개수 제한을 넘지 않도록 나눠서 조회
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                for feedback_id, text in self._conn.execute(
+                    f'SELECT feedback_id, text FROM selected_document '
+                    f'WHERE feedback_id IN ({",".join("?" * len(chunk))}) ORDER BY feedback_id, position',
+                    chunk
+                ):
+                    docs.setdefault(feedback_id, []).append(text)
+        return [
+            {
+                'timestamp': timestamp,
+                'user_name': user_name,
+                'query': query,
+                'rating': rating,
+                'comment': comment,
+                'selected_documents': docs.get(feedback_id, []),
+                'endpoint': endpoint
+            }
+            for feedback_id, timestamp, user_name, query, rating, comment, endpoint in feedback
+        ]
+
+    def history(self, user_name=None):
+        if user_name:
+            return self._entries('WHERE user_name = ?', (user_name,))
+        return self._entries()
+
+    def updates(self, cursor=None):
+        with self._lock:
+            last_id = self._conn.execute('SELECT MAX(id) FROM feedback').fetchone()[0] or 0
+        if cursor is not None and last_id <= cursor:
+            return [], cursor
+        return self._entries('WHERE id > ? AND id <= ?', (cursor or 0, last_id)), last_id
+
+    def for_query(self, query):
+        """같은 질문(정확히 일치)의 평가 목록 (최신순)"""
+        return self._entries('WHERE query = ?', (query,))
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM feedback').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_backend():
+    return config.get_setting('STORAGE_BACKEND', BACKEND_SHEETS)
+
+
+def get_store():
+    """설정(STORAGE_BACKEND)에 따른 프로세스 공유 피드백 저장소 반환"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            backend = get_backend()
+            if backend == BACKEND_SQLITE:
+                export = config.get_setting('SHEETS_EXPORT', 'true' if config.GOOGLE_SHEET_ID else 'false')
+                _store = SQLiteStore(
+                    config.get_setting('STORAGE_PATH', DEFAULT_STORAGE_PATH),
+                    export=str(export).lower() == 'true'
+                )
+            elif backend == BACKEND_SHEETS:
+                _store = SheetsStore(config.GOOGLE_SHEET_ID)
+            else:
+                raise ValueError(f"지원하지 않는 STORAGE_BACKEND: {backend}")
+        return _store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="피드백 저장소 관리")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    import_parser = subparsers.add_parser('import', help="기존 시트 데이터를 SQLite 저장소로 가져오기")
+    import_parser.add_argument('csv', nargs='?', help="시트를 CSV로 내려받은 파일 (기본: 구글 시트에서 로드)")
+    import_parser.add_argument('--path', default=config.get_setting('STORAGE_PATH', DEFAULT_STORAGE_PATH))
+    args = parser.parse_args(argv)
+
+    if args.csv:
+        entries = history.load_history_file(args.csv)
+    else:
+        entries = history.get_history_cache(config.GOOGLE_SHEET_ID).entries()
+    store = SQLiteStore(args.path)
+    if store.count():
+        print(f"{args.path}에 이미 {store.count()}건이 있어 가져오지 않았습니다.", file=sys.stderr)
+        return 1
+    # 오래된 순서로 저장
+    rows = [
+        [e['timestamp'], e['user_name'], e['query'], e['rating'], e['comment'],
+         DOC_SEPARATOR.join(doc.strip() for doc in e['selected_documents']), e['endpoint']]
+        for e in reversed(entries)
+    ]
+    store.insert_rows(rows)
+    print(f"{len(rows)}건을 {args.path}에 저장했습니다.", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""
+순위 회귀 벤치마크 게이트 (fixtures/sample_history.csv + fixtures/miso_recordings.jsonl).
+기록 응답은 샘플 히스토리에 저장된 순위와 같아야 하며, 순위가 바뀐 기록으로는 게이트가 실패해야 한다.
+"""
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import benchmark
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY = os.path.join(ROOT, 'fixtures', 'sample_history.csv')
+RECORDINGS = os.path.join(ROOT, 'fixtures', 'miso_recordings.jsonl')
+
+
+def run_gate(recordings):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        code = benchmark.main(['--history', HISTORY, '--stub', recordings, '--fail-on-regression', '-c', '1'])
+    return code, output.getvalue()
+
+
+class BenchmarkGateTest(unittest.TestCase):
+    def test_recordings_match_sample_history(self):
+        code, output = run_gate(RECORDINGS)
+        self.assertEqual(code, 0, output)
+        self.assertIn("유지 4", output)
+
+    def test_rank_regression_fails(self):
+        with open(RECORDINGS, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        # 첫 질문의 FAQ 결과 순서를 뒤집어 관련 문서(FAQ 12)를 3위 → 4위로 떨어뜨림
+        outputs = records[0]['response']['data']['outputs']
+        outputs['output3'].reverse()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'recordings.jsonl')
+            with open(path, 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            code, output = run_gate(path)
+        self.assertEqual(code, 1, output)
+        self.assertIn("하락 1", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
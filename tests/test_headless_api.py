@@ -0,0 +1,64 @@
+"""
+헤드리스 평가 API(headless_api) 요청 본문 검증 테스트.
+문자열이 아닌 필드나 형식이 다른 selected_documents는 검색/저장 전에 400으로 거절해야 한다.
+"""
+import http.client
+import json
+import unittest
+
+import headless_api
+
+VALID_FEEDBACK = {
+    'user_name': 'tester',
+    'query': '연차휴가는 며칠인가요?',
+    'rating': 'A',
+    'comment': '',
+    'selected_documents': [['취업규칙.pdf', '제5장', '제32조']],
+}
+
+
+class RequestValidationTest(unittest.TestCase):
+    def assert_bad_request(self, handler, body):
+        with self.assertRaises(headless_api.ApiError) as context:
+            handler(body)
+        self.assertEqual(context.exception.status, 400)
+        return context.exception.errors
+
+    def test_search_fields_must_be_strings(self):
+        for body in ({'query': 123}, {'query': '질문', 'user_name': []},
+                     {'query': '질문', 'position': 1}, {'query': '질문', 'company': {}}):
+            with self.subTest(body=body):
+                self.assert_bad_request(headless_api.handle_search, body)
+
+    def test_search_requires_query(self):
+        self.assertEqual(self.assert_bad_request(headless_api.handle_search, {'query': '  '}), ["질문을 입력해주세요."])
+
+    def test_feedback_fields_must_be_strings(self):
+        for name, value in (('query', 123), ('user_name', []), ('comment', 5), ('rating', ['A'])):
+            with self.subTest(field=name):
+                self.assert_bad_request(headless_api.handle_feedback, dict(VALID_FEEDBACK, **{name: value}))
+
+    def test_selected_documents_shape(self):
+        for value in (['abc'], 'abc', [['a', 'b']], [['a', 'b', 'c', 'd']], [['a', 'b', 3]], {'a': 1}):
+            with self.subTest(selected_documents=value):
+                errors = self.assert_bad_request(headless_api.handle_feedback,
+                                                 dict(VALID_FEEDBACK, selected_documents=value))
+                self.assertIn("selected_documents", errors[0])
+
+
+class ServerTest(unittest.TestCase):
+    def test_invalid_field_is_400_not_500(self):
+        with headless_api.HeadlessServer(port=0) as server:
+            host, port = server._server.server_address[:2]
+            conn = http.client.HTTPConnection(host, port, timeout=5)
+            conn.request('POST', '/search', body=json.dumps({'query': 123}),
+                         headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            body = json.loads(response.read())
+            conn.close()
+        self.assertEqual(response.status, 400)
+        self.assertEqual(body['errors'], ["query은(는) 문자열이어야 합니다."])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+검색 API 클라이언트(miso_api.MisoClient) 서킷 브레이커 테스트.
+시험 요청(half-open)이 BaseException(Streamlit 재실행 예외, KeyboardInterrupt 등)으로 중단되어도
+브레이커가 half-open에 머물지 않고 reset_timeout 뒤 다시 요청을 허용해야 한다.
+"""
+import os
+import time
+import unittest
+
+import miso_api
+from miso_stub import StubServer, load_recordings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RECORDINGS = os.path.join(ROOT, 'fixtures', 'miso_recordings.jsonl')
+QUERY = '연차휴가는 며칠인가요?'
+RESET_TIMEOUT = 0.05
+
+
+class Interrupted(BaseException):
+    """Streamlit RerunException처럼 Exception이 아닌 중단 예외"""
+
+
+def interrupt(key, value):
+    raise Interrupted()
+
+
+class InterruptingLimiter:
+    def acquire(self):
+        raise Interrupted()
+
+
+class CircuitBreakerInterruptTest(unittest.TestCase):
+    def setUp(self):
+        self.stub = StubServer(load_recordings(RECORDINGS)).start()
+        self.breaker = miso_api.CircuitBreaker(failure_threshold=1, reset_timeout=RESET_TIMEOUT)
+        self.client = miso_api.MisoClient(self.stub.url, 'test', max_retries=0, breaker=self.breaker)
+        self.payload = miso_api.build_payload(QUERY, 'tester')
+        # 열린 상태에서 reset_timeout이 지나 다음 요청이 시험 요청이 되도록 함
+        self.breaker.record_failure()
+        time.sleep(RESET_TIMEOUT * 1.5)
+
+    def tearDown(self):
+        self.stub.stop()
+
+    def assert_recovers(self):
+        self.assertEqual(self.breaker.state, miso_api.CircuitBreaker.OPEN)
+        time.sleep(RESET_TIMEOUT * 1.5)
+        self.assertIsNotNone(self.client.search(self.payload))
+        self.assertEqual(self.breaker.state, miso_api.CircuitBreaker.CLOSED)
+
+    def test_stream_interrupted_by_on_output(self):
+        with self.assertRaises(Interrupted):
+            self.client.search_stream(self.payload, interrupt)
+        self.assert_recovers()
+
+    def test_search_interrupted(self):
+        self.client.limiter = InterruptingLimiter()
+        with self.assertRaises(Interrupted):
+            self.client.search(self.payload)
+        self.client.limiter = None
+        self.assert_recovers()
+
+    def test_allow_after_reset_timeout(self):
+        with self.assertRaises(Interrupted):
+            self.client.search_stream(self.payload, interrupt)
+        self.assertFalse(self.breaker.allow())
+        time.sleep(RESET_TIMEOUT * 1.5)
+        self.assertTrue(self.breaker.allow())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+검색 캐시(search_cache.SearchCache) 디스크 영속화 테스트.
+SQLite 파일도 메모리와 같은 TTL로 만료되고, 최대 행 수를 넘으면 오래된 행부터 정리되어야 한다.
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import search_cache
+
+
+def payload(n):
+    return {'query': f'질문 {n}', 'user': {'position': '매니저', 'company': 'GSPOGE'}}
+
+
+class DiskPruneTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'search_cache.db')
+        self.now = 1_000_000.0
+        patcher = mock.patch.object(search_cache.time, 'time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_cache(self, **kwargs):
+        cache = search_cache.SearchCache(path=self.path, **kwargs)
+        self.addCleanup(cache._conn.close)
+        return cache
+
+    def disk_rows(self, cache):
+        return cache._conn.execute('SELECT COUNT(*) FROM search_cache').fetchone()[0]
+
+    def test_disk_rows_capped(self):
+        cache = self.make_cache(max_entries=8, ttl=3600, max_disk_entries=10)
+        for n in range(search_cache.PRUNE_INTERVAL * 3):
+            self.now += 1
+            cache.put(payload(n), {'n': n})
+            self.assertLessEqual(self.disk_rows(cache), 10 + search_cache.PRUNE_INTERVAL)
+        # 정리 직후에는 최근 10건만 남음
+        self.assertEqual(self.disk_rows(cache), 10)
+        newest = search_cache.PRUNE_INTERVAL * 3 - 1
+        reopened = self.make_cache(max_entries=8, ttl=3600, max_disk_entries=10)
+        self.assertEqual(reopened.get(payload(newest)), {'n': newest})
+        self.assertIsNone(reopened.get(payload(0)))
+
+    def test_expired_rows_pruned_on_put(self):
+        cache = self.make_cache(ttl=60)
+        for n in range(5):
+            cache.put(payload(n), {'n': n})
+        self.assertEqual(self.disk_rows(cache), 5)
+        # TTL이 지난 뒤 저장하면 만료된 행이 함께 정리됨
+        self.now += 61
+        cache.put(payload('new'), {'n': 'new'})
+        self.assertEqual(self.disk_rows(cache), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
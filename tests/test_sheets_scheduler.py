@@ -0,0 +1,113 @@
+"""
+시트 요청 스케줄러(sheets.RequestScheduler) 토큰 버킷 테스트.
+가짜 시계로 시간을 직접 움직이고, 대기 시간을 0으로 두어 토큰이 없으면 바로 QuotaExceededError가 나도록 한다.
+"""
+import threading
+import time
+import unittest
+
+import perf
+import sheets
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def make_scheduler(clock, per_minute=60, burst=3):
+    return sheets.RequestScheduler(per_minute=per_minute, burst=burst, read_wait=0, write_wait=0, clock=clock)
+
+
+class RequestSchedulerTest(unittest.TestCase):
+    def test_burst_then_quota_exceeded(self):
+        scheduler = make_scheduler(FakeClock())
+        for _ in range(3):
+            scheduler.acquire()
+        with self.assertRaises(sheets.QuotaExceededError):
+            scheduler.acquire()
+
+    def test_refill_at_quota_rate(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock, per_minute=30, burst=1)
+        scheduler.acquire()
+        # 분당 30회 = 2초에 토큰 1개
+        clock.advance(1.9)
+        with self.assertRaises(sheets.QuotaExceededError):
+            scheduler.acquire()
+        clock.advance(0.1)
+        scheduler.acquire()
+
+    def test_refill_capped_at_burst(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock, burst=2)
+        scheduler.acquire()
+        scheduler.acquire()
+        clock.advance(3600)
+        scheduler.acquire()
+        scheduler.acquire()
+        with self.assertRaises(sheets.QuotaExceededError):
+            scheduler.acquire(write=True)
+
+    def test_penalize_blocks_until_cooldown(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock)
+        scheduler.penalize(10)
+        clock.advance(9.9)
+        with self.assertRaises(sheets.QuotaExceededError):
+            scheduler.acquire(write=True)
+        clock.advance(0.1)
+        # 차단이 풀린 뒤에는 차단된 동안 채워진 토큰만 사용 (차단 시점에 토큰은 0)
+        scheduler.acquire()
+
+    def test_read_waiting_on_blocked_scheduler_fails_fast(self):
+        clock = FakeClock()
+        scheduler = sheets.RequestScheduler(per_minute=60, burst=3, read_wait=3.0, clock=clock)
+        scheduler.penalize(30)
+        # 대기 시간(3초) 안에 차단이 풀리지 않으므로 기다리지 않고 실패
+        with self.assertRaises(sheets.QuotaExceededError):
+            scheduler.acquire()
+
+    def test_invalid_settings(self):
+        for per_minute in (0, -1):
+            with self.assertRaises(ValueError):
+                sheets.RequestScheduler(per_minute=per_minute, clock=FakeClock())
+        with self.assertRaises(ValueError):
+            sheets.RequestScheduler(burst=0, clock=FakeClock())
+
+    def test_single_flight_shares_result(self):
+        scheduler = make_scheduler(FakeClock())
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return ['row']
+
+        results = []
+        coalesced = perf.snapshot()['counters'].get('sheets_coalesced', 0)
+        leader = threading.Thread(target=lambda: results.append(scheduler.single_flight('key', fetch)))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=lambda: results.append(scheduler.single_flight('key', fetch)))
+        follower.start()
+        # 후속 호출이 진행 중인 요청에 합류(sheets_coalesced 증가)할 때까지 대기
+        while perf.snapshot()['counters'].get('sheets_coalesced', 0) == coalesced and follower.is_alive():
+            time.sleep(0.001)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [['row'], ['row']])
+
+
+if __name__ == '__main__':
+    unittest.main()
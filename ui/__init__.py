@@ -0,0 +1,13 @@
+"""
+Streamlit 화면 구성 요소.
+
+app.py는 Streamlit이 상호작용마다 처음부터 다시 실행하므로 페이지 배치만 두고,
+화면 함수는 이 패키지(최초 1회만 import)에 둔다. 무거운 의존성(pandas, numpy, gspread 등)은
+해당 화면을 처음 그릴 때 import한다.
+    state     세션 상태 기본값/초기화
+    feedback  피드백 저장/제출, 이전 평가 재사용
+    results   검색 실행, 검색 결과/A/B 비교 표시
+    queue     평가 큐
+    sidebar   사용자 설정, 질문 히스토리
+    panels    유사 질문, 검색 품질 지표, 관리자 성능 패널
+"""
@@ -0,0 +1,228 @@
+from datetime import datetime
+
+import streamlit as st
+
+import config
+import eval_queue
+import feedback_queue
+import perf
+import storage
+from evaluation import RATINGS, build_feedback_row, validate_feedback
+from ui.state import clear_search_state
+
+# -------------------------------
+# 피드백 저장소
+# -------------------------------
+def get_store():
+    """설정(STORAGE_BACKEND)에 따른 피드백 저장소 반환 (설정 오류 시 None)"""
+    if storage.get_backend() == storage.BACKEND_SHEETS and not config.GOOGLE_SHEET_ID:
+        st.error("구글 시트 ID가 설정되지 않았습니다.")
+        return None
+    try:
+        return storage.get_store()
+    except Exception as e:
+        st.error(f"피드백 저장소 설정 중 오류 발생: {str(e)}")
+        return None
+
+@perf.timed('history_load')
+def load_query_history(user_name=None):
+    """
+    질문 히스토리를 로드 (최신순).
+    시트 저장소는 세션 간 공유 캐시를 사용하며, TTL이 지난 경우에만 시트에 새로 추가된 행을 읽는다.
+    SQLite 저장소는 인덱스로 바로 조회한다.
+    user_name을 지정하면 해당 사용자의 히스토리만 반환.
+    """
+    try:
+        store = get_store()
+        if store is None:
+            return []
+        return store.history(user_name)
+    except Exception as e:
+        st.error(f"질문 히스토리 로드 중 오류 발생: {str(e)}")
+        return []
+
+def load_pending_history(user_name):
+    """저장되었지만 아직 히스토리에 반영되지 않은(시트 전송 대기) 사용자 피드백 반환"""
+    try:
+        store = get_store()
+        if store is None:
+            return []
+        pending = store.pending(user_name)
+        for item in pending:
+            item['pending'] = True
+        return pending
+    except Exception as e:
+        st.error(f"전송 대기 피드백 조회 중 오류 발생: {str(e)}")
+        return []
+
+# -------------------------------
+# 피드백을 구글 시트에 저장 (시트 행 구성/검증은 evaluation.py)
+# -------------------------------
+@perf.timed('feedback_save')
+def save_feedback_to_sheet(feedback_records):
+    """
+    피드백(사용자 평가)을 저장소에 저장.
+    feedback_records는 피드백 1건(dict) 또는 여러 건의 리스트이며,
+    구글 시트 전송(원본 또는 미러)은 로컬 스풀에 기록한 뒤 백그라운드 워커가 일괄 처리한다.
+    성공 시 시트 전송 스풀 항목 ID 목록(시트로 보내지 않으면 빈 목록), 실패 시 None 반환.
+    """
+    try:
+        store = get_store()
+        if store is None:
+            return None
+
+        if isinstance(feedback_records, dict):
+            feedback_records = [feedback_records]
+        rows = [build_feedback_row(feedback_data) for feedback_data in feedback_records]
+        return store.save(rows)
+    except Exception as e:
+        st.error(f"피드백 저장 중 오류 발생: {str(e)}")
+        return None
+
+# -------------------------------
+# 피드백 제출 처리
+# -------------------------------
+def show_feedback_notice():
+    """직전 실행에서 제출한 피드백의 저장 안내 메시지 표시"""
+    if not st.session_state.feedback_notice:
+        return
+    st.session_state.feedback_notice = False
+    st.success("피드백이 성공적으로 저장되었습니다. 감사합니다!")
+    st.markdown(
+        """
+        <div style='background-color: #e8f4ff; padding: 1rem; border-radius: 0.25rem; margin: 1rem 0;'>
+            <p style='margin: 0; color: #0066cc;'>📊 피드백 결과는
+            <a href='https://docs.google.com/spreadsheets/d/1M264J2XJLEaYjZNZLEhvaBgA_TZtzabnnumw-8QbF_8/edit?usp=sharing'
+            target='_blank'>구글 시트</a>에서 확인하실 수 있습니다. (시트 반영까지 몇 초 걸릴 수 있습니다)</p>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+def pending_feedback_count():
+    """이 세션에서 제출한 피드백 중 아직 시트로 전송되지 않은 건수"""
+    if not st.session_state.submitted_feedback_ids:
+        return 0
+    statuses = feedback_queue.get_feedback_queue().status(st.session_state.submitted_feedback_ids).values()
+    return sum(1 for status in statuses if status == feedback_queue.PENDING)
+
+def show_feedback_queue_status(pending):
+    """이 세션에서 제출한 피드백의 전송 대기/완료 현황 표시 (pending: pending_feedback_count())"""
+    if not st.session_state.submitted_feedback_ids:
+        return
+    flushed = len(st.session_state.submitted_feedback_ids) - pending
+    st.caption(f"피드백 전송 현황: 시트 반영 완료 {flushed}건 · 전송 대기 {pending}건")
+    queue = feedback_queue.get_feedback_queue()
+    if pending and queue.last_error:
+        st.warning(f"구글 시트 전송이 지연되고 있습니다. 자동으로 재시도합니다. ({queue.last_error})")
+
+def show_feedback_form():
+    """평가/코멘트 입력란과 제출 버튼 표시 (제출 버튼을 누르면 True)"""
+    st.markdown(
+        """
+        <div style='background-color: #e8f4ff; padding: 1rem; border-radius: 0.25rem; margin-bottom: 1rem;'>
+            <p style='margin: 0; color: #0066cc;'>3. 평가 및 코멘트를 입력 후 피드백 제출 버튼을 눌러주세요.</p>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        st.session_state.feedback_rating = st.radio(
+            "검색 결과 품질 평가",
+            list(RATINGS),
+            index=None,
+            horizontal=True
+        )
+    with col2:
+        st.session_state.feedback_comment = st.text_area(
+            "추가 코멘트 (선택사항)",
+            value=st.session_state.feedback_comment,
+            height=100
+        )
+    return st.button("피드백 제출", type="secondary")
+
+def submit_feedback(user_name, feedback_data):
+    """
+    사용자가 제출한 피드백을 처리:
+    1) 유효성 검사
+    2) 로컬 스풀 저장 (구글 시트 전송은 백그라운드)
+    3) 상태 초기화 후 즉시 리프레시
+    feedback_data는 피드백 1건(dict) 또는 A/B 비교 모드의 엔드포인트별 피드백 목록(평가/선택 문서 공통)이다.
+    """
+    records = feedback_data if isinstance(feedback_data, list) else [feedback_data]
+    feedback_data = records[0]
+
+    # 유효성 검사 (헤드리스 API와 공통)
+    errors = validate_feedback(user_name, feedback_data)
+    if errors:
+        for err in errors:
+            st.error(err)
+        return False
+
+    st.session_state.is_submitting = True
+    try:
+        with st.spinner("피드백을 저장하는 중..."):
+            feedback_ids = save_feedback_to_sheet(records)
+        if feedback_ids is not None:
+            st.session_state.submitted_feedback_ids.extend(feedback_ids)
+            # 평가 큐 질문이었다면 완료 처리 (리프레시 후 다음 질문 표시)
+            if st.session_state.queue_item_id is not None:
+                eval_queue.get_eval_queue().mark(st.session_state.queue_item_id, eval_queue.DONE)
+            # 리프레시 후 저장 안내 메시지 표시, 사이드바 히스토리/유사 질문은 다시 조회
+            st.session_state.feedback_notice = True
+            invalidate_history()
+
+            # 피드백 저장 후 상태 초기화
+            clear_search_state()
+            st.session_state.feedback_rating = None
+            st.session_state.feedback_comment = ""
+            st.session_state.last_search_time = None
+
+            st.experimental_rerun()
+            return True
+        else:
+            st.error("피드백 저장에 실패했습니다. 다시 시도해주세요.")
+            return False
+    finally:
+        st.session_state.is_submitting = False
+
+def invalidate_history():
+    """세션에 보관한 질문 히스토리/유사 질문 조회 결과 폐기 (다음 실행에서 다시 조회)"""
+    st.session_state.history_memo = None
+    st.session_state.near_dup_memo = None
+
+# -------------------------------
+# 이전 평가 재사용
+# -------------------------------
+def reuse_judgment(query, entry):
+    """
+    이전 평가(평가/선택 문서)를 현재 질문에 대한 새 피드백으로 저장 (버튼 콜백, 검색 API 호출 없음).
+    선택 문서의 관련도/순위는 이전 평가 당시 값 그대로 기록된다.
+    """
+    user_name = st.session_state.user_name
+    if not user_name:
+        st.session_state.reuse_error = "사용자 이름을 입력해주세요."
+        return
+    row = [
+        datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        user_name,
+        query,
+        entry['rating'],
+        f"이전 평가 재사용 ({entry['timestamp']} {entry['user_name']})",
+        '; '.join(doc.strip() for doc in entry['selected_documents'] if doc.strip()),
+        entry.get('endpoint', '')
+    ]
+    store = get_store()
+    if store is None:
+        return
+    try:
+        feedback_ids = store.save([row])
+    except Exception as e:
+        st.session_state.reuse_error = f"피드백 저장 중 오류 발생: {str(e)}"
+        return
+    st.session_state.submitted_feedback_ids.extend(feedback_ids)
+    st.session_state.feedback_notice = True
+    invalidate_history()
+    perf.incr('reused_judgments')
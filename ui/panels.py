@@ -0,0 +1,125 @@
+import hmac
+
+import streamlit as st
+
+import config
+import perf
+import storage
+from ui.feedback import reuse_judgment
+
+# -------------------------------
+# 유사 질문
+# -------------------------------
+def find_near_duplicates(query):
+    """
+    유사 질문 조회 결과.
+    인덱스 동기화(저장소 증분 조회)와 조회는 입력한 질문이 바뀌었을 때만 하고,
+    같은 질문으로 재실행되면 세션에 보관한 결과를 사용한다 (피드백 제출 시 폐기).
+    """
+    memo = st.session_state.near_dup_memo
+    if memo is not None and memo[0] == query:
+        return memo[1]
+    import near_dup
+
+    with perf.timed('near_dup'):
+        matches = near_dup.get_near_dup_index().lookup(query)
+    st.session_state.near_dup_memo = (query, matches)
+    return matches
+
+def show_near_duplicates(query):
+    """입력한 질문과 비슷한 이전 질문의 평가를 보여주고, 검색 없이 이전 평가를 재사용할 수 있게 함"""
+    if st.session_state.get("reuse_error"):
+        st.error(st.session_state.pop("reuse_error"))
+    try:
+        matches = find_near_duplicates(query)
+    except Exception as e:
+        st.error(f"유사 질문 조회 중 오류 발생: {str(e)}")
+        return
+    if not matches:
+        return
+    with st.expander(f"🔁 비슷한 이전 질문 {len(matches)}건이 있습니다. 이전 평가를 확인하면 검색 없이 저장됩니다.", expanded=True):
+        for m, match in enumerate(matches):
+            judgments = match['judgments']
+            st.markdown(f"**{match['query']}** (유사도 {match['similarity']:.0%}, 평가 {len(judgments)}건)")
+            for entry in judgments[:3]:
+                docs = [doc.strip() for doc in entry['selected_documents'] if doc.strip()]
+                st.caption(f"{entry['timestamp']} · {entry['user_name']} · 평가 {entry['rating']} · 선택 문서 {len(docs)}건")
+                if docs:
+                    st.markdown("\n".join(f"- {doc}" for doc in docs))
+            st.button("최근 평가가 맞습니다 (재사용)", key=f"reuse_judgment_{m}",
+                      on_click=reuse_judgment, args=(query, judgments[0]))
+
+# -------------------------------
+# 검색 품질 지표
+# -------------------------------
+@st.cache_data(ttl=60, show_spinner=False)
+def load_quality_report(k_values):
+    """전체 히스토리 기반 검색 품질 지표 (세션 간 공유, 60초 캐시)"""
+    import metrics
+
+    entries = storage.get_store().history()
+    return metrics.quality_report(entries, k_values)
+
+def show_quality_metrics():
+    """데이터셋별 Recall@k / MRR / nDCG@k / Hit@k, 응답 내 위치 분포, 평가 분포 표시"""
+    import metrics
+
+    try:
+        report = load_quality_report(metrics.DEFAULT_K_VALUES)
+    except Exception as e:
+        st.error(f"검색 품질 지표 계산 중 오류 발생: {str(e)}")
+        return
+    st.markdown("평가자가 선택한 문서를 관련 문서로 보고, 저장된 순위(응답 전체 목록 안의 위치, 데이터셋별 순위 아님)로 계산한 지표입니다. "
+                "(일반 검색 평가 기준, A/B 비교 평가 제외)")
+    st.dataframe(report['metrics'].style.format(precision=4), use_container_width=True)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**관련 문서의 응답 내 위치 분포**")
+        st.dataframe(report['rank_distribution'], use_container_width=True)
+    with col2:
+        st.markdown("**평가 분포**")
+        st.dataframe(report['ratings'], use_container_width=True)
+
+# -------------------------------
+# 관리자 성능 패널
+# -------------------------------
+def is_admin():
+    """관리자 패널 표시 여부 (URL에 ?admin=<ADMIN_TOKEN>, ADMIN_TOKEN이 설정되지 않았으면 표시하지 않음)"""
+    token = config.get_setting('ADMIN_TOKEN')
+    if not token:
+        return False
+    given = st.query_params.get("admin", "")
+    return hmac.compare_digest(given.encode('utf-8'), str(token).encode('utf-8'))
+
+def show_perf_panel():
+    """단계별 소요 시간(p50/p95/p99, ms)과 호출 카운터, 내보내기 버튼 표시 (프로세스 전체 기준)"""
+    snap = perf.snapshot()
+    st.subheader("⏱️ 성능 계측")
+    if snap['stages']:
+        st.dataframe(
+            {
+                "단계": list(snap['stages']),
+                "횟수": [s['count'] for s in snap['stages'].values()],
+                **{f"p{q}(ms)": [round(s[f'p{q}'] * 1000, 1) for s in snap['stages'].values()]
+                   for q in perf.PERCENTILES}
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+    else:
+        st.caption("아직 계측된 단계가 없습니다.")
+    st.dataframe(
+        {"카운터": list(snap['counters']), "값": list(snap['counters'].values())},
+        hide_index=True,
+        use_container_width=True
+    )
+    st.caption("parse는 검색 직후 1회만 기록됩니다. api_calls는 재시도/헤지 요청을 포함합니다.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("Prometheus", perf.to_prometheus(snap), file_name="metrics.prom", mime="text/plain")
+    with col2:
+        st.download_button("JSON Lines", perf.to_json_lines(snap), file_name="metrics.jsonl",
+                           mime="application/x-ndjson")
+    if st.button("계측 초기화"):
+        perf.reset()
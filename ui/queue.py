@@ -0,0 +1,53 @@
+import streamlit as st
+
+import eval_queue
+import miso_api
+from ui.state import clear_search_state
+
+# -------------------------------
+# 평가 큐
+# -------------------------------
+def assign_eval_queue(user_name):
+    """업로드한 질문 목록을 사용자의 평가 큐로 배정 (버튼 콜백)"""
+    uploaded = st.session_state.eval_queue_upload
+    try:
+        queries = eval_queue.parse_queries(uploaded.getvalue().decode("utf-8-sig"), uploaded.name.endswith(".jsonl"))
+    except Exception as e:
+        st.session_state.eval_queue_error = f"질문 목록을 읽는 중 오류 발생: {str(e)}"
+        return
+    eval_queue.get_eval_queue().assign(user_name, queries)
+    st.session_state.queue_item_id = None
+
+def clear_eval_queue(user_name):
+    """사용자의 평가 큐 비우기 (버튼 콜백)"""
+    eval_queue.get_eval_queue().clear(user_name)
+    st.session_state.queue_item_id = None
+
+def show_eval_queue_sidebar(user_name):
+    """평가 큐: 질문 목록 불러오기와 진행 현황"""
+    progress = eval_queue.get_eval_queue().progress(user_name)
+    if progress['total']:
+        finished = progress['done'] + progress['skipped']
+        st.progress(finished / progress['total'],
+                    text=f"평가 진행 {finished}/{progress['total']} (건너뜀 {progress['skipped']})")
+        st.button("평가 큐 비우기", on_click=clear_eval_queue, args=(user_name,))
+
+    uploaded = st.file_uploader("질문 목록 불러오기 (.txt / .jsonl)", type=["txt", "jsonl"], key="eval_queue_upload",
+                                help="한 줄에 질문 하나(.txt) 또는 {\"query\": ...} 형식(.jsonl)")
+    if uploaded is not None:
+        st.button("평가 큐에 배정", help="기존 평가 큐는 새 목록으로 교체됩니다.",
+                  on_click=assign_eval_queue, args=(user_name,))
+    if st.session_state.get("eval_queue_error"):
+        st.error(st.session_state.pop("eval_queue_error"))
+    return progress
+
+def prefetch_next_queries(user_name, position, company):
+    """평가 큐의 다음 질문을 백그라운드에서 미리 검색 (검색 캐시에 저장)"""
+    queue = eval_queue.get_eval_queue()
+    upcoming = queue.upcoming(user_name, queue.prefetch_depth + 1)[1:]
+    queue.prefetch([miso_api.build_payload(item['query'], user_name, position, company) for item in upcoming])
+
+def skip_queue_item(item_id):
+    """현재 평가 큐 질문을 건너뛰고 다음 질문으로 이동"""
+    eval_queue.get_eval_queue().mark(item_id, eval_queue.SKIPPED)
+    clear_search_state()
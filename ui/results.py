@@ -0,0 +1,318 @@
+import json
+
+import requests
+import streamlit as st
+
+import compare
+import evaluation
+import miso_api
+import perf
+import search_cache
+from parsing import OUTPUT_KEYS, parse_outputs
+from result_set import has_bit, iter_bits, set_bit
+from ui.feedback import show_feedback_form, submit_feedback
+
+# -------------------------------
+# 검색 결과 표시 (파싱은 parsing.py / result_set.py)
+# -------------------------------
+# 페이지당 문서 수 선택지
+PAGE_SIZE_OPTIONS = [10, 20, 50, 100]
+# 스트리밍 미리보기에 표시할 출력별 상위 문서 수
+STREAM_PREVIEW_SIZE = 5
+
+@perf.timed('render')
+def display_search_results(result_set):
+    """
+    검색 결과(ResultSet)를 화면에 표시하고,
+    체크박스로 문서를 선택할 수 있도록 구성.
+    데이터셋 그룹마다 현재 페이지의 문서만 렌더링하며,
+    선택 상태는 페이지와 관계없이 st.session_state.selected_bits(행 번호 비트셋)에 저장.
+    """
+    tab1, tab2 = st.tabs(["응답 내용", "전체 응답 데이터"])
+
+    with tab1:
+        if not len(result_set):
+            st.warning("응답에서 결과를 찾을 수 없습니다.")
+            return
+
+        # hyde_query(가상문서) 표시
+        hyde_query = result_set.hyde_query
+        if hyde_query:
+            with st.expander("🔍 변환된 검색 query (가상문서)", expanded=False):
+                st.markdown(
+                    """
+                    <div style='background-color: #f8f9fa; padding: 1rem; border-radius: 0.25rem; margin-bottom: 1rem;'>
+                        <p style='color: #666; margin: 0;'>이 쿼리는 답변과 상관없는 검색을 위한 가상문서입니다.</p>
+                    </div>
+                    """,
+                    unsafe_allow_html=True
+                )
+                st.markdown(
+                    f"""
+                    <div style='background-color: #f0f0f0; padding: 1rem; border-radius: 0.25rem;
+                        white-space: pre-wrap; word-wrap: break-word; overflow-wrap: break-word;
+                        font-family: monospace;'>
+                        {hyde_query}
+                    </div>
+                    """,
+                    unsafe_allow_html=True
+                )
+            st.divider()
+
+        # 문서 갯수 표시
+        st.markdown(f"총 {len(result_set)}개의 관련 문서를 찾았습니다.")
+        st.markdown(
+            """
+            <div style='background-color: #e8f4ff; padding: 1rem; border-radius: 0.25rem; margin-bottom: 1rem;'>
+                <p style='margin: 0; color: #0066cc;'>2. 질문과 관련된 문서를 선택해주세요.</p>
+            </div>
+            """,
+            unsafe_allow_html=True
+        )
+
+        # 페이지당 문서 수 (데이터셋 그룹마다 현재 페이지만 렌더링)
+        page_size = st.selectbox("페이지당 문서 수", PAGE_SIZE_OPTIONS, key="results_page_size")
+
+        # 데이터셋 그룹(점수순 행 번호 목록)별로 표시
+        for dataset_name, rows in zip(result_set.datasets, result_set.groups):
+            st.subheader(f"📚 {dataset_name}")
+
+            # 현재 페이지 범위 (새 검색마다 키가 바뀌어 1페이지부터 시작)
+            num_pages = (len(rows) + page_size - 1) // page_size
+            page = 1
+            if num_pages > 1:
+                page = st.number_input(
+                    f"페이지 (총 {num_pages}페이지, {len(rows)}건)",
+                    min_value=1,
+                    max_value=num_pages,
+                    value=1,
+                    key=f"result_page_{st.session_state.last_search_time}_{dataset_name}"
+                )
+            start = (page - 1) * page_size
+
+            for rank, idx in enumerate(rows[start:start + page_size], start=start + 1):
+                # 체크박스 키(행 번호 기반: "doc_checkbox_{idx}")
+                checkbox_key = f"doc_checkbox_{idx}"
+
+                # 다른 페이지로 이동했다 돌아와도 selected_bits 값으로 복원됨
+                default_val = has_bit(st.session_state.selected_bits, idx)
+
+                # 표시할 문서 제목 구성
+                score_text = f"(관련도: {result_set.scores[idx]:.4f}, 순위: {rank}/{len(rows)})"
+                title = result_set.titles[idx]
+                if result_set.is_faq(idx):
+                    # FAQ 형식
+                    display_title = f"📄 {result_set.faq_displays[idx]} {score_text}"
+                else:
+                    # 일반 문서
+                    if title:
+                        short_title = (title[:20] + "...") if len(title) > 20 else title
+                        display_title = f"📄 {result_set.chapters[idx]} - {result_set.articles[idx]} {short_title} {score_text}"
+                    else:
+                        display_title = f"📄 {result_set.chapters[idx]} - {result_set.articles[idx]} {score_text}"
+
+                # 체크박스
+                user_checked = st.checkbox(display_title, value=default_val, key=checkbox_key)
+
+                # 사용자가 체크/해제한 상태를 세션에 저장
+                st.session_state.selected_bits = set_bit(st.session_state.selected_bits, idx, user_checked)
+
+                # 문서 내용 보기 (펼쳤을 때만 본문 렌더링)
+                if st.toggle("문서 내용 보기", value=False, key=f"doc_body_{st.session_state.last_search_time}_{idx}"):
+                    st.markdown(
+                        f"""
+                        <div style='padding: 0.5rem; background-color: #f8f9fa; border-radius: 0.25rem;'>
+                            <p style='margin: 0;'>{result_set.contents[idx]}</p>
+                        </div>
+                        """,
+                        unsafe_allow_html=True
+                    )
+
+            st.divider()
+
+        # -------------------------------
+        # 피드백 섹션
+        # -------------------------------
+        if show_feedback_form():
+            # 선택된 행의 문서 키: (dataset, chapter, article)
+            # FAQ는 article이 ''일 수 있음
+            selected_docs = [result_set.key(idx) for idx in iter_bits(st.session_state.selected_bits)]
+
+            feedback_data = {
+                'user_name': st.session_state.user_name,
+                'query': st.session_state.current_query,
+                'rating': st.session_state.feedback_rating,
+                'comment': st.session_state.feedback_comment,
+                'selected_documents': selected_docs,
+                'all_results': result_set.results()  # 원본 순서의 파싱 결과
+            }
+            submit_feedback(st.session_state.user_name, feedback_data)
+
+    # 전체 JSON 응답 표시 (요청 시에만 압축 해제 후 렌더링)
+    with tab2:
+        if st.toggle("전체 응답 데이터 불러오기", value=False, key=f"show_raw_response_{st.session_state.last_search_time}"):
+            st.json(result_set.raw_response())
+
+# -------------------------------
+# A/B 비교
+# -------------------------------
+@st.cache_resource(show_spinner=False)
+def get_compare_endpoints():
+    """COMPARE_ENDPOINTS 설정 (프로세스당 1회만 파싱)"""
+    return compare.load_endpoints()
+
+def run_comparison(endpoints, payload):
+    """설정된 엔드포인트 모두에 동시에 검색 (대기 시간은 가장 느린 엔드포인트 기준)"""
+    with perf.timed('compare'):
+        return compare.fan_out(endpoints, payload)
+
+@perf.timed('render')
+def display_comparison(responses):
+    """
+    A/B 비교 결과 표시: 엔드포인트별 응답 시간, 문서별 순위/관련도 차이(첫 번째 엔드포인트 기준).
+    선택한 문서는 엔드포인트별 결과에 대해 각각 한 행씩 기록된다.
+    """
+    import pandas as pd
+
+    names = [response['name'] for response in responses]
+    cols = st.columns(len(responses))
+    for col, response in zip(cols, responses):
+        with col:
+            if 'error' in response:
+                st.metric(response['name'], "오류")
+                st.caption(response['error'])
+            else:
+                st.metric(response['name'], f"{response['latency'] * 1000:.0f} ms",
+                          help=f"문서 {len(response['result_set'])}건")
+    st.caption(
+        f"전체 대기 시간 {max(r['latency'] for r in responses) * 1000:.0f} ms "
+        f"(엔드포인트 {len(responses)}개 동시 호출, 순위는 원본 응답 순서 기준, Δ순위는 양수면 상승)"
+    )
+
+    rows = compare.compare_rows(responses)
+    if not rows:
+        st.warning("응답에서 결과를 찾을 수 없습니다.")
+        return
+
+    table = pd.DataFrame({
+        "선택": [has_bit(st.session_state.selected_bits, n) for n in range(len(rows))],
+        "문서": [" - ".join(part for part in row['key'] if part) for row in rows],
+    })
+    for n, name in enumerate(names):
+        table[f"{name} 순위"] = pd.array([row['ranks'][n] for row in rows], dtype="Int64")
+        table[f"{name} 관련도"] = [row['scores'][n] for row in rows]
+        if n:
+            table[f"Δ순위 ({name})"] = pd.array([row['rank_deltas'][n] for row in rows], dtype="Int64")
+            table[f"Δ관련도 ({name})"] = [row['score_deltas'][n] for row in rows]
+
+    st.markdown(
+        """
+        <div style='background-color: #e8f4ff; padding: 1rem; border-radius: 0.25rem; margin-bottom: 1rem;'>
+            <p style='margin: 0; color: #0066cc;'>2. 질문과 관련된 문서를 선택해주세요.</p>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+    edited = st.data_editor(
+        table,
+        disabled=[column for column in table.columns if column != "선택"],
+        hide_index=True,
+        use_container_width=True,
+        key=f"compare_editor_{st.session_state.last_search_time}"
+    )
+    # 선택 상태: 비교 표의 행 번호 비트셋
+    bits = 0
+    for n, checked in enumerate(edited["선택"]):
+        bits = set_bit(bits, n, bool(checked))
+    st.session_state.selected_bits = bits
+
+    if show_feedback_form():
+        selected_keys = [rows[n]['key'] for n in iter_bits(bits)]
+        records = []
+        for response in responses:
+            if 'result_set' not in response:
+                continue
+            records.append({
+                'user_name': st.session_state.user_name,
+                'query': st.session_state.current_query,
+                'rating': st.session_state.feedback_rating,
+                'comment': st.session_state.feedback_comment,
+                'selected_documents': selected_keys,
+                'all_results': response['result_set'].results(),
+                'endpoint': response['name']
+            })
+        if records:
+            submit_feedback(st.session_state.user_name, records)
+        else:
+            st.error("모든 엔드포인트 검색에 실패해 피드백을 저장할 수 없습니다.")
+
+# -------------------------------
+# 검색 API 호출
+# -------------------------------
+def render_partial_output(placeholder, key, value):
+    """스트리밍 중 도착한 워크플로 출력 1개를 미리보기로 표시"""
+    with placeholder.container():
+        if key == "hyde_query":
+            st.caption("🔍 변환된 검색 query (가상문서) 수신")
+            st.text(str(value)[:300])
+            return
+        results = parse_outputs(value if isinstance(value, list) else [value])
+        results.sort(key=lambda x: x.score, reverse=True)
+        st.caption(f"📥 {key}: {len(results)}건 수신")
+        st.markdown("\n".join(
+            f"- {r.dataset_name} · {r.faq_display if r.is_faq else f'{r.chapter} - {r.article}'} (관련도: {r.score:.4f})"
+            for r in results[:STREAM_PREVIEW_SIZE]
+        ))
+
+def run_search(payload, refresh=False, stream=False):
+    """
+    검색 API 호출. 같은 질문(정규화 기준)과 사용자 조건의 캐시가 있으면 재사용.
+    refresh=True면 캐시를 무시하고 다시 호출한 뒤 결과로 캐시를 갱신한다.
+    stream=True면 스트리밍 모드로 호출해 hyde_query / output1~3을 도착하는 대로 미리 보여주고,
+    스트리밍이 실패하면 일반(blocking) 모드로 다시 호출한다.
+    성공 시 응답 JSON, 실패 시 None 반환.
+    """
+    cache = search_cache.get_search_cache()
+    if not refresh:
+        cached = cache.get(payload)
+        if cached is not None:
+            st.caption("⚡ 캐시된 검색 결과입니다. 최신 결과가 필요하면 '캐시 무시하고 새로 검색'을 선택하세요.")
+            return cached
+
+    client = miso_api.get_client()
+    if stream:
+        placeholders = {key: st.empty() for key in OUTPUT_KEYS}
+        try:
+            with perf.timed('miso_api_stream'):
+                response_data = client.search_stream(
+                    payload,
+                    on_output=lambda key, value: render_partial_output(placeholders[key], key, value)
+                )
+            cache.put(payload, response_data)
+            return response_data
+        except miso_api.CircuitOpenError as e:
+            st.error(str(e))
+            return None
+        except Exception as e:
+            st.warning(f"스트리밍 응답 처리에 실패해 일반 모드로 다시 검색합니다. ({str(e)})")
+        finally:
+            # 미리보기는 전체 결과 표시로 대체
+            for placeholder in placeholders.values():
+                placeholder.empty()
+
+    try:
+        # 캐시는 위에서 확인했으므로 바로 호출 (결과는 캐시에 저장)
+        response_data, _ = evaluation.search(payload, refresh=True)
+    except json.JSONDecodeError as e:
+        st.error(f"JSON 파싱 오류: {str(e)}")
+        return None
+    except miso_api.CircuitOpenError as e:
+        st.error(str(e))
+        return None
+    except requests.HTTPError as e:
+        st.error(str(e))
+        return None
+    except Exception as e:
+        st.error(f"오류 발생: {str(e)}")
+        return None
+    return response_data
@@ -0,0 +1,147 @@
+import streamlit as st
+
+import miso_api
+import search_cache
+import sheets
+import storage
+from ui.feedback import (
+    get_store, invalidate_history, load_pending_history, load_query_history, pending_feedback_count, show_feedback_queue_status
+)
+from ui.queue import show_eval_queue_sidebar
+
+# -------------------------------
+# 구글 시트 연결
+# -------------------------------
+def setup_google_sheets():
+    """프로세스 공유 구글 시트 클라이언트 반환 (최초 1회만 인증)"""
+    try:
+        return sheets.get_client()
+    except Exception as e:
+        st.error(f"구글 시트 설정 중 오류 발생: {str(e)}")
+        return None
+
+# -------------------------------
+# 질문 히스토리
+# -------------------------------
+# 사이드바에 한 번에 표시할 히스토리 수 (재실행마다 그리는 항목 수 제한)
+HISTORY_PAGE_SIZE = 20
+
+def load_user_history(user_name, pending):
+    """
+    사이드바에 표시할 사용자 히스토리 (전송 대기 피드백을 앞에 표시).
+    사용자의 히스토리는 그 사용자가 피드백을 제출해야만 바뀌므로, 사용자/제출 건수/전송 대기 건수가
+    같으면 세션에 보관한 목록을 그대로 사용한다 (문서 선택 등 재실행마다 저장소를 조회하지 않음).
+    """
+    memo_key = (user_name, len(st.session_state.submitted_feedback_ids), pending)
+    memo = st.session_state.history_memo
+    if memo is not None and memo[0] == memo_key:
+        return memo[1]
+
+    # 공유 캐시에서 사용자 히스토리 로드 (사용자별 최신순 인덱스)
+    if storage.get_backend() == storage.BACKEND_SQLITE or setup_google_sheets():
+        st.session_state.query_history = load_query_history(user_name)
+    # 아직 시트로 전송되지 않은 피드백을 앞에 표시
+    user_history = load_pending_history(user_name) + st.session_state.query_history
+    # 시트 할당량 초과로 마지막 스냅샷을 받았으면 보관하지 않고 다음 실행에서 다시 조회
+    # (공유 캐시가 TTL 동안은 시트를 다시 읽지 않으므로 재실행마다 시트를 호출하지 않음)
+    if is_history_stale():
+        st.caption("⚠️ 구글 시트 요청 한도에 도달해 마지막으로 불러온 히스토리를 표시합니다. 잠시 후 자동으로 갱신됩니다.")
+    else:
+        st.session_state.history_memo = (memo_key, user_history)
+    return user_history
+
+def is_history_stale():
+    store = get_store()
+    return store is not None and store.is_stale()
+
+def show_history_item(item):
+    pending_mark = "⏳ " if item.get('pending') else ""
+    with st.expander(f"{pending_mark}질문: {item['query']}", expanded=False):
+        st.markdown(
+            f"""
+            <div style='background-color: #f8f9fa; padding: 0.5rem; border-radius: 0.25rem; margin-bottom: 0.5rem;'>
+                <p style='margin: 0;'><strong>평가:</strong> {item['rating']}</p>
+                <p style='margin: 0;'><strong>시간:</strong> {item['timestamp']}</p>
+            </div>
+            """,
+            unsafe_allow_html=True
+        )
+        if item.get('comment'):
+            st.markdown(
+                f"""
+                <div style='background-color: #f8f9fa; padding: 0.5rem; border-radius: 0.25rem;'>
+                    <p style='margin: 0;'><strong>코멘트:</strong> {item['comment']}</p>
+                </div>
+                """,
+                unsafe_allow_html=True
+            )
+        if 'selected_documents' in item:
+            st.markdown(
+                f"""
+                <div style='background-color: #f8f9fa; padding: 0.5rem; border-radius: 0.25rem;'>
+                    <p style='margin: 0;'><strong>선택된 문서:</strong></p>
+                    <ul style='margin: 0.5rem 0 0 1.5rem;'>
+                        {''.join([f"<li>{doc}</li>" for doc in item['selected_documents']])}
+                    </ul>
+                </div>
+                """,
+                unsafe_allow_html=True
+            )
+
+# -------------------------------
+# 사이드바
+# -------------------------------
+def show_sidebar():
+    """
+    사용자 설정, 평가 큐, 질문 히스토리 표시.
+    (직위, 회사, 평가 큐 진행 현황 또는 None) 반환.
+    """
+    progress = None
+    with st.sidebar:
+        st.header("사용자 설정")
+        st.session_state.user_name = st.text_input("이름", value=st.session_state.user_name)
+        user_position = miso_api.DEFAULT_POSITION
+        user_company = miso_api.DEFAULT_COMPANY
+
+        st.write("현재 사용자:", st.session_state.user_name)
+
+        cache_stats = search_cache.get_search_cache().stats()
+        st.caption(
+            f"검색 캐시: 적중 {cache_stats['hits']}회 · 미적중 {cache_stats['misses']}회 · 저장 {cache_stats['entries']}건"
+        )
+
+        if st.session_state.user_name:
+            st.divider()
+            st.subheader("📋 평가 큐")
+            progress = show_eval_queue_sidebar(st.session_state.user_name)
+
+        st.divider()
+        st.subheader("📝 질문 히스토리")
+
+        if not st.session_state.user_name:
+            st.info("이름을 입력하면 질문 히스토리가 표시됩니다.")
+        else:
+            # 피드백 전송 상태 (로컬 스풀 → 구글 시트)
+            pending = pending_feedback_count()
+            show_feedback_queue_status(pending)
+
+            user_history = load_user_history(st.session_state.user_name, pending)
+            if not user_history:
+                st.info(f"{st.session_state.user_name}님의 질문 히스토리가 없습니다.")
+            else:
+                num_pages = (len(user_history) + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+                page = 1
+                if num_pages > 1:
+                    page = st.number_input(
+                        f"페이지 (총 {num_pages}페이지, {len(user_history)}건)",
+                        min_value=1,
+                        max_value=num_pages,
+                        value=1,
+                        key="history_page"
+                    )
+                start = (page - 1) * HISTORY_PAGE_SIZE
+                for item in user_history[start:start + HISTORY_PAGE_SIZE]:
+                    show_history_item(item)
+            st.button("히스토리 새로고침", on_click=invalidate_history,
+                      help="다른 창에서 제출한 피드백까지 다시 불러옵니다.")
+    return user_position, user_company, progress
@@ -0,0 +1,40 @@
+import streamlit as st
+
+# -------------------------------
+# 세션 상태
+# -------------------------------
+DEFAULTS = {
+    'query_history': [],
+    'search_results': None,
+    'current_query': None,
+    'selected_bits': 0,            # 선택된 문서 행 번호 비트셋
+    'queue_item_id': None,         # 현재 검색 결과가 속한 평가 큐 항목
+    'comparison': None,            # A/B 비교 모드 엔드포인트별 결과
+    'feedback_rating': None,
+    'feedback_comment': "",
+    'user_name': "",
+    'is_submitting': False,
+    'last_search_time': None,
+    'submitted_feedback_ids': [],  # 이 세션에서 제출한 스풀 항목 ID
+    'feedback_notice': False,
+    'history_memo': None,          # 사이드바 질문 히스토리 (memo 키, 항목 목록)
+    'near_dup_memo': None,         # 유사 질문 조회 결과 (memo 키, 결과 목록)
+}
+
+
+def init_session_state():
+    """세션 최초 실행 시에만 기본값 설정 (이후 재실행에서는 키 확인만 함)"""
+    if st.session_state.get('_initialized'):
+        return
+    for key, value in DEFAULTS.items():
+        if key not in st.session_state:
+            st.session_state[key] = list(value) if isinstance(value, list) else value
+    st.session_state._initialized = True
+
+
+def clear_search_state():
+    """현재 검색 결과와 선택 상태 초기화 (피드백 제출 후 / 평가 큐 질문 건너뛰기)"""
+    st.session_state.search_results = None
+    st.session_state.comparison = None
+    st.session_state.current_query = None
+    st.session_state.selected_bits = 0